@@ -0,0 +1,151 @@
+import datetime
+import logging
+import os
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+from pandas import DataFrame
+
+from src.data_cache import write_cache, write_columns
+from src.utils import OPERATION_FIELDS
+
+logger = logging.getLogger(__name__)
+
+# The largest number of data rows an xlsx sheet can hold.
+XLSX_MAX_ROWS = 1_048_575
+
+# Merchants by category, with their MCC (None for transfers between people) and share of the operations.
+MERCHANTS = [
+    ("Супермаркеты", 5411, "Магнит", 0.12),
+    ("Супермаркеты", 5411, "Пятерочка", 0.10),
+    ("Супермаркеты", 5499, "CyberOffice_P_QR", 0.02),
+    ("Фастфуд", 5814, "Додо Пицца", 0.06),
+    ("Фастфуд", 5814, "Вкусно — и точка", 0.06),
+    ("Фастфуд", 5814, "Hot Dog Bulldog", 0.02),
+    ("Местный транспорт", 4111, "Московский транспорт", 0.08),
+    ("Местный транспорт", 4111, "Московский метрополитен", 0.06),
+    ("Транспорт", 4131, "Единая транспортная карта (etk21)", 0.02),
+    ("Такси", 3990, "Яндекс Такси", 0.06),
+    ("Развлечения", 7999, "Whoosh", 0.03),
+    ("Аптеки", 5912, "Аптека Ригла", 0.03),
+    ("Одежда и обувь", 5651, "Lamoda", 0.02),
+    ("Связь", 4814, "МТС", 0.02),
+    ("Другое", None, "Подписка premium", 0.01),
+    ("Переводы", 6012, "Перевод на карту", 0.05),
+    ("Переводы", 6536, "Сбер", 0.02),
+    ("Переводы", None, "Андрей А.", 0.06),
+    ("Переводы", None, "Анна К.", 0.05),
+    ("Переводы", None, "Николай И.", 0.05),
+    ("Переводы", None, "Виген К.", 0.04),
+    ("Переводы", None, "Ксения М.", 0.02),
+]
+CARDS = ["*8484", "*2245", "*5433", "*7197"]
+STATUSES = ["OK", "FAILED"]
+
+
+def generate_operations(n_rows: int, seed: int = 0, end: str = "31.12.2024") -> DataFrame:
+    """
+    Generates realistic bank operations with the columns and types of `read_xls_file`.
+
+    The same number of rows and seed always give the same operations. Operations are sorted from the newest to
+    the oldest, like in a bank export, and spread over about two years before the end date.
+
+    Args:
+        n_rows (int): The number of operations.
+        seed (int): The seed of the random generator.
+        end (str): The date of the newest operation in the format 'dd.mm.yyyy'.
+
+    Returns:
+        DataFrame: The operations.
+    """
+    rng = np.random.default_rng(seed)
+    categories, mccs, descriptions, shares = zip(*MERCHANTS)
+    shares = np.array(shares) / np.sum(shares)
+    merchant = rng.choice(len(MERCHANTS), size=n_rows, p=shares)
+    is_transfer = np.array([category == "Переводы" for category in categories])[merchant]
+    is_person = np.array([mcc is None and category == "Переводы" for category, mcc in zip(categories, mccs)])[merchant]
+
+    # Purchases are log-normal debits; a third of the transfers between people are incoming.
+    amounts = -np.round(rng.lognormal(mean=5.5, sigma=1.2, size=n_rows), 2)
+    amounts[is_transfer] = -np.round(rng.lognormal(mean=7.0, sigma=1.0, size=is_transfer.sum()))
+    incoming = is_person & (rng.random(n_rows) < 0.35)
+    amounts[incoming] = -amounts[incoming]
+
+    cashback = np.where(~is_transfer & (rng.random(n_rows) < 0.5), np.floor(-amounts / 100), np.nan)
+    cashback[cashback == 0] = np.nan
+    bonuses = np.nan_to_num(cashback).astype(np.int64)
+
+    end_time = datetime.datetime.strptime(end, "%d.%m.%Y") + datetime.timedelta(days=1)
+    seconds = np.sort(rng.integers(0, 2 * 365 * 24 * 3600, size=n_rows))
+    operation_times = pd.Timestamp(end_time) - pd.to_timedelta(seconds, unit="s")
+    payment_times = operation_times.normalize() + pd.to_timedelta(rng.integers(0, 2, size=n_rows), unit="D")
+
+    cards = np.array(CARDS, dtype=object)[rng.integers(0, len(CARDS), size=n_rows)]
+    cards[is_person & (rng.random(n_rows) < 0.3)] = np.nan
+    statuses = np.array(STATUSES, dtype=object)[(rng.random(n_rows) < 0.01).astype(int)]
+
+    df = DataFrame({
+        "Дата операции": operation_times.strftime("%d.%m.%Y %H:%M:%S").to_numpy(dtype=object),
+        "Дата платежа": payment_times.strftime("%d.%m.%Y").to_numpy(dtype=object),
+        "Номер карты": cards,
+        "Статус": statuses,
+        "Сумма операции": amounts,
+        "Валюта операции": np.full(n_rows, "RUB", dtype=object),
+        "Сумма платежа": amounts,
+        "Валюта платежа": np.full(n_rows, "RUB", dtype=object),
+        "Кэшбэк": cashback,
+        "Категория": np.array(categories, dtype=object)[merchant],
+        "MCC": np.array([np.nan if mcc is None else float(mcc) for mcc in mccs])[merchant],
+        "Описание": np.array(descriptions, dtype=object)[merchant],
+        "Бонусы (включая кэшбэк)": bonuses,
+        "Округление на инвесткопилку": np.zeros(n_rows, dtype=np.int64),
+        "Сумма операции с округлением": np.abs(amounts),
+    })
+    return df[list(OPERATION_FIELDS)]
+
+
+def write_operations(df: DataFrame, directory: str, name: Optional[str] = None) -> str:
+    """
+    Writes generated operations as an xlsx workbook and fills the column cache for it.
+
+    The column cache is the fast format: `read_xls_file_cached` then loads the operations without parsing the
+    workbook.
+
+    Args:
+        df (DataFrame): The operations, at most XLSX_MAX_ROWS of them.
+        directory (str): The directory to write to; the column cache goes to its `.cache` folder.
+        name (Optional[str]): The file name without extension. Defaults to `operations_<rows>`.
+
+    Returns:
+        str: The path to the xlsx workbook.
+
+    Raises:
+        ValueError: If the operations do not fit in an xlsx sheet.
+    """
+    if len(df) > XLSX_MAX_ROWS:
+        raise ValueError(f"{len(df)} operations do not fit in an xlsx sheet of {XLSX_MAX_ROWS} rows")
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"{name or f'operations_{len(df)}'}.xlsx")
+    logger.info(f"Writing {len(df)} operations to {path}")
+    df.to_excel(path, index=False, engine="openpyxl")
+    write_cache(df, path)
+    return path
+
+
+def write_operations_store(df: DataFrame, directory: str, name: Optional[str] = None) -> str:
+    """
+    Writes generated operations as a column store alone, for sizes that do not fit in an xlsx sheet.
+
+    Args:
+        df (DataFrame): The operations.
+        directory (str): The directory to write to.
+        name (Optional[str]): The name of the store directory. Defaults to `operations_<rows>`.
+
+    Returns:
+        str: The directory of the column store, read with `read_columns`.
+    """
+    store = os.path.join(directory, name or f"operations_{len(df)}")
+    logger.info(f"Writing {len(df)} operations to the column store {store}")
+    write_columns(df, store)
+    return store
@@ -0,0 +1,91 @@
+import argparse
+import os
+import platform
+import tempfile
+from typing import Any, Dict, List, Optional, Sequence
+
+from benchmarks.generator import generate_operations, write_operations
+from benchmarks.run import _git_revision, save_results, time_call
+from src.multi_load import load_operations
+
+DEFAULT_WORKERS = (1, 2, 4, 8)
+
+
+def write_exports(n_files: int, rows: int, overlap: int, directory: str, seed: int = 0) -> List[str]:
+    """
+    Writes generated operations as consecutive exports that share some operations with the next one.
+
+    Args:
+        n_files (int): The number of workbooks.
+        rows (int): The number of operations per workbook.
+        overlap (int): The number of operations a workbook shares with the next one.
+        directory (str): The directory to write to.
+        seed (int): The seed of the generated operations.
+
+    Returns:
+        List[str]: The paths to the workbooks.
+    """
+    step = rows - overlap
+    df = generate_operations(step * n_files + overlap, seed)
+    return [write_operations(df.iloc[i * step:i * step + rows], directory, f"export_{i:02d}") for i in range(n_files)]
+
+
+def run_ingest_benchmark(n_files: int = 8, rows: int = 20_000, overlap: int = 1_000,
+                         workers: Sequence[int] = DEFAULT_WORKERS, repeat: int = 1, seed: int = 0,
+                         directory: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Times `load_operations` parsing the same workbooks with different numbers of worker processes.
+
+    Every run parses the workbooks, without the column cache.
+
+    Args:
+        n_files (int): The number of workbooks.
+        rows (int): The number of operations per workbook.
+        overlap (int): The number of operations a workbook shares with the next one.
+        workers (Sequence[int]): The numbers of worker processes to time.
+        repeat (int): The number of runs per number of workers; the best and mean times are reported.
+        seed (int): The seed of the generated operations.
+        directory (Optional[str]): Where to write the workbooks. Defaults to a temporary directory.
+
+    Returns:
+        Dict[str, Any]: One result per number of workers with its times, the speedup over one worker and the
+            parallel efficiency (speedup per worker).
+    """
+    results = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        paths = write_exports(n_files, rows, overlap, directory or tmp_dir, seed)
+        for count in workers:
+            timing = time_call(lambda: load_operations(paths, workers=count, use_cache=False), repeat)
+            results.append({"benchmark": "load_operations", "workers": count, **timing})
+    baseline = results[0]["min_seconds"]
+    for result in results:
+        result["speedup"] = baseline / result["min_seconds"]
+        result["efficiency"] = result["speedup"] / result["workers"]
+    return {"revision": _git_revision(), "files": n_files, "rows_per_file": rows, "overlap": overlap,
+            "repeat": repeat, "cpus": os.cpu_count(), "python": platform.python_version(), "results": results}
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    """
+    Runs the ingestion benchmark from the command line, prints the speedup curve and saves the results.
+    """
+    parser = argparse.ArgumentParser(description="Measure the speedup of parallel workbook loading.")
+    parser.add_argument("--files", type=int, default=8, help="number of workbooks")
+    parser.add_argument("--rows", type=int, default=20_000, help="operations per workbook")
+    parser.add_argument("--overlap", type=int, default=1_000, help="operations shared by adjacent workbooks")
+    parser.add_argument("--workers", type=int, nargs="+", default=list(DEFAULT_WORKERS),
+                        help="numbers of worker processes, the first one is the baseline")
+    parser.add_argument("--repeat", type=int, default=1, help="runs per number of workers")
+    parser.add_argument("--output", help="JSON file for the results")
+    args = parser.parse_args(argv)
+
+    results = run_ingest_benchmark(args.files, args.rows, args.overlap, args.workers, args.repeat)
+    print(f"{results['files']} files of {results['rows_per_file']} operations, {results['cpus']} CPUs")
+    for result in results["results"]:
+        print(f"{result['workers']:>3} workers  {result['min_seconds']:8.3f}s  "
+              f"speedup {result['speedup']:5.2f}  efficiency {result['efficiency']:.0%}")
+    print(f"Results saved to {save_results(results, args.output)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+import argparse
+import asyncio
+import platform
+import tempfile
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from urllib.parse import urlencode
+
+import numpy as np
+
+from benchmarks.generator import generate_operations, write_operations
+from benchmarks.run import CATEGORY, REPORT_DATE, SEARCH_QUERY, _git_revision, save_results, stub_network
+
+# The requests sent in turn by every connection: mostly searches and reports, with an occasional dashboard.
+DEFAULT_PATHS = (
+    "/search?" + urlencode({"query": SEARCH_QUERY}),
+    "/category?" + urlencode({"category": CATEGORY, "date": REPORT_DATE}),
+    "/search?" + urlencode({"query": SEARCH_QUERY}),
+    "/dashboard",
+)
+
+
+async def _request(reader: asyncio.StreamReader, writer: asyncio.StreamWriter, host: str,
+                   path: str) -> Tuple[int, bytes]:
+    writer.write(f"GET {path} HTTP/1.1\r\nHost: {host}\r\nConnection: keep-alive\r\n\r\n".encode("ascii"))
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        if name.strip().lower() == "content-length":
+            length = int(value)
+    return status, await reader.readexactly(length)
+
+
+async def _client(host: str, port: int, paths: Sequence[str], count: int,
+                  latencies: List[float], errors: List[int]) -> None:
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        for i in range(count):
+            started = time.perf_counter()
+            status, _ = await _request(reader, writer, host, paths[i % len(paths)])
+            latencies.append(time.perf_counter() - started)
+            if status != 200:
+                errors.append(status)
+    finally:
+        writer.close()
+
+
+async def run_load_test(host: str, port: int, paths: Sequence[str] = DEFAULT_PATHS, requests: int = 1000,
+                        concurrency: int = 16) -> Dict[str, Any]:
+    """
+    Sends requests to a running server over several keep-alive connections at once and measures the latency.
+
+    Args:
+        host (str): The server address.
+        port (int): The server port.
+        paths (Sequence[str]): The requests every connection sends in turn.
+        requests (int): The total number of requests, split evenly between the connections.
+        concurrency (int): The number of connections sending requests at the same time.
+
+    Returns:
+        Dict[str, Any]: The number of requests and failed requests, the elapsed seconds, the requests per second
+            and the 50th, 99th percentile and maximum latency in milliseconds.
+    """
+    latencies: List[float] = []
+    errors: List[int] = []
+    per_client = [requests // concurrency + (i < requests % concurrency) for i in range(concurrency)]
+    started = time.perf_counter()
+    await asyncio.gather(*(_client(host, port, paths, count, latencies, errors) for count in per_client if count))
+    elapsed = time.perf_counter() - started
+    p50, p99 = np.percentile(latencies, [50, 99]) * 1000
+    return {
+        "requests": len(latencies),
+        "errors": len(errors),
+        "concurrency": concurrency,
+        "seconds": elapsed,
+        "rps": len(latencies) / elapsed,
+        "p50_ms": float(p50),
+        "p99_ms": float(p99),
+        "max_ms": max(latencies) * 1000,
+    }
+
+
+async def _load_test_generated(rows: int, seed: int, requests: int, concurrency: int) -> Dict[str, Any]:
+    from src.server import DatasetServer
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = write_operations(generate_operations(rows, seed), tmp_dir)
+        server = DatasetServer(path, port=0, cache_dir=tmp_dir)
+        await server.start()
+        try:
+            return await run_load_test(server.host, server.port, requests=requests, concurrency=concurrency)
+        finally:
+            await server.stop()
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    """
+    Runs the load test from the command line and saves the results.
+
+    Without --port a server is started in this process over generated operations, with the network requests of
+    the dashboard answered from recorded data.
+    """
+    parser = argparse.ArgumentParser(description="Measure the latency of the HTTP service under concurrent load.")
+    parser.add_argument("--host", default="127.0.0.1", help="address of a running server")
+    parser.add_argument("--port", type=int, help="port of a running server")
+    parser.add_argument("--rows", type=int, default=100_000, help="generated operations when no port is given")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the generated operations")
+    parser.add_argument("--requests", type=int, default=1000, help="total number of requests")
+    parser.add_argument("--concurrency", type=int, default=16, help="number of simultaneous connections")
+    parser.add_argument("--output", help="JSON file for the results")
+    args = parser.parse_args(argv)
+
+    if args.port is None:
+        with stub_network():
+            result = asyncio.run(_load_test_generated(args.rows, args.seed, args.requests, args.concurrency))
+        result["rows"] = args.rows
+    else:
+        result = asyncio.run(run_load_test(args.host, args.port, requests=args.requests,
+                                           concurrency=args.concurrency))
+
+    print(f"{result['requests']} requests ({result['errors']} failed) in {result['seconds']:.3f}s, "
+          f"{result['rps']:.1f} requests/s; p50 {result['p50_ms']:.1f} ms, p99 {result['p99_ms']:.1f} ms")
+    results = {"revision": _git_revision(), "python": platform.python_version(),
+               "results": [{"benchmark": "http load test", **result}]}
+    print(f"Results saved to {save_results(results, args.output)}")
+
+
+if __name__ == "__main__":
+    main()
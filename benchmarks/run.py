@@ -0,0 +1,218 @@
+import argparse
+import contextlib
+import datetime
+import json
+import logging
+import os
+import platform
+import subprocess
+import tempfile
+import time
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence
+from unittest.mock import patch
+
+import pandas as pd
+
+from benchmarks.generator import XLSX_MAX_ROWS, generate_operations, write_operations, write_operations_store
+from src import views
+from src.data_cache import read_columns, read_xls_file_cached
+from src.fuzzy_search import FuzzyIndex
+from src.providers import BulkDownloadProvider, FixtureRatesProvider, RecordedYFinance
+from src.reports import category_spending_rows, spending_by_category
+from src.schema import compact_transactions
+from src.services import search_by_request, search_operations
+from src.utils import convert_data_frame_to_json, read_xls_file, serialize_operations
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_ROWS = (1_000, 10_000, 100_000)
+XLSX_BENCHMARK_ROWS = 100_000
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+FIXTURE_RATES = {"base": "USD", "rates": {"USD": 1.0, "EUR": 0.92, "RUB": 89.5}}
+SEARCH_QUERY = "такси"
+# "пятерочка" with two letters swapped, typed in the Latin layout.
+FUZZY_QUERY = "gznthxjrf"
+CATEGORY = "Супермаркеты"
+REPORT_DATE = "31.12.2024"
+
+
+def _git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+@contextlib.contextmanager
+def stub_network() -> Iterator[None]:
+    """
+    Replaces the exchange rates and stock price sources with recorded data, so `get_data` makes no requests.
+    """
+    history = pd.DataFrame({"High": [100.0]}, index=pd.DatetimeIndex(["2024-12-31"]))
+    yfinance = RecordedYFinance({symbol: history for symbol in views._load_settings()["user_stocks"]})
+    with patch.object(views, "rates_provider", FixtureRatesProvider(FIXTURE_RATES)), \
+            patch.object(views, "stock_provider", BulkDownloadProvider(yfinance)):
+        clear_quote_caches()
+        yield
+
+
+def clear_quote_caches() -> None:
+    """
+    Empties the exchange rate and stock price caches, so the next `get_data` asks the providers again.
+    """
+    views.currency_cache.clear()
+    views.stock_cache.clear()
+
+
+def time_call(func: Callable[[], Any], repeat: int, setup: Optional[Callable[[], Any]] = None) -> Dict[str, float]:
+    """
+    Runs a function several times and returns the best and mean wall time in seconds.
+
+    Args:
+        func (Callable[[], Any]): The function to time.
+        repeat (int): The number of runs.
+        setup (Optional[Callable[[], Any]]): Called before every run, outside the timing.
+    """
+    timings = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return {"min_seconds": min(timings), "mean_seconds": sum(timings) / len(timings)}
+
+
+def run_benchmarks(rows: Sequence[int] = DEFAULT_ROWS, repeat: int = 3, seed: int = 0,
+                   directory: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Times the main functions of the application on generated operations of several sizes.
+
+    The operations are written as xlsx and to the column cache once per size; parsing the xlsx with
+    `read_xls_file` is only timed up to XLSX_BENCHMARK_ROWS operations, as it takes minutes beyond that. Sizes
+    that do not fit in an xlsx sheet are written to a column store alone, and loading it is timed instead. Network requests of `get_data`
+    are answered from recorded data, with the quote caches emptied before every run so that every run makes
+    them, and `spending_by_category` is timed without writing its report file. The search is also timed end to
+    end on compact operations, once through the JSON text of all operations and once with the native
+    `search_operations`, serializing only the matches. The fuzzy search is timed on an index built beforehand,
+    as it only depends on the number of distinct descriptions.
+
+    Args:
+        rows (Sequence[int]): The numbers of operations to benchmark.
+        repeat (int): The number of runs of every function; the best and mean times are reported.
+        seed (int): The seed of the generator.
+        directory (Optional[str]): Where to write the generated files. Defaults to a temporary directory.
+
+    Returns:
+        Dict[str, Any]: The environment of the run and one result per size and function.
+    """
+    results: List[Dict[str, Any]] = []
+    with tempfile.TemporaryDirectory() as tmp_dir, stub_network():
+        for n_rows in rows:
+            df = generate_operations(n_rows, seed)
+            operations_json = convert_data_frame_to_json(df)
+            compact = compact_transactions(df)
+            fuzzy_index = FuzzyIndex(compact["Описание"])
+
+            benchmarks: Dict[str, Callable[[], Any]] = {
+                "convert_data_frame_to_json": lambda: convert_data_frame_to_json(df),
+                "search_by_request": lambda: search_by_request(SEARCH_QUERY, operations_json),
+                # The search as `main` used to run it, from the DataFrame through JSON and back, and natively.
+                "search_json_round_trip": lambda: search_by_request(SEARCH_QUERY,
+                                                                    convert_data_frame_to_json(compact)),
+                "search_operations": lambda: serialize_operations(
+                    compact.iloc[search_operations(SEARCH_QUERY, compact)]),
+                "fuzzy_match": lambda: fuzzy_index.match(FUZZY_QUERY),
+                "spending_by_category": lambda: spending_by_category.__wrapped__(df, CATEGORY, REPORT_DATE),
+                "category_spending_rows": lambda: category_spending_rows(compact, CATEGORY, REPORT_DATE),
+                "get_data": lambda: views.get_data(df),
+            }
+            if n_rows <= XLSX_MAX_ROWS:
+                path = write_operations(df, directory or tmp_dir)
+                benchmarks = {"read_xls_file_cached": lambda: read_xls_file_cached(path), **benchmarks}
+                if n_rows <= XLSX_BENCHMARK_ROWS:
+                    benchmarks = {"read_xls_file": lambda: read_xls_file(path), **benchmarks}
+            else:
+                store = write_operations_store(df, directory or tmp_dir)
+                benchmarks = {"read_columns": lambda: read_columns(store), **benchmarks}
+
+            for name, func in benchmarks.items():
+                logger.info(f"Benchmarking {name} on {n_rows} operations")
+                setup = clear_quote_caches if name == "get_data" else None
+                results.append({"benchmark": name, "rows": n_rows, **time_call(func, repeat, setup)})
+
+    return {
+        "revision": _git_revision(),
+        "created": datetime.datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "repeat": repeat,
+        "seed": seed,
+        "results": results,
+    }
+
+
+def save_results(results: Dict[str, Any], output_file: Optional[str] = None) -> str:
+    """
+    Saves benchmark results as JSON, by default to `benchmarks/results/<revision>_<timestamp>.json`.
+
+    Returns:
+        str: The path of the saved file.
+    """
+    if output_file is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        stamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+        output_file = os.path.join(RESULTS_DIR, f"{results['revision'] or 'unknown'}_{stamp}.json")
+    with open(output_file, "w", encoding="utf-8") as f:
+        json.dump(results, f, ensure_ascii=False, indent=4)
+    return output_file
+
+
+def compare_results(baseline_file: str, current_file: str) -> pd.DataFrame:
+    """
+    Compares two saved benchmark runs.
+
+    Args:
+        baseline_file (str): The results of the reference version.
+        current_file (str): The results of the version to check.
+
+    Returns:
+        pd.DataFrame: The best times of both runs for every benchmark and size, and their ratio; a ratio above 1
+            means the current version is slower.
+    """
+    frames = []
+    for label, path in (("baseline", baseline_file), ("current", current_file)):
+        with open(path, encoding="utf-8") as f:
+            results = pd.DataFrame(json.load(f)["results"])
+        frames.append(results.set_index(["benchmark", "rows"])["min_seconds"].rename(label))
+    comparison = pd.concat(frames, axis=1)
+    comparison["ratio"] = comparison["current"] / comparison["baseline"]
+    return comparison.reset_index()
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    """
+    Runs the benchmarks from the command line and saves the results, or compares two saved runs.
+    """
+    parser = argparse.ArgumentParser(description="Benchmark the transaction analyzer on generated operations.")
+    parser.add_argument("--rows", type=int, nargs="+", default=list(DEFAULT_ROWS),
+                        help="numbers of operations to generate, from 1000 to 10000000")
+    parser.add_argument("--repeat", type=int, default=3, help="runs of every function")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the generator")
+    parser.add_argument("--output", help="JSON file for the results")
+    parser.add_argument("--compare", nargs=2, metavar=("BASELINE", "CURRENT"),
+                        help="compare two saved runs instead of running the benchmarks")
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        print(compare_results(*args.compare).to_string(index=False))
+        return
+
+    results = run_benchmarks(args.rows, args.repeat, args.seed)
+    print(pd.DataFrame(results["results"]).to_string(index=False))
+    print(f"Results saved to {save_results(results, args.output)}")
+
+
+if __name__ == "__main__":
+    main()
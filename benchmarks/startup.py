@@ -0,0 +1,101 @@
+import argparse
+import os
+import platform
+import re
+import subprocess
+import sys
+from typing import Any, Dict, List, Optional, Sequence
+
+from benchmarks.run import _git_revision, save_results
+
+# The modules behind each entry point: search, reports, the dashboard and the whole command line.
+STARTUP_MODULES = ("src.services", "src.reports", "src.views", "src.main")
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+IMPORTTIME_LINE = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def parse_importtime(output: str) -> List[Dict[str, Any]]:
+    """
+    Parses the `-X importtime` log of a Python process.
+
+    Args:
+        output (str): The standard error of the process.
+
+    Returns:
+        List[Dict[str, Any]]: One entry per imported module with its own and cumulative import time in
+            microseconds and its nesting level.
+    """
+    imports = []
+    for line in output.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, module = match.groups()
+            imports.append({"module": module, "self_us": int(self_us), "cumulative_us": int(cumulative_us),
+                            "level": (len(indent) - 1) // 2})
+    return imports
+
+
+def measure_import(module: str) -> List[Dict[str, Any]]:
+    """
+    Imports a module in a fresh interpreter with `-X importtime` and returns the parsed log.
+    """
+    completed = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"], cwd=ROOT_DIR,
+                               capture_output=True, text=True, check=True)
+    return parse_importtime(completed.stderr)
+
+
+def run_startup_benchmark(modules: Sequence[str] = STARTUP_MODULES, repeat: int = 5,
+                          top: int = 10) -> Dict[str, Any]:
+    """
+    Measures how long importing each entry point module takes, and which dependencies cost the most.
+
+    Args:
+        modules (Sequence[str]): The modules to import.
+        repeat (int): The number of fresh interpreters per module; the fastest run is kept.
+        top (int): The number of most expensive top-level dependencies listed per module.
+
+    Returns:
+        Dict[str, Any]: One result per module with the total import time in seconds and the slowest
+            dependencies imported directly by the run.
+    """
+    results = []
+    for module in modules:
+        runs = [measure_import(module) for _ in range(repeat)]
+        best = min(runs, key=lambda imports: imports[-1]["cumulative_us"])
+        # The module is logged last, after its dependencies and after the interpreter's own startup imports.
+        start = max((i for i, entry in enumerate(best[:-1]) if entry["level"] == 0), default=-1) + 1
+        dependencies = sorted((entry for entry in best[start:-1] if entry["level"] == 1),
+                              key=lambda entry: -entry["cumulative_us"])
+        results.append({
+            "benchmark": f"import {module}",
+            "module": module,
+            "min_seconds": best[-1]["cumulative_us"] / 1e6,
+            "mean_seconds": sum(imports[-1]["cumulative_us"] for imports in runs) / len(runs) / 1e6,
+            "modules_imported": len(best) - start,
+            "slowest_dependencies": [
+                {"module": entry["module"], "seconds": entry["cumulative_us"] / 1e6} for entry in dependencies[:top]
+            ],
+        })
+    return {"revision": _git_revision(), "repeat": repeat, "python": platform.python_version(), "results": results}
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    """
+    Runs the startup benchmark from the command line and saves the results.
+    """
+    parser = argparse.ArgumentParser(description="Measure the import time of the application entry points.")
+    parser.add_argument("modules", nargs="*", default=list(STARTUP_MODULES), help="modules to import")
+    parser.add_argument("--repeat", type=int, default=5, help="fresh interpreters per module")
+    parser.add_argument("--output", help="JSON file for the results")
+    args = parser.parse_args(argv)
+
+    results = run_startup_benchmark(args.modules, args.repeat)
+    for result in results["results"]:
+        dependencies = ", ".join(f"{entry['module']} {entry['seconds']:.3f}s"
+                                 for entry in result["slowest_dependencies"][:3])
+        print(f"{result['benchmark']:<20} {result['min_seconds']:.3f}s  ({dependencies})")
+    print(f"Results saved to {save_results(results, args.output)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+import argparse
+import json
+import logging
+import sys
+import time
+from typing import Any, Callable, Dict, Iterable, Optional, Sequence, TextIO, Tuple
+
+from src.dataset import Dataset
+from src.utils import serialize_operations
+
+logger = logging.getLogger(__name__)
+
+
+def _flag(value: Any) -> bool:
+    # Flags come as JSON booleans in batch commands and as text in the query strings of the HTTP service.
+    return value.lower() in ("1", "true", "yes") if isinstance(value, str) else bool(value)
+
+
+def _search(dataset: Dataset, command: Dict[str, Any]) -> str:
+    return serialize_operations(dataset.search(command["query"], _flag(command.get("fuzzy"))), mode="compact")
+
+
+def _category(dataset: Dataset, command: Dict[str, Any]) -> str:
+    return serialize_operations(dataset.category_report(command["category"], command.get("date")), mode="compact")
+
+
+def _dashboard(dataset: Dataset, command: Dict[str, Any]) -> str:
+    return json.dumps(dataset.dashboard(), ensure_ascii=False)
+
+
+# Arguments that may be given as JSON booleans; all other arguments are text.
+FLAGS = ("fuzzy",)
+
+
+def _check_arguments(command: Dict[str, Any]) -> None:
+    """
+    Raises ValueError unless the command name and every argument of a command are strings; flags may also be
+    booleans. The "id" is copied to the output as is.
+    """
+    for key, value in command.items():
+        if key == "id" or isinstance(value, str) or (key in FLAGS and isinstance(value, bool)):
+            continue
+        raise ValueError(f"'{key}' must be a string, not {type(value).__name__}")
+
+
+# Every command returns its result as JSON text, so operations are serialized once, straight into the output.
+COMMANDS: Dict[str, Callable[[Dataset, Dict[str, Any]], str]] = {
+    "search": _search,
+    "category": _category,
+    "dashboard": _dashboard,
+}
+
+
+def execute(dataset: Dataset, line: str, number: int) -> Tuple[str, bool]:
+    """
+    Runs one command and returns its NDJSON output line.
+
+    A command is a JSON object with the name of the command and its arguments, e.g.
+    `{"command": "search", "query": "такси"}` (with `"fuzzy": true` for the typo-tolerant search),
+    `{"command": "category", "category": "Фастфуд", "date": "31.12.2024"}`
+    or `{"command": "dashboard"}`. An optional "id" is copied to the output, which defaults to the line number.
+    Any error of a command, including arguments of the wrong type, is reported on its output line.
+
+    Args:
+        dataset (Dataset): The dataset to query.
+        line (str): The command.
+        number (int): The line number of the command.
+
+    Returns:
+        Tuple[str, bool]: A JSON object with the id, the command, the time it took and its result or error, and
+            whether the command succeeded.
+    """
+    started = time.perf_counter()
+    command: Dict[str, Any] = {}
+    result: Optional[str] = None
+    error: Optional[str] = None
+    try:
+        command = json.loads(line)
+        if not isinstance(command, dict):
+            raise ValueError("A command must be a JSON object")
+        _check_arguments(command)
+        name = command.get("command")
+        if name not in COMMANDS:
+            raise ValueError(f"Unknown command '{name}', expected one of {list(COMMANDS)}")
+        result = COMMANDS[name](dataset, command)
+    except (KeyError, ValueError) as e:
+        error = f"{type(e).__name__}: {e}"
+        logger.error(f"Command on line {number} failed: {error}")
+    except Exception as e:
+        # A failing command must not stop the batch; the commands after it still run.
+        error = f"{type(e).__name__}: {e}"
+        logger.exception(f"Command on line {number} failed")
+
+    header = {"id": command.get("id", number), "command": command.get("command"),
+              "seconds": round(time.perf_counter() - started, 6)}
+    if result is None:
+        return json.dumps({**header, "error": error}, ensure_ascii=False), False
+    return json.dumps(header, ensure_ascii=False)[:-1] + ', "result": ' + result + "}", True
+
+
+def run_batch(dataset: Dataset, commands: Iterable[str], output: TextIO) -> Dict[str, Any]:
+    """
+    Runs a stream of commands against a dataset and writes one NDJSON line per command.
+
+    Args:
+        dataset (Dataset): The dataset to query.
+        commands (Iterable[str]): The commands, one JSON object per line; blank lines are skipped.
+        output (TextIO): Where to write the results.
+
+    Returns:
+        Dict[str, Any]: The number of commands, failed commands, the elapsed seconds and the queries per second.
+    """
+    started = time.perf_counter()
+    count = errors = 0
+    for number, line in enumerate(commands, 1):
+        if not line.strip():
+            continue
+        result, ok = execute(dataset, line, number)
+        output.write(result + "\n")
+        count += 1
+        errors += not ok
+    elapsed = time.perf_counter() - started
+    return {"commands": count, "errors": errors, "seconds": elapsed, "qps": count / elapsed if elapsed else 0.0}
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    """
+    Loads a workbook once and answers a stream of commands from a file or stdin with NDJSON results.
+    """
+    parser = argparse.ArgumentParser(description="Run search, category report and dashboard commands in batch.")
+    parser.add_argument("path", help="Excel file with the operations")
+    parser.add_argument("commands", nargs="?", default="-", help="NDJSON file with the commands, - for stdin")
+    parser.add_argument("-o", "--output", default="-", help="NDJSON file for the results, - for stdout")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s', stream=sys.stderr)
+
+    started = time.perf_counter()
+    dataset = Dataset.load(args.path)
+    load_seconds = time.perf_counter() - started
+
+    commands = sys.stdin if args.commands == "-" else open(args.commands, encoding="utf-8")
+    output = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    try:
+        stats = run_batch(dataset, commands, output)
+    finally:
+        if commands is not sys.stdin:
+            commands.close()
+        if output is not sys.stdout:
+            output.close()
+
+    print(f"{stats['commands']} commands ({stats['errors']} failed) in {stats['seconds']:.3f}s, "
+          f"{stats['qps']:.1f} queries/s; dataset loaded in {load_seconds:.3f}s", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
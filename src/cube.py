@@ -0,0 +1,230 @@
+import logging
+import os
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+from pandas import DataFrame
+
+from src.data_cache import get_cache_dir, read_store, write_store
+from src.date_index import DateIndex
+from src.profiling import profiled
+from src.reports import get_date_range
+from src.schema import DATE_COLUMNS, restore_transactions
+from src.views import build_dashboard, card_records, top_transaction
+
+logger = logging.getLogger(__name__)
+
+CUBE_VERSION = 1
+CUBE_DIR = "cube"
+MONTH = "Месяц"
+DEBIT = "Списание"
+COUNT = "Количество"
+DIMENSIONS = (MONTH, "Категория", "Номер карты", "MCC", DEBIT)
+MEASURES = ("Сумма операции", "Кэшбэк", "Бонусы (включая кэшбэк)")
+# Measures summed in kopecks, so that the totals do not depend on the order of the additions.
+KOPECK_MEASURES = ("Сумма операции", "Кэшбэк")
+
+
+class SummaryCube:
+    """
+    Operation totals by month, category, card, MCC and direction, computed once over all operations.
+
+    Every cell holds the sums of the amount, cashback and bonuses and the number of operations of one month,
+    category, card, MCC and direction (debit or not); only the combinations that occur are stored. Dashboards
+    and reports summed over these dimensions are answered from the cells instead of the operations.
+    Amounts and cashback are summed in kopecks.
+    """
+
+    def __init__(self, cells: DataFrame) -> None:
+        """
+        Args:
+            cells (DataFrame): One row per cell, with the DIMENSIONS, the MEASURES and COUNT as columns.
+        """
+        self.cells = cells
+
+    @classmethod
+    @profiled
+    def build(cls, df: DataFrame) -> "SummaryCube":
+        """
+        Aggregates operations into a cube.
+
+        Args:
+            df (DataFrame): The operations, as read or compact.
+
+        Returns:
+            SummaryCube: The cube.
+        """
+        dates = df['Дата операции']
+        if dates.dtype.kind != 'M':
+            dates = pd.to_datetime(dates, format=DATE_COLUMNS['Дата операции'])
+
+        frame = DataFrame({
+            MONTH: dates.to_numpy().astype('datetime64[M]').astype('datetime64[ns]'),
+            'Категория': df['Категория'].to_numpy(),
+            'Номер карты': df['Номер карты'].to_numpy(),
+            'MCC': df['MCC'].to_numpy(dtype=float, na_value=np.nan),
+            DEBIT: df['Сумма операции'].lt(0).to_numpy(dtype=bool, na_value=False),
+            **_measures(df),
+            COUNT: np.ones(len(df), dtype=np.int64),
+        })
+        cells = frame.groupby(list(DIMENSIONS), observed=True, dropna=False, sort=True).sum().reset_index()
+        logger.info(f"Summarized {len(df)} operations in {len(cells)} cells")
+        return cls(_compact_cells(cells))
+
+    def _sums(self, by: Sequence[str] = (), filters: Optional[Dict[str, Any]] = None) -> DataFrame:
+        cells = self.cells
+        for name, value in (filters or {}).items():
+            values = value if isinstance(value, (list, tuple, set)) else [value]
+            cells = cells[cells[name].isin(values).to_numpy(dtype=bool)]
+        if not by:
+            return cells[[*MEASURES, COUNT]].sum().to_frame().T
+        return cells.groupby(list(by), observed=True, dropna=False, sort=True)[[*MEASURES, COUNT]].sum()
+
+    def totals(self, by: Sequence[str] = (), filters: Optional[Dict[str, Any]] = None) -> DataFrame:
+        """
+        Sums the cells matching the filters, per value of the given dimensions.
+
+        Args:
+            by (Sequence[str]): The dimensions to group by; without any, a single row of grand totals.
+            filters (Optional[Dict[str, Any]]): A value, or a list of values, to keep for some dimensions; months
+                are given as the first day of the month.
+
+        Returns:
+            DataFrame: The amount, cashback and bonus totals in rubles and the number of operations.
+        """
+        totals = self._sums(by, filters)
+        totals[list(KOPECK_MEASURES)] = totals[list(KOPECK_MEASURES)] / 100
+        return totals
+
+    def card_data(self) -> List[Dict[str, str]]:
+        """
+        Returns the card data in the format of `get_card_data`, from the debit cells.
+        """
+        debit = self.cells[self.cells[DEBIT].to_numpy(dtype=bool)]
+        cards = debit['Номер карты']
+        if 'Unknown' not in cards.cat.categories:
+            cards = cards.cat.add_categories('Unknown')
+        debit = debit.assign(**{'Номер карты': cards.fillna('Unknown')})
+        totals = debit.groupby('Номер карты', observed=True, sort=False)[list(KOPECK_MEASURES)].sum() / 100
+        totals.index = totals.index.astype(object)
+        return card_records(totals)
+
+    def category_totals(self, category: str, date_index: DateIndex, date: Optional[str] = None) -> Dict[str, float]:
+        """
+        Sums the operations of a category in the three months before a date, the window of `spending_by_category`.
+
+        The months lying wholly inside the window are summed from the cells; the operations of the two months the
+        window starts and ends in are found with the date index, so only they are read.
+
+        Args:
+            category (str): The category.
+            date_index (DateIndex): A date index built over the operations the cube was built from.
+            date (Optional[str]): The end date in the format 'dd.mm.yyyy'. Defaults to now if not provided.
+
+        Returns:
+            Dict[str, float]: The amount, cashback and bonus totals in rubles and the number of operations.
+        """
+        start_date, end_date = get_date_range(date)
+        first_month = pd.Timestamp(start_date).to_period('M')
+        last_month = pd.Timestamp(end_date).to_period('M')
+        inner = [month.to_timestamp() for month in pd.period_range(first_month + 1, last_month - 1, freq='M')]
+        totals = self._sums(filters={'Категория': category, MONTH: inner}).iloc[0]
+
+        # The partial months at the edges of the window, or the whole window if it lies within one month.
+        if first_month == last_month:
+            edges = [(start_date, end_date)]
+        else:
+            edges = [(start_date, (first_month + 1).to_timestamp() - pd.Timedelta(1, 'ns')),
+                     (last_month.to_timestamp(), end_date)]
+        rows = np.concatenate([date_index.window(category, start, end) for start, end in edges])
+        edge = date_index.df.iloc[rows]
+        edge_totals = {name: values.sum() for name, values in _measures(edge).items()}
+
+        result = {name: float(totals[name] + edge_totals[name]) for name in MEASURES}
+        for name in KOPECK_MEASURES:
+            result[name] = (int(totals[name]) + int(edge_totals[name])) / 100
+        return result | {COUNT: int(totals[COUNT]) + len(rows)}
+
+    def save(self, path: str, cache_dir: Optional[str] = None) -> None:
+        """
+        Stores the cube in the column cache of the workbook it was built from.
+
+        Args:
+            path (str): The path to the Excel file.
+            cache_dir (Optional[str]): The root cache directory, see `read_xls_file_cached`.
+        """
+        store = os.path.join(get_cache_dir(path, cache_dir), CUBE_DIR)
+        # Nullable MCC is stored as float with NaN, like in the workbook.
+        if write_store(self.cells.assign(MCC=self.cells['MCC'].astype(float)), store, path, CUBE_VERSION):
+            logger.info(f"Summary cube written to {store}")
+
+    @classmethod
+    def read(cls, path: str, cache_dir: Optional[str] = None) -> Optional["SummaryCube"]:
+        """
+        Loads the cube of a workbook from its column cache, if it was built from the current contents.
+
+        Returns:
+            Optional[SummaryCube]: The cube, or None if it is missing or out of date.
+        """
+        cells = read_store(os.path.join(get_cache_dir(path, cache_dir), CUBE_DIR), path, CUBE_VERSION)
+        return None if cells is None else cls(_compact_cells(cells))
+
+
+def _measures(df: DataFrame) -> Dict[str, np.ndarray]:
+    """
+    Returns the measures of every operation, the amount and cashback in integer kopecks; missing values are 0.
+    """
+    values = restore_transactions(df[list(MEASURES)], list(KOPECK_MEASURES))
+    measures = {name: np.nan_to_num(values[name].to_numpy(dtype=float, na_value=np.nan)) for name in MEASURES}
+    for name in KOPECK_MEASURES:
+        measures[name] = np.round(measures[name] * 100).astype(np.int64)
+    return measures
+
+
+def _compact_cells(cells: DataFrame) -> DataFrame:
+    """
+    Stores the text dimensions as categoricals and MCC as a nullable int16.
+    """
+    mcc = cells['MCC'].astype(float)
+    present = mcc.dropna()
+    fits = not len(present) or (not np.any(present % 1) and present.between(0, np.iinfo(np.int16).max).all())
+    return cells.assign(**{
+        'Категория': cells['Категория'].astype('category'),
+        'Номер карты': cells['Номер карты'].astype('category'),
+        'MCC': mcc.astype('Int16') if fits else mcc,
+    })
+
+
+def load_cube(path: str, df: DataFrame, cache_dir: Optional[str] = None) -> SummaryCube:
+    """
+    Loads the cube of a workbook from its column cache, or builds it from the operations and stores it.
+
+    Args:
+        path (str): The path to the Excel file.
+        df (DataFrame): The operations read from the file.
+        cache_dir (Optional[str]): The root cache directory, see `read_xls_file_cached`.
+
+    Returns:
+        SummaryCube: The cube.
+    """
+    cube = SummaryCube.read(path, cache_dir)
+    if cube is None:
+        cube = SummaryCube.build(df)
+        cube.save(path, cache_dir)
+    return cube
+
+
+def get_data_from_cube(df: DataFrame, cube: SummaryCube) -> str:
+    """
+    Retrieves all necessary data for the dashboard, with the card data taken from the summary cube.
+
+    Args:
+        df (DataFrame): The operations, for the top transactions.
+        cube (SummaryCube): The cube built over the operations.
+
+    Returns:
+        str: The dashboard as a JSON string, in the format of `get_data`.
+    """
+    logger.info("Getting data for the dashboard from the summary cube...")
+    return build_dashboard(lambda: (cube.card_data(), top_transaction(df)))
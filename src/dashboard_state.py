@@ -0,0 +1,217 @@
+import heapq
+import json
+import logging
+import os
+from typing import Any, Dict, List
+
+import numpy as np
+import pandas as pd
+from pandas import DataFrame
+
+from src.schema import restore_transactions
+from src.views import TOP_COLUMNS, build_dashboard, card_records, card_totals, top_records
+
+logger = logging.getLogger(__name__)
+
+STATE_VERSION = 3
+TOP_N = 5
+# The processed rows hashed to check that they have not changed: rows spread evenly over the history and the
+# latest rows, where corrections of recent operations land. Shorter histories are hashed in full.
+SAMPLE_ROWS = 1024
+TAIL_ROWS = 256
+CARD_TOTAL_COLUMNS = ['Сумма операции', 'Кэшбэк']
+# The columns the dashboard is built from; changes to other columns do not affect it.
+HASHED_COLUMNS = ['Номер карты', *CARD_TOTAL_COLUMNS, *TOP_COLUMNS]
+
+
+def _sample_positions(row_count: int) -> np.ndarray:
+    """
+    Returns the positions of the processed rows that are hashed, at most SAMPLE_ROWS + TAIL_ROWS of them.
+    """
+    if row_count <= SAMPLE_ROWS + TAIL_ROWS:
+        return np.arange(row_count)
+    spread = np.linspace(0, row_count - 1, SAMPLE_ROWS).astype(np.int64)
+    return np.union1d(spread, np.arange(row_count - TAIL_ROWS, row_count))
+
+
+def _rows_hash(df: DataFrame, positions: np.ndarray) -> int:
+    """
+    Hashes the dashboard columns of the rows at the given positions, together with the positions.
+
+    The columns are hashed in the types they have, so a compact frame hashes differently from the original one
+    and switching between the two rebuilds the state once.
+    """
+    rows = df.iloc[positions][HASHED_COLUMNS].set_axis(pd.Index(positions))
+    return int(pd.util.hash_pandas_object(rows, index=True).to_numpy().sum(dtype=np.uint64))
+
+
+def _top_candidates(df: DataFrame, offset: int, n: int) -> List[Dict[str, Any]]:
+    """
+    Returns the n largest operations of a DataFrame with their row positions.
+    """
+    top = restore_transactions(df.reset_index(drop=True).nlargest(n, 'Сумма операции'))
+    return [
+        {"position": offset + int(position), "amount": float(amount), "record": record}
+        for position, amount, record in zip(top.index, top['Сумма операции'],
+                                            top[list(TOP_COLUMNS)].to_dict(orient='records'))
+    ]
+
+
+class DashboardState:
+    """
+    Per-card totals and the largest operations of a transaction history, kept up to date as rows are appended.
+
+    Only the rows added since the last update are aggregated, so an update costs O(new rows). To check that
+    the processed rows are unchanged, the dashboard columns of a bounded sample of them are hashed, see
+    `_sample_positions`: a history of up to SAMPLE_ROWS + TAIL_ROWS rows is checked in full, a longer one at
+    rows spread over it and at its latest rows. If a sampled row changed, or the history got shorter, the state
+    is rebuilt from scratch.
+    """
+
+    def __init__(self, top_n: int = TOP_N) -> None:
+        """
+        Creates an empty state.
+
+        Args:
+            top_n (int): The number of largest operations to keep.
+        """
+        self.top_n = top_n
+        self.row_count = 0
+        self.sample_hash = 0
+        self.cards = DataFrame(columns=CARD_TOTAL_COLUMNS, dtype=float)
+        self.top: List[Dict[str, Any]] = []
+
+    def _is_prefix_of(self, df: DataFrame) -> bool:
+        return len(df) >= self.row_count and _rows_hash(df, _sample_positions(self.row_count)) == self.sample_hash
+
+    def _add_rows(self, new_rows: DataFrame, offset: int) -> None:
+        self.cards = self.cards.add(card_totals(new_rows), fill_value=0.0)
+
+        candidates = self.top + _top_candidates(new_rows, offset, self.top_n)
+        self.top = heapq.nlargest(self.top_n, candidates, key=lambda entry: (entry["amount"], -entry["position"]))
+
+    def reset(self) -> None:
+        """
+        Forgets all processed rows.
+        """
+        self.row_count = 0
+        self.sample_hash = 0
+        self.cards = DataFrame(columns=CARD_TOTAL_COLUMNS, dtype=float)
+        self.top = []
+
+    def update(self, df: DataFrame) -> bool:
+        """
+        Brings the state up to date with a transaction history.
+
+        Args:
+            df (DataFrame): The full transaction history, with the previously processed rows first.
+
+        Returns:
+            bool: True if only the new rows were aggregated, False if the state was rebuilt.
+        """
+        incremental = self._is_prefix_of(df)
+        if not incremental:
+            if self.row_count:
+                logger.warning("Processed transactions have changed, recomputing the dashboard aggregates")
+            self.reset()
+
+        logger.info("Aggregating %d new operations", len(df) - self.row_count)
+        self._add_rows(df.iloc[self.row_count:], self.row_count)
+        self.row_count = len(df)
+        self.sample_hash = _rows_hash(df, _sample_positions(self.row_count))
+        return incremental
+
+    def card_data(self) -> List[Dict[str, str]]:
+        """
+        Returns the card data in the format of `get_card_data`.
+        """
+        return card_records(self.cards)
+
+    def top_transactions(self) -> List[Dict[str, str]]:
+        """
+        Returns the largest operations in the format of `top_transaction`.
+        """
+        return top_records(DataFrame([entry["record"] for entry in self.top], columns=list(TOP_COLUMNS)))
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"version": STATE_VERSION, "top_n": self.top_n, "row_count": self.row_count,
+                "sample_hash": self.sample_hash,
+                "cards": self.cards.T.to_dict(orient='list'), "top": self.top}
+
+    def save(self, path: str) -> None:
+        """
+        Writes the state to a JSON file, replacing it atomically.
+        """
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp_file = f"{path}.tmp"
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, default=str)
+        os.replace(tmp_file, path)
+
+    @classmethod
+    def load(cls, path: str, top_n: int = TOP_N) -> "DashboardState":
+        """
+        Reads a state from a JSON file.
+
+        Args:
+            path (str): The path to the state file.
+            top_n (int): The number of largest operations to keep.
+
+        Returns:
+            DashboardState: The saved state, or an empty one if the file is missing, unreadable or was saved
+                with another version or `top_n`.
+        """
+        state = cls(top_n)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                saved = json.load(f)
+        except FileNotFoundError:
+            return state
+        except (OSError, ValueError) as e:
+            logger.warning(f"Failed to load dashboard state from {path}: {e}")
+            return state
+
+        if saved.get("version") != STATE_VERSION or saved.get("top_n") != top_n:
+            return state
+        state.row_count = saved["row_count"]
+        state.sample_hash = saved["sample_hash"]
+        state.cards = DataFrame.from_dict(saved["cards"], orient='index', columns=CARD_TOTAL_COLUMNS, dtype=float)
+        state.top = saved["top"]
+        return state
+
+
+def update_dashboard_state(df: DataFrame, path: str) -> DashboardState:
+    """
+    Loads the saved dashboard state, adds the transactions appended since it was saved and saves it again.
+
+    Args:
+        df (DataFrame): The full transaction history.
+        path (str): The path to the state file.
+
+    Returns:
+        DashboardState: The up-to-date state.
+    """
+    state = DashboardState.load(path)
+    state.update(df)
+    state.save(path)
+    return state
+
+
+def get_data_incremental(df: DataFrame, state_path: str) -> str:
+    """
+    Retrieves all necessary data for the dashboard, aggregating only the transactions added since the last run.
+
+    Args:
+        df (DataFrame): The full transaction history.
+        state_path (str): The path to the saved dashboard state.
+
+    Returns:
+        str: The dashboard as a JSON string, the same as `get_data` returns.
+    """
+    logger.info("Getting data for the dashboard incrementally...")
+
+    def collect() -> Any:
+        state = update_dashboard_state(df, state_path)
+        return state.card_data(), state.top_transactions()
+
+    return build_dashboard(collect)
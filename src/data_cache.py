@@ -0,0 +1,297 @@
+import hashlib
+import json
+import logging
+import os
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+from pandas import DataFrame
+
+from src.utils import read_xls_file
+
+logger = logging.getLogger(__name__)
+
+CACHE_VERSION = 1
+META_FILE = "meta.json"
+HASH_BLOCK_SIZE = 1024 * 1024
+
+
+def file_sha256(path: str) -> str:
+    """
+    Computes the SHA-256 hash of a file, reading it block by block.
+
+    Args:
+        path (str): The path to the file.
+
+    Returns:
+        str: The hex digest of the file contents.
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def get_cache_dir(path: str, cache_dir: Optional[str] = None) -> str:
+    """
+    Returns the directory holding the column store for a source workbook.
+
+    Args:
+        path (str): The path to the Excel file.
+        cache_dir (Optional[str]): The root cache directory. Defaults to a `.cache` folder next to the file.
+
+    Returns:
+        str: The directory of the column store for this workbook.
+    """
+    source = os.path.abspath(path)
+    root = cache_dir or os.path.join(os.path.dirname(source), ".cache")
+    name = os.path.splitext(os.path.basename(source))[0]
+    return os.path.join(root, f"{name}-{hashlib.sha1(source.encode('utf-8')).hexdigest()[:16]}")
+
+
+def _read_meta(store: str, version: int = CACHE_VERSION) -> Optional[Dict[str, Any]]:
+    try:
+        with open(os.path.join(store, META_FILE), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return meta if meta.get("version") == version else None
+
+
+def _write_meta(store: str, meta: Dict[str, Any]) -> None:
+    tmp_file = os.path.join(store, META_FILE + ".tmp")
+    with open(tmp_file, "w", encoding="utf-8") as f:
+        json.dump(meta, f, ensure_ascii=False)
+    os.replace(tmp_file, os.path.join(store, META_FILE))
+
+
+def _source_key(path: str) -> Dict[str, Any]:
+    stat = os.stat(path)
+    return {"source": os.path.abspath(path), "mtime_ns": stat.st_mtime_ns, "size": stat.st_size}
+
+
+def _is_current(store: str, meta: Dict[str, Any], path: str) -> bool:
+    """
+    Checks that a store was written from the current contents of the workbook.
+
+    If only the modification time differs, the content hash decides, and the new time is saved to the metadata.
+    """
+    key = _source_key(path)
+    if meta["source"] != key["source"] or meta["size"] != key["size"]:
+        return False
+    if meta["mtime_ns"] != key["mtime_ns"]:
+        if meta["sha256"] != file_sha256(path):
+            return False
+        meta["mtime_ns"] = key["mtime_ns"]
+        _write_meta(store, meta)
+    return True
+
+
+def _save_columns(df: DataFrame, store: str) -> Optional[List[Dict[str, Any]]]:
+    """
+    Writes every column of the DataFrame as a separate `.npy` file.
+
+    Numeric and datetime columns are stored as-is, text columns are dictionary-encoded: the codes go to
+    the `.npy` file and the distinct values to the metadata.
+
+    Returns:
+        Optional[List[Dict[str, Any]]]: The column descriptions, or None if a column cannot be stored.
+    """
+    columns = []
+    for i, name in enumerate(df.columns):
+        series = df[name]
+        file_name = f"col{i}.npy"
+        if series.dtype.kind in "biuf":
+            np.save(os.path.join(store, file_name), series.to_numpy())
+            columns.append({"name": name, "file": file_name, "kind": "numeric"})
+        elif series.dtype.kind == "M":
+            np.save(os.path.join(store, file_name), series.to_numpy().view("int64"))
+            columns.append({"name": name, "file": file_name, "kind": "datetime", "dtype": str(series.dtype)})
+        else:
+            codes, uniques = pd.factorize(series, use_na_sentinel=True)
+            values = list(uniques)
+            try:
+                json.dumps(values, ensure_ascii=False)
+            except TypeError:
+                logger.warning(f"Column '{name}' cannot be stored in the cache")
+                return None
+            np.save(os.path.join(store, file_name), codes.astype(np.int32))
+            columns.append({"name": name, "file": file_name, "kind": "dictionary", "values": values})
+    return columns
+
+
+def _load_columns(store: str, columns: List[Dict[str, Any]]) -> DataFrame:
+    data = {}
+    for column in columns:
+        values = np.asarray(np.load(os.path.join(store, column["file"]), mmap_mode="c"))
+        if column["kind"] == "numeric":
+            data[column["name"]] = values
+        elif column["kind"] == "datetime":
+            data[column["name"]] = values.view(column["dtype"])
+        else:
+            vocabulary = np.empty(len(column["values"]) + 1, dtype=object)
+            vocabulary[:-1] = column["values"]
+            vocabulary[-1] = np.nan
+            data[column["name"]] = vocabulary[values]
+    return DataFrame(data, copy=False)
+
+
+def write_store(df: DataFrame, store: str, path: str, version: int = CACHE_VERSION,
+                sha256: Optional[str] = None) -> bool:
+    """
+    Stores a DataFrame derived from a workbook as a column store: one `.npy` file per column and the metadata.
+
+    The metadata records the version of the store format and the path, modification time, size and hash of the
+    workbook, so `read_store` can tell whether the store is still current. The metadata is removed first and
+    written last, so an interrupted write leaves no valid store behind.
+
+    Args:
+        df (DataFrame): The data to store.
+        store (str): The directory of the store.
+        path (str): The path to the Excel file the data was derived from.
+        version (int): The version of the store format.
+        sha256 (Optional[str]): The precomputed hash of the file, if already known.
+
+    Returns:
+        bool: True if the store was written.
+    """
+    key = _source_key(path)
+    return _write_columns(df, store, {"version": version, **key, "sha256": sha256 or file_sha256(path)})
+
+
+def write_columns(df: DataFrame, store: str, version: int = CACHE_VERSION) -> bool:
+    """
+    Stores a DataFrame that has no source workbook, e.g. generated operations, as a column store.
+
+    Args:
+        df (DataFrame): The data to store.
+        store (str): The directory of the store.
+        version (int): The version of the store format.
+
+    Returns:
+        bool: True if the store was written.
+    """
+    return _write_columns(df, store, {"version": version})
+
+
+def _write_columns(df: DataFrame, store: str, meta: Dict[str, Any]) -> bool:
+    os.makedirs(store, exist_ok=True)
+    meta_file = os.path.join(store, META_FILE)
+    if os.path.exists(meta_file):
+        os.remove(meta_file)
+
+    columns = _save_columns(df, store)
+    if columns is None:
+        return False
+
+    _write_meta(store, {**meta, "columns": columns})
+    return True
+
+
+def read_store(store: str, path: str, version: int = CACHE_VERSION) -> Optional[DataFrame]:
+    """
+    Loads a column store written by `write_store`, if it is still valid.
+
+    The store is valid when it has the given version and the path, modification time and size of the file
+    match. If only the modification time differs, the content hash decides, so touching the file does not
+    invalidate the store.
+
+    Args:
+        store (str): The directory of the store.
+        path (str): The path to the Excel file the data was derived from.
+        version (int): The expected version of the store format.
+
+    Returns:
+        Optional[DataFrame]: The stored data, or None if the store is missing or out of date.
+    """
+    meta = _read_meta(store, version)
+    if meta is None or not _is_current(store, meta, path):
+        return None
+    return _read_columns(store, meta)
+
+
+def read_columns(store: str, version: int = CACHE_VERSION) -> Optional[DataFrame]:
+    """
+    Loads a column store written by `write_columns`.
+
+    Args:
+        store (str): The directory of the store.
+        version (int): The expected version of the store format.
+
+    Returns:
+        Optional[DataFrame]: The stored data, or None if the store is missing or has another version.
+    """
+    meta = _read_meta(store, version)
+    return None if meta is None else _read_columns(store, meta)
+
+
+def _read_columns(store: str, meta: Dict[str, Any]) -> Optional[DataFrame]:
+    try:
+        return _load_columns(store, meta["columns"])
+    except (OSError, ValueError) as e:
+        logger.warning(f"Failed to load column store from {store}: {e}")
+        return None
+
+
+def write_cache(df: DataFrame, path: str, cache_dir: Optional[str] = None, sha256: Optional[str] = None) -> bool:
+    """
+    Stores the parsed contents of a workbook in the column store.
+
+    Args:
+        df (DataFrame): The parsed contents of the workbook.
+        path (str): The path to the Excel file the DataFrame was read from.
+        cache_dir (Optional[str]): The root cache directory.
+        sha256 (Optional[str]): The precomputed hash of the file, if already known.
+
+    Returns:
+        bool: True if the cache was written.
+    """
+    store = get_cache_dir(path, cache_dir)
+    if not write_store(df, store, path, CACHE_VERSION, sha256):
+        return False
+    logger.info(f"Column cache written to {store}")
+    return True
+
+
+def read_cache(path: str, cache_dir: Optional[str] = None) -> Optional[DataFrame]:
+    """
+    Loads a workbook from the column store if the cached copy is still valid.
+
+    The cache is valid when the path, modification time and size of the file match. If only the
+    modification time differs, the content hash decides, so touching the file does not force a re-parse.
+
+    Args:
+        path (str): The path to the Excel file.
+        cache_dir (Optional[str]): The root cache directory.
+
+    Returns:
+        Optional[DataFrame]: The cached contents, or None if the cache is missing or out of date.
+    """
+    return read_store(get_cache_dir(path, cache_dir), path, CACHE_VERSION)
+
+
+def read_xls_file_cached(path: str, cache_dir: Optional[str] = None) -> DataFrame:
+    """
+    Reads an Excel file through the on-disk column cache.
+
+    The workbook is parsed with openpyxl only when the cache is missing or the file has changed;
+    otherwise the columns are memory-mapped from the cache.
+
+    Args:
+        path (str): The path to the Excel file.
+        cache_dir (Optional[str]): The root cache directory. Defaults to a `.cache` folder next to the file.
+
+    Returns:
+        DataFrame: The contents of the Excel file as a DataFrame.
+    """
+    df = read_cache(path, cache_dir)
+    if df is not None:
+        logger.info(f"Data is loaded from the cache for {path}")
+        return df
+
+    sha256 = file_sha256(path)
+    df = read_xls_file(path)
+    write_cache(df, path, cache_dir, sha256)
+    return df
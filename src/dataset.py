@@ -0,0 +1,137 @@
+import json
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from pandas import DataFrame
+
+from src.cube import SummaryCube, get_data_from_cube, load_cube
+from src.data_cache import read_xls_file_cached
+from src.date_index import DateIndex
+from src.fuzzy_search import FuzzyIndex
+from src.reports import category_spending
+from src.schema import compact_transactions, restore_transactions
+from src.search_index import SearchIndex
+
+logger = logging.getLogger(__name__)
+
+
+class Dataset:
+    """
+    Transactions loaded once and kept in memory with the indexes built over them, shared by many queries.
+
+    The search, fuzzy search and date indexes are built on first use. The summary cube is loaded with the transactions, from
+    the column cache when it is up to date. A dataset is not modified after it is loaded, so it can
+    be queried from several threads; a changed file is picked up by loading a new dataset.
+    """
+
+    def __init__(self, df: DataFrame, path: Optional[str] = None, mtime_ns: Optional[int] = None) -> None:
+        """
+        Args:
+            df (DataFrame): The transactions, as read or compact.
+            path (Optional[str]): The file the transactions were read from.
+            mtime_ns (Optional[int]): The modification time of the file taken before it was read. Defaults to
+                its current modification time.
+        """
+        self.df = df
+        self.path = path
+        self.mtime_ns = mtime_ns if mtime_ns is not None or path is None else os.stat(path).st_mtime_ns
+        self.loaded_at = time.time()
+        self._search_index: Optional[SearchIndex] = None
+        self._fuzzy_index: Optional[FuzzyIndex] = None
+        self._date_index: Optional[DateIndex] = None
+        self._cube: Optional[SummaryCube] = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, path: str, cache_dir: Optional[str] = None) -> "Dataset":
+        """
+        Reads a workbook through the column cache into a compact dataset.
+
+        Args:
+            path (str): The path to the Excel file.
+            cache_dir (Optional[str]): The root cache directory, see `read_xls_file_cached`.
+
+        Returns:
+            Dataset: The loaded dataset.
+        """
+        started = time.perf_counter()
+        # Taken before reading, so a file rewritten during the load is seen as stale and loaded again.
+        mtime_ns = os.stat(path).st_mtime_ns
+        dataset = cls(compact_transactions(read_xls_file_cached(path, cache_dir)), path, mtime_ns)
+        dataset._cube = load_cube(path, dataset.df, cache_dir)
+        logger.info(f"Loaded {len(dataset.df)} operations from {path} in {time.perf_counter() - started:.3f}s")
+        return dataset
+
+    def is_stale(self) -> bool:
+        """
+        Returns True if the file the dataset was read from has changed since.
+        """
+        if self.path is None:
+            return False
+        try:
+            return os.stat(self.path).st_mtime_ns != self.mtime_ns
+        except FileNotFoundError:
+            return False
+
+    @property
+    def search_index(self) -> SearchIndex:
+        with self._lock:
+            if self._search_index is None:
+                self._search_index = SearchIndex(self.df)
+            return self._search_index
+
+    @property
+    def fuzzy_index(self) -> FuzzyIndex:
+        with self._lock:
+            if self._fuzzy_index is None:
+                self._fuzzy_index = FuzzyIndex(self.df['Описание'])
+            return self._fuzzy_index
+
+    @property
+    def date_index(self) -> DateIndex:
+        with self._lock:
+            if self._date_index is None:
+                self._date_index = DateIndex(self.df)
+            return self._date_index
+
+    @property
+    def cube(self) -> SummaryCube:
+        with self._lock:
+            if self._cube is None:
+                self._cube = SummaryCube.build(self.df)
+            return self._cube
+
+    def search(self, query: str, fuzzy: bool = False) -> DataFrame:
+        """
+        Finds the operations containing the text in the category or description fields.
+
+        With `fuzzy`, finds the operations whose description resembles the text instead, allowing typos and the
+        wrong keyboard layout, ordered from the best match; see `FuzzyIndex`.
+
+        Returns:
+            DataFrame: The matching operations, with the column types of `read_xls_file`.
+        """
+        rows = self.fuzzy_index.search(query)[0] if fuzzy else self.search_index.search(query)
+        return restore_transactions(self.df.iloc[rows])
+
+    def category_report(self, category: str, date: Optional[str] = None) -> DataFrame:
+        """
+        Finds the operations of a category in the three months before a date, see `category_spending`.
+        """
+        return category_spending(self.df, category, date, self.date_index)
+
+    def category_totals(self, category: str, date: Optional[str] = None) -> Dict[str, float]:
+        """
+        Sums the operations of a category in the three months before a date, see `SummaryCube.category_totals`.
+        """
+        return self.cube.category_totals(category, self.date_index, date)
+
+    def dashboard(self) -> Dict[str, Any]:
+        """
+        Builds the dashboard data, see `get_data`, with the card data taken from the summary cube.
+        """
+        dashboard: Dict[str, Any] = json.loads(get_data_from_cube(self.df, self.cube))
+        return dashboard
@@ -0,0 +1,111 @@
+import datetime
+import logging
+from typing import Dict, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+from pandas import DataFrame
+
+logger = logging.getLogger(__name__)
+
+OPERATION_DATE_FORMAT = '%d.%m.%Y %H:%M:%S'
+
+
+class DateIndex:
+    """
+    Operation dates parsed once and sorted, with the positions of the rows of every category.
+
+    A date range query is a binary search in the sorted dates of a category followed by a slice.
+    """
+
+    def __init__(self, df: DataFrame, date_column: str = 'Дата операции', category_column: str = 'Категория',
+                 date_format: str = OPERATION_DATE_FORMAT) -> None:
+        """
+        Parses the dates and builds the index.
+
+        Args:
+            df (DataFrame): The DataFrame containing transaction data.
+            date_column (str): The column with the operation dates.
+            category_column (str): The column with the categories.
+            date_format (str): The format of the dates, if they are stored as strings.
+        """
+        logger.info("Building date index over %d operations", len(df))
+        self.df = df
+        self.dates = pd.to_datetime(df[date_column], format=date_format).to_numpy(dtype='datetime64[ns]')
+
+        codes, categories = pd.factorize(df[category_column])
+        self.categories = categories
+        self._category_ids: Dict[object, int] = {category: i for i, category in enumerate(categories)}
+
+        # Rows sorted by category, then by date; rows without a category (code -1) come first and are skipped.
+        self._positions = np.lexsort((self.dates, codes))
+        self._sorted_dates = self.dates[self._positions]
+        counts = np.bincount(codes + 1, minlength=len(categories) + 1)
+        self._offsets = np.cumsum(counts)
+
+    def category_slice(self, category: object) -> Tuple[int, int]:
+        """
+        Returns the bounds of the rows of a category in the sorted arrays.
+        """
+        category_id = self._category_ids.get(category)
+        if category_id is None:
+            return 0, 0
+        return int(self._offsets[category_id]), int(self._offsets[category_id + 1])
+
+    def window(self, category: object, start_date: datetime.datetime, end_date: datetime.datetime) -> np.ndarray:
+        """
+        Finds the operations of a category made within a date range, bounds included.
+
+        Args:
+            category (object): The category.
+            start_date (datetime.datetime): The start of the range.
+            end_date (datetime.datetime): The end of the range.
+
+        Returns:
+            np.ndarray: The positions of the matching rows, in their original order.
+        """
+        start, stop = self.category_slice(category)
+        dates = self._sorted_dates[start:stop]
+        left = np.searchsorted(dates, pd.Timestamp(start_date).to_datetime64(), side='left')
+        right = np.searchsorted(dates, pd.Timestamp(end_date).to_datetime64(), side='right')
+        return np.sort(self._positions[start + left:start + right])
+
+    def window_frame(self, category: object, start_date: datetime.datetime,
+                     end_date: datetime.datetime) -> DataFrame:
+        """
+        Returns the operations of a category made within a date range as a DataFrame.
+        """
+        return self.df.iloc[self.window(category, start_date, end_date)]
+
+    def window_totals(self, values: np.ndarray, start_dates: Sequence[datetime.datetime],
+                      end_dates: Sequence[datetime.datetime]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Sums a column over many date ranges for every category at once.
+
+        The values are accumulated once in (category, date) order; the total of a range is the difference of two
+        cumulative sums found by binary search.
+
+        Args:
+            values (np.ndarray): The values to sum, one per row of the indexed DataFrame. Missing values count as 0.
+            start_dates (Sequence[datetime.datetime]): The starts of the ranges.
+            end_dates (Sequence[datetime.datetime]): The ends of the ranges, bounds included.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: The totals and the numbers of rows, as arrays of shape
+            (number of categories, number of ranges) ordered like `categories`.
+        """
+        sorted_values = np.nan_to_num(np.asarray(values, dtype=float)[self._positions])
+        cumulative = np.concatenate([[0.0], np.cumsum(sorted_values)])
+        starts = pd.DatetimeIndex(start_dates).to_numpy(dtype='datetime64[ns]')
+        ends = pd.DatetimeIndex(end_dates).to_numpy(dtype='datetime64[ns]')
+
+        totals = np.zeros((len(self.categories), len(ends)))
+        counts = np.zeros((len(self.categories), len(ends)), dtype=np.int64)
+        for category_id in range(len(self.categories)):
+            start, stop = int(self._offsets[category_id]), int(self._offsets[category_id + 1])
+            dates = self._sorted_dates[start:stop]
+            left = start + np.searchsorted(dates, starts, side='left')
+            right = start + np.searchsorted(dates, ends, side='right')
+            totals[category_id] = cumulative[right] - cumulative[left]
+            counts[category_id] = right - left
+        return totals, counts
@@ -0,0 +1,143 @@
+import logging
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+import pandas as pd
+
+from src.search_index import normalize_text
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_THRESHOLD = 0.5
+
+# The keys of the Latin (QWERTY) and Cyrillic (ЙЦУКЕН) layouts, in the same keyboard positions.
+LATIN_KEYS = "`qwertyuiop[]asdfghjkl;'zxcvbnm,."
+CYRILLIC_KEYS = "ёйцукенгшщзхъфывапролджэячсмитьбю"
+_LAYOUT = str.maketrans(LATIN_KEYS + CYRILLIC_KEYS, CYRILLIC_KEYS + LATIN_KEYS)
+
+
+def switch_layout(text: str) -> str:
+    """
+    Retypes a text in the other keyboard layout, e.g. 'vfuybn' becomes 'магнит' and 'ьфптше' becomes 'magnit'.
+
+    Args:
+        text (str): The text, in lower case.
+
+    Returns:
+        str: The text with every Latin key replaced by the Cyrillic key in the same position, and vice versa.
+    """
+    return text.translate(_LAYOUT)
+
+
+def fuzzy_grams(text: str, n: int = 3) -> Set[str]:
+    """
+    Returns the character n-grams of the words of a normalized text.
+
+    Every word is padded with two spaces in front and one after, so short words and the beginnings of words
+    have n-grams of their own.
+    """
+    grams: Set[str] = set()
+    for word in text.replace("ё", "е").split():
+        padded = f"  {word} "
+        grams.update(padded[i:i + n] for i in range(len(padded) - n + 1))
+    return grams
+
+
+class FuzzyIndex:
+    """
+    A typo-tolerant index over the distinct values of a text column, such as the merchant descriptions.
+
+    Values are compared by the character trigrams of their words. The score of a value is the share of the
+    trigrams of the query found in it, so a query with a typo or a part of a long description still scores
+    high; values with equal scores are ranked by their overall trigram similarity, which puts closer lengths
+    first. The query is also tried as if typed in the other keyboard layout.
+
+    Only the distinct values are indexed and scored, so a query costs the same however many rows the column has.
+    """
+
+    def __init__(self, values: Iterable[object], n: int = 3) -> None:
+        """
+        Builds the index.
+
+        Args:
+            values (Iterable[object]): The column, one value per row; missing values are not indexed.
+            n (int): The n-gram length.
+        """
+        codes, uniques = pd.factorize(pd.Series(values, dtype=object), use_na_sentinel=True)
+        self.n = n
+        self.values: List[object] = list(uniques)
+        logger.info("Building fuzzy index over %d distinct values of %d rows", len(self.values), len(codes))
+
+        # Rows of every distinct value, laid out as one sorted array with offsets.
+        present = codes >= 0
+        self._rows = np.flatnonzero(present)[np.argsort(codes[present], kind="stable")]
+        self._offsets = np.concatenate([[0], np.cumsum(np.bincount(codes[present], minlength=len(self.values)))])
+
+        postings: Dict[str, List[int]] = {}
+        sizes = []
+        for value_id, value in enumerate(self.values):
+            grams = fuzzy_grams(normalize_text(value), n)
+            sizes.append(len(grams))
+            for gram in grams:
+                postings.setdefault(gram, []).append(value_id)
+        self._sizes = np.array(sizes, dtype=np.int64)
+        self._postings = {gram: np.array(ids, dtype=np.int64) for gram, ids in postings.items()}
+
+    def _scores(self, query: str) -> Tuple[np.ndarray, np.ndarray]:
+        grams = fuzzy_grams(query, self.n)
+        lists = [self._postings[gram] for gram in grams if gram in self._postings]
+        if not grams or not lists:
+            return np.zeros(len(self.values)), np.zeros(len(self.values))
+        shared = np.bincount(np.concatenate(lists), minlength=len(self.values))
+        return shared / len(grams), shared / (len(grams) + self._sizes - shared)
+
+    def match(self, query: str, threshold: float = DEFAULT_THRESHOLD,
+              limit: Optional[int] = None) -> List[Tuple[object, float]]:
+        """
+        Finds the distinct values resembling the query, best first.
+
+        Args:
+            query (str): The text to search for.
+            threshold (float): The lowest score of a match, between 0 and 1.
+            limit (Optional[int]): The largest number of values returned.
+
+        Returns:
+            List[Tuple[object, float]]: The matching values with their scores.
+        """
+        return [(self.values[value_id], score) for value_id, score in self._ranked(query, threshold, limit)]
+
+    def _ranked(self, query: str, threshold: float, limit: Optional[int]) -> List[Tuple[int, float]]:
+        query = normalize_text(query)
+        score, similarity = self._scores(query)
+        switched = switch_layout(query)
+        if switched != query:
+            score_switched, similarity_switched = self._scores(switched)
+            better = (score_switched > score) | ((score_switched == score) & (similarity_switched > similarity))
+            score = np.where(better, score_switched, score)
+            similarity = np.where(better, similarity_switched, similarity)
+
+        candidates = np.flatnonzero((score >= threshold) & (score > 0))
+        order = np.lexsort((candidates, -similarity[candidates], -score[candidates]))
+        ranked = candidates[order][:limit]
+        return [(int(value_id), float(score[value_id])) for value_id in ranked]
+
+    def search(self, query: str, threshold: float = DEFAULT_THRESHOLD,
+               limit: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Finds the rows whose value resembles the query, the rows of the best matching value first.
+
+        Args:
+            query (str): The text to search for.
+            threshold (float): The lowest score of a match, between 0 and 1.
+            limit (Optional[int]): The largest number of distinct values whose rows are returned.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: The positions of the matching rows, ranked by score and then by
+                position, and the score of every row.
+        """
+        ranked = self._ranked(query, threshold, limit)
+        parts = [self._rows[self._offsets[value_id]:self._offsets[value_id + 1]] for value_id, _ in ranked]
+        if not parts:
+            return np.empty(0, dtype=np.int64), np.empty(0)
+        scores = np.repeat([score for _, score in ranked], [len(part) for part in parts])
+        return np.concatenate(parts), scores
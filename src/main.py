@@ -1,34 +1,71 @@
-import json
+import argparse
+import contextlib
+import logging
+from typing import Optional, Sequence
 
-from src.reports import spending_by_category
-from src.services import search_by_request
-from src.utils import convert_data_frame_to_json, read_xls_file
+import pandas as pd
+
+from src.profiling import profile_run, stage
+from src.reports import report_writer, spending_by_category
+from src.services import search_operations
+from src.utils import read_xls_file_compact, serialize_operations
 from src.views import get_data
 
 
-def main() -> None:
+def configure() -> None:
     """
-    The main function that reads transaction data, processes it, and prints the results.
+    Sets up logging and the pandas display options for the command line.
     """
-    df = read_xls_file("../data/operations.xlsx")
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    pd.set_option('display.max_columns', None)
+    pd.set_option('display.max_rows', None)
+    pd.set_option('display.width', None)
+
+
+def run() -> None:
+    """
+    Reads transaction data, processes it, and prints the results.
+    """
+    df = read_xls_file_compact("../data/operations.xlsx")
     data = get_data(df)
 
     print("Главная страница:")
     print(data)
     print()
 
+    # Operations stay in the DataFrame; only the rows that are printed are serialized.
     search_query = input("Введи запрос для поиска по транзакциям: ")
-    search_result = search_by_request(search_query, convert_data_frame_to_json(df))
+    search_result = serialize_operations(df.iloc[search_operations(search_query, df)])
 
     print("Поиск по запросу:")
     print(search_result)
     print()
 
     category = input("Введите название категории: ")
-    category_spending = spending_by_category(df, category).to_dict(orient='records')
+    category_spending = spending_by_category(df, category)
 
     print("Траты по категории:")
-    print(json.dumps(category_spending, ensure_ascii=False, indent=4))
+    print(serialize_operations(category_spending))
+
+    with stage("src.reports.flush"):
+        report_writer.flush()
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    """
+    The main function that reads transaction data, processes it, and prints the results.
+
+    With `--profile`, the run is profiled and the stage timings, cProfile statistics and tracemalloc allocations
+    are written to the given directory, or to a timestamped folder in `profiles`.
+    """
+    parser = argparse.ArgumentParser(description="Analyze bank operations.")
+    parser.add_argument("--profile", nargs="?", const="", metavar="DIR",
+                        help="profile the run and write the results to DIR")
+    args = parser.parse_args(argv)
+    configure()
+
+    with profile_run(args.profile or None) if args.profile is not None else contextlib.nullcontext():
+        run()
 
 
 if __name__ == "__main__":
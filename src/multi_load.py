@@ -0,0 +1,102 @@
+import logging
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+from pandas import DataFrame
+
+from src.data_cache import read_xls_file_cached
+from src.profiling import profiled
+from src.schema import DATE_COLUMNS, compact_transactions
+from src.utils import NUMERIC_FIELDS, OPERATION_FIELDS, read_xls_file
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_operations(df: DataFrame, source: Optional[str] = None) -> DataFrame:
+    """
+    Brings the operations of one workbook to the columns of `read_xls_file` and the column types of `iter_xls_chunks`.
+
+    Column names are stripped of surrounding spaces, columns missing from the export are added empty and unknown
+    columns are dropped. Dates stored as Excel dates are formatted as text, and the numeric columns of
+    NUMERIC_FIELDS become float64, whether they were read as text, as whole numbers or with fractions, so that the
+    same operation hashes the same in every workbook.
+
+    Args:
+        df (DataFrame): The operations as read from the workbook.
+        source (Optional[str]): The file the operations were read from, used in the log.
+
+    Returns:
+        DataFrame: The operations with the columns of OPERATION_FIELDS.
+    """
+    df = df.rename(columns=lambda name: name.strip() if isinstance(name, str) else name)
+    missing = [name for name in OPERATION_FIELDS if name not in df.columns]
+    extra = [name for name in df.columns if name not in OPERATION_FIELDS]
+    if missing:
+        logger.warning(f"Columns {missing} are missing in {source or 'the operations'}, they are left empty")
+    if extra:
+        logger.warning(f"Columns {extra} of {source or 'the operations'} are not known, they are dropped")
+    df = df.reindex(columns=list(OPERATION_FIELDS))
+
+    for name, date_format in DATE_COLUMNS.items():
+        if df[name].dtype.kind == "M":
+            df[name] = df[name].dt.strftime(date_format).astype(object)
+    for name in NUMERIC_FIELDS:
+        df[name] = pd.to_numeric(df[name], errors="coerce").astype(np.float64)
+    return df
+
+
+def _load_workbook(path: str, cache_dir: Optional[str], use_cache: bool) -> Tuple[DataFrame, np.ndarray]:
+    """
+    Reads and normalizes one workbook and keys its operations for deduplication; runs in a worker process.
+
+    Returns:
+        Tuple[DataFrame, np.ndarray]: The operations, and for every operation the hash of its fields and the
+            number of identical operations before it in the same workbook.
+    """
+    df = normalize_operations(read_xls_file_cached(path, cache_dir) if use_cache else read_xls_file(path), path)
+    hashes = pd.util.hash_pandas_object(df, index=False).to_numpy()
+    occurrence = pd.Series(hashes).groupby(hashes, sort=False).cumcount().to_numpy()
+    return df, np.column_stack([hashes, occurrence.astype(np.uint64)])
+
+
+@profiled
+def load_operations(paths: Sequence[str], workers: Optional[int] = None, cache_dir: Optional[str] = None,
+                    use_cache: bool = True) -> DataFrame:
+    """
+    Reads many workbooks in parallel into one compact frame without the operations repeated between them.
+
+    Parsing a workbook with openpyxl is CPU-bound, so the workbooks are read in a pool of processes. Exports
+    of adjacent periods or accounts overlap, so an operation present in several workbooks is kept once.
+    Identical operations within one workbook are all kept: of a repeated operation, as many copies are kept
+    as the workbook with the most of them has.
+
+    Args:
+        paths (Sequence[str]): The Excel files, in the order their operations are concatenated.
+        workers (Optional[int]): The number of processes. Defaults to the number of CPUs; with 1 the files are
+            read in this process.
+        cache_dir (Optional[str]): The root cache directory, see `read_xls_file_cached`.
+        use_cache (bool): Whether to read through the column cache; without it every workbook is parsed.
+
+    Returns:
+        DataFrame: The operations of all files with compact column types, see `compact_transactions`.
+    """
+    started = time.perf_counter()
+    count = len(paths)
+    if workers == 1 or count <= 1:
+        loaded = [_load_workbook(path, cache_dir, use_cache) for path in paths]
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers or count, count)) as executor:
+            loaded = list(executor.map(_load_workbook, paths, [cache_dir] * count, [use_cache] * count))
+    if not loaded:
+        return compact_transactions(DataFrame(columns=list(OPERATION_FIELDS)))
+
+    df = pd.concat([frame for frame, _ in loaded], ignore_index=True)
+    keys = np.concatenate([key for _, key in loaded])
+    unique = ~DataFrame(keys).duplicated().to_numpy()
+    df = df[unique].reset_index(drop=True)
+    logger.info(f"Loaded {len(df)} operations from {count} files in {time.perf_counter() - started:.3f}s, "
+                f"{len(keys) - len(df)} repeated operations dropped")
+    return compact_transactions(df)
@@ -0,0 +1,244 @@
+import contextlib
+import datetime
+import functools
+import io
+import json
+import logging
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, Iterator, List, Optional, TypeVar, cast
+
+logger = logging.getLogger(__name__)
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+PROFILES_DIR = os.path.join(os.path.dirname(__file__), "..", "profiles")
+
+
+class RunProfile:
+    """
+    The timings of the stages of one run: wall time, rows processed, peak memory and time spent waiting on the
+    network for every call of an instrumented function.
+
+    Peak memory is only measured while tracemalloc is tracing; it is the peak of the whole process during the
+    stage, so stages running at the same time on other threads are included.
+    """
+
+    def __init__(self) -> None:
+        self.started = datetime.datetime.now()
+        self.stages: List[Dict[str, Any]] = []
+        self._started_at = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def add(self, record: Dict[str, Any]) -> None:
+        with self._lock:
+            self.stages.append(record)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Returns the profile as a JSON-serializable dictionary.
+        """
+        with self._lock:
+            stages = list(self.stages)
+        return {
+            "started": self.started.isoformat(timespec="seconds"),
+            "wall_seconds": time.perf_counter() - self._started_at,
+            "network_wait_seconds": sum(stage["network_wait_seconds"] for stage in stages),
+            "stages": stages,
+        }
+
+    def save(self, output_file: str) -> None:
+        """
+        Writes the profile to a JSON file.
+        """
+        with open(output_file, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, indent=4)
+
+
+_profile: Optional[RunProfile] = None
+_local = threading.local()
+# The highest traced memory seen so far by every open stage, by the id of its record. tracemalloc keeps a
+# single peak for the process, which every stage resets when it starts, so the peak is folded into the open
+# stages before each reset.
+_open_peaks: Dict[int, int] = {}
+_peaks_lock = threading.Lock()
+
+
+def start_profile() -> RunProfile:
+    """
+    Starts collecting the stages of instrumented functions into a new profile.
+    """
+    global _profile
+    _profile = RunProfile()
+    return _profile
+
+
+def stop_profile() -> Optional[RunProfile]:
+    """
+    Stops collecting stages and returns the profile collected since `start_profile`.
+    """
+    global _profile
+    profile, _profile = _profile, None
+    return profile
+
+
+def _fold_peak() -> None:
+    peak = tracemalloc.get_traced_memory()[1]
+    for key, value in _open_peaks.items():
+        _open_peaks[key] = max(value, peak)
+
+
+def _start_peak(record: Dict[str, Any]) -> int:
+    with _peaks_lock:
+        _fold_peak()
+        tracemalloc.reset_peak()
+        memory = tracemalloc.get_traced_memory()[0]
+        _open_peaks[id(record)] = memory
+    return memory
+
+
+def _end_peak(record: Dict[str, Any]) -> int:
+    with _peaks_lock:
+        _fold_peak()
+        return _open_peaks.pop(id(record))
+
+
+def _stack() -> List[Dict[str, Any]]:
+    if not hasattr(_local, "stack"):
+        _local.stack = []
+    stack: List[Dict[str, Any]] = _local.stack
+    return stack
+
+
+@contextlib.contextmanager
+def stage(name: str, rows: Optional[int] = None) -> Iterator[Optional[Dict[str, Any]]]:
+    """
+    Records a stage of the current run profile. Does nothing if no profile is being collected.
+
+    Args:
+        name (str): The name of the stage.
+        rows (Optional[int]): The number of rows the stage processes, if known; the stage record can be updated
+            inside the block.
+
+    Yields:
+        Optional[Dict[str, Any]]: The stage record, or None if no profile is being collected.
+    """
+    profile = _profile
+    if profile is None:
+        yield None
+        return
+
+    record: Dict[str, Any] = {"name": name, "thread": threading.current_thread().name, "rows": rows,
+                              "wall_seconds": 0.0, "peak_memory_bytes": None, "network_wait_seconds": 0.0}
+    tracing = tracemalloc.is_tracing()
+    memory_at_start = _start_peak(record) if tracing else 0
+    stack = _stack()
+    stack.append(record)
+    started = time.perf_counter()
+    try:
+        yield record
+    finally:
+        record["wall_seconds"] = time.perf_counter() - started
+        if tracing and tracemalloc.is_tracing():
+            record["peak_memory_bytes"] = max(_end_peak(record) - memory_at_start, 0)
+        elif tracing:
+            with _peaks_lock:
+                _open_peaks.pop(id(record), None)
+        stack.pop()
+        profile.add(record)
+
+
+@contextlib.contextmanager
+def network_wait() -> Iterator[None]:
+    """
+    Counts the time spent in the block as waiting on the network in the innermost stage of the current thread.
+    """
+    stack = _stack() if _profile is not None else []
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        if stack:
+            stack[-1]["network_wait_seconds"] += time.perf_counter() - started
+
+
+def _is_frame(value: Any) -> bool:
+    # pandas is not imported here, so instrumented modules that do not need it start fast.
+    pd = sys.modules.get("pandas")
+    return pd is not None and isinstance(value, pd.DataFrame)
+
+
+def _count_rows(args: Any, kwargs: Any) -> Optional[int]:
+    for value in (*args, *kwargs.values()):
+        if _is_frame(value):
+            return len(value)
+    return None
+
+
+def profiled(func: F) -> F:
+    """
+    A decorator that records every call of the function as a stage of the current run profile.
+
+    The stage is named after the module and function; the rows processed are the length of the first DataFrame
+    argument, or of the returned DataFrame. When no profile is being collected the function is called directly.
+    """
+    name = f"{func.__module__}.{func.__qualname__}"
+
+    @functools.wraps(func)
+    def wrapper_profiled(*args: Any, **kwargs: Any) -> Any:
+        if _profile is None:
+            return func(*args, **kwargs)
+        with stage(name, _count_rows(args, kwargs)) as record:
+            result = func(*args, **kwargs)
+            if record is not None and record["rows"] is None and _is_frame(result):
+                record["rows"] = len(result)
+            return result
+    return cast(F, wrapper_profiled)
+
+
+@contextlib.contextmanager
+def profile_run(directory: Optional[str] = None, top: int = 30) -> Iterator[RunProfile]:
+    """
+    Profiles the block with the stage profile, cProfile and tracemalloc and writes the results to a directory.
+
+    Three files are written: `profile.json` with the stages, `cprofile.prof` with the raw cProfile statistics
+    (for snakeviz or `pstats`) and `report.txt` with the slowest functions and the largest allocations.
+
+    Args:
+        directory (Optional[str]): The output directory. Defaults to a timestamped folder in `profiles`.
+        top (int): The number of functions and allocation sites listed in the text report.
+
+    Yields:
+        RunProfile: The stage profile being collected.
+    """
+    import cProfile
+    import pstats
+
+    directory = directory or os.path.join(PROFILES_DIR, datetime.datetime.now().strftime("%Y%m%d_%H%M%S"))
+    os.makedirs(directory, exist_ok=True)
+    profiler = cProfile.Profile()
+    tracemalloc.start()
+    profile = start_profile()
+    profiler.enable()
+    try:
+        yield profile
+    finally:
+        profiler.disable()
+        snapshot = tracemalloc.take_snapshot()
+        tracemalloc.stop()
+        stop_profile()
+
+        profile.save(os.path.join(directory, "profile.json"))
+        profiler.dump_stats(os.path.join(directory, "cprofile.prof"))
+        report = io.StringIO()
+        report.write(f"Top {top} functions by cumulative time\n\n")
+        pstats.Stats(profiler, stream=report).sort_stats("cumulative").print_stats(top)
+        report.write(f"\nTop {top} allocation sites\n\n")
+        for statistic in snapshot.statistics("lineno")[:top]:
+            report.write(f"{statistic}\n")
+        with open(os.path.join(directory, "report.txt"), "w", encoding="utf-8") as f:
+            f.write(report.getvalue())
+        logger.info(f"Profile written to {directory}")
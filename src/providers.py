@@ -0,0 +1,270 @@
+import json
+import logging
+import threading
+import time
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Optional, Sequence, Union
+
+import pandas as pd
+
+if TYPE_CHECKING:
+    import requests
+
+logger = logging.getLogger(__name__)
+
+
+class RatesProvider(ABC):
+    """
+    A source of exchange rates quoted against a single base currency.
+    """
+
+    @abstractmethod
+    def get_rates(self, base: str, symbols: Iterable[str]) -> Dict[str, float]:
+        """
+        Returns how many units of each currency one unit of the base currency buys.
+
+        Args:
+            base (str): The base currency.
+            symbols (Iterable[str]): The currencies to quote.
+
+        Returns:
+            Dict[str, float]: The rates by currency. Currencies the source does not know are left out.
+        """
+
+
+class ApiLayerRatesProvider(RatesProvider):
+    """
+    Exchange rates from the APILayer `latest` endpoint, all symbols in one request.
+    """
+
+    def __init__(self, url: str, api_key: Optional[str], session: Optional["requests.Session"] = None,
+                 timeout: Optional[float] = None) -> None:
+        self.url = url
+        self.api_key = api_key
+        self.session = session
+        self.timeout = timeout
+
+    def get_rates(self, base: str, symbols: Iterable[str]) -> Dict[str, float]:
+        if self.session is None:
+            import requests
+
+            self.session = requests.Session()
+        params = {"base": base, "symbols": ",".join(sorted(set(symbols)))}
+        headers = {'apikey': self.api_key} if self.api_key is not None else {}
+        response = self.session.get(self.url, params=params, headers=headers, timeout=self.timeout)
+        response.raise_for_status()
+        rates: Dict[str, float] = response.json()["rates"]
+        return rates
+
+
+class FixtureRatesProvider(RatesProvider):
+    """
+    Exchange rates from a recorded response, for offline runs and tests.
+
+    The fixture has the shape of an APILayer response: `{"base": "USD", "rates": {"RUB": 90.0, ...}}`.
+    Rates against another base are derived from it.
+    """
+
+    def __init__(self, fixture: Union[str, Dict[str, Any]]) -> None:
+        """
+        Args:
+            fixture (Union[str, Dict[str, Any]]): The recorded response or the path to a JSON file with it.
+        """
+        response: Dict[str, Any]
+        if isinstance(fixture, str):
+            with open(fixture, 'r', encoding='utf-8') as f:
+                response = json.load(f)
+        else:
+            response = fixture
+        self.base = response["base"]
+        self.rates = {**response["rates"], self.base: 1.0}
+
+    def get_rates(self, base: str, symbols: Iterable[str]) -> Dict[str, float]:
+        if base not in self.rates:
+            return {}
+        return {symbol: self.rates[symbol] / self.rates[base] for symbol in symbols if symbol in self.rates}
+
+
+def cross_rates(rates: Dict[str, float], base: str, currencies: Iterable[str], target: str = "RUB") -> Dict[str, float]:
+    """
+    Derives the price of each currency in the target currency from rates quoted against one base.
+
+    Args:
+        rates (Dict[str, float]): Units of each currency per unit of the base currency.
+        base (str): The base currency of the rates.
+        currencies (Iterable[str]): The currencies to price.
+        target (str): The currency to price them in.
+
+    Returns:
+        Dict[str, float]: The price of one unit of each currency in the target currency. Currencies missing
+            from the rates are left out.
+    """
+    rates = {**rates, base: 1.0}
+    if not rates.get(target):
+        return {}
+    return {currency: rates[target] / rates[currency] for currency in currencies if rates.get(currency)}
+
+
+def _default_yfinance_client() -> Any:
+    import yfinance
+
+    return yfinance
+
+
+def _first_high(history: pd.DataFrame) -> float:
+    return float(history["High"].iloc[0]) if not history.empty else 0.0
+
+
+class StockQuotesProvider(ABC):
+    """
+    A source of current stock prices.
+    """
+
+    @abstractmethod
+    def get_prices(self, symbols: Sequence[str]) -> Dict[str, float]:
+        """
+        Returns the day high price of each stock.
+
+        Args:
+            symbols (Sequence[str]): The ticker symbols.
+
+        Returns:
+            Dict[str, float]: The prices by symbol, 0.0 if there is no data for the day. Symbols that failed to
+                load are left out.
+        """
+
+
+class TickerHistoryProvider(StockQuotesProvider):
+    """
+    Stock prices from one `Ticker(symbol).history(period="1d")` call per symbol, run on a thread pool.
+    """
+
+    def __init__(self, client: Any = None, max_workers: int = 8, timeout: Optional[float] = None) -> None:
+        """
+        Args:
+            client (Any): An object with the `Ticker` API of yfinance. Defaults to the yfinance module.
+            max_workers (int): The maximum number of concurrent requests.
+            timeout (Optional[float]): The timeout of each request in seconds.
+        """
+        self.client = client
+        self.max_workers = max_workers
+        self.timeout = timeout
+
+    def _get_price(self, symbol: str) -> Optional[float]:
+        try:
+            client = self.client or _default_yfinance_client()
+            return _first_high(client.Ticker(symbol).history(period="1d", timeout=self.timeout))
+        except Exception as e:
+            logger.error(f"Failed to retrieve stock price data for {symbol}: {e}")
+            return None
+
+    def get_prices(self, symbols: Sequence[str]) -> Dict[str, float]:
+        if not symbols:
+            return {}
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(symbols))) as executor:
+            prices = dict(zip(symbols, executor.map(self._get_price, symbols)))
+        return {symbol: price for symbol, price in prices.items() if price is not None}
+
+
+class BulkDownloadProvider(StockQuotesProvider):
+    """
+    Stock prices for all symbols from a single multi-symbol `download` call.
+    """
+
+    def __init__(self, client: Any = None, timeout: Optional[float] = None) -> None:
+        """
+        Args:
+            client (Any): An object with the `download` API of yfinance. Defaults to the yfinance module.
+            timeout (Optional[float]): The timeout of the request in seconds.
+        """
+        self.client = client
+        self.timeout = timeout
+
+    def get_prices(self, symbols: Sequence[str]) -> Dict[str, float]:
+        if not symbols:
+            return {}
+        client = self.client or _default_yfinance_client()
+        try:
+            data = client.download(list(symbols), period="1d", group_by="column", progress=False,
+                                   timeout=self.timeout)
+        except Exception as e:
+            logger.error(f"Failed to retrieve stock price data for {', '.join(symbols)}: {e}")
+            return {}
+
+        if data is None or data.empty:
+            return {symbol: 0.0 for symbol in symbols}
+        highs = data["High"]
+        if isinstance(highs, pd.Series):
+            highs = highs.to_frame(symbols[0])
+
+        prices = {}
+        for symbol in symbols:
+            values = highs[symbol].dropna() if symbol in highs.columns else pd.Series(dtype=float)
+            prices[symbol] = float(values.iloc[0]) if len(values) else 0.0
+        return prices
+
+
+class RecordedYFinance:
+    """
+    A stand-in for the yfinance module that replays recorded daily histories with a simulated network latency.
+
+    It serves both the per-ticker and the bulk API, so the two paths can be compared offline on the same data.
+    """
+
+    def __init__(self, histories: Dict[str, pd.DataFrame], latency: float = 0.0) -> None:
+        """
+        Args:
+            histories (Dict[str, pd.DataFrame]): The recorded `history(period="1d")` frame of each symbol.
+            latency (float): The number of seconds every request takes.
+        """
+        self.histories = histories
+        self.latency = latency
+        self.requests = 0
+        self._lock = threading.Lock()
+
+    def _request(self) -> None:
+        with self._lock:
+            self.requests += 1
+        time.sleep(self.latency)
+
+    def Ticker(self, symbol: str) -> Any:
+        recorded = self
+
+        class RecordedTicker:
+            def history(self, **kwargs: Any) -> pd.DataFrame:
+                recorded._request()
+                return recorded.histories.get(symbol, pd.DataFrame(columns=["High"]))
+
+        return RecordedTicker()
+
+    def download(self, tickers: List[str], **kwargs: Any) -> pd.DataFrame:
+        self._request()
+        frames = {symbol: self.histories[symbol] for symbol in tickers if symbol in self.histories}
+        if not frames:
+            return pd.DataFrame()
+        return pd.concat(frames, axis=1).swaplevel(axis=1)
+
+
+def benchmark_stock_providers(providers: Dict[str, StockQuotesProvider], symbols: Sequence[str],
+                              repeat: int = 5) -> pd.DataFrame:
+    """
+    Times several stock price providers on the same symbols.
+
+    Args:
+        providers (Dict[str, StockQuotesProvider]): The providers to compare, by name.
+        symbols (Sequence[str]): The ticker symbols to request.
+        repeat (int): The number of runs per provider.
+
+    Returns:
+        pd.DataFrame: One row per provider with the mean and best time of a run in seconds.
+    """
+    rows = []
+    for name, provider in providers.items():
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            provider.get_prices(symbols)
+            timings.append(time.perf_counter() - started)
+        rows.append({"provider": name, "mean_seconds": sum(timings) / len(timings), "min_seconds": min(timings)})
+    return pd.DataFrame(rows)
@@ -0,0 +1,158 @@
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class TTLCache:
+    """
+    An LRU cache whose entries expire after a time-to-live, with an optional on-disk copy.
+
+    An expired entry is still returned while a background thread fetches a fresh value, as long as it is not
+    older than `max_stale`. Hits, misses and stale hits are counted to show how many requests the cache saves.
+    """
+
+    def __init__(self, ttl: float, max_size: int = 256, max_stale: Optional[float] = None,
+                 persist_path: Optional[str] = None) -> None:
+        """
+        Creates the cache.
+
+        Args:
+            ttl (float): The number of seconds an entry stays fresh.
+            max_size (int): The maximum number of entries; the least recently used ones are evicted.
+            max_stale (Optional[float]): The age in seconds after which an expired entry is no longer served.
+                Defaults to serving expired entries of any age.
+            persist_path (Optional[str]): A JSON file the entries are saved to, so they survive restarts.
+        """
+        self.ttl = ttl
+        self.max_size = max_size
+        self.max_stale = max_stale
+        self.persist_path = persist_path
+        self.hits = 0
+        self.misses = 0
+        self.stale_hits = 0
+        self._entries: "OrderedDict[str, Tuple[Any, float]]" = OrderedDict()
+        self._refreshing: Set[str] = set()
+        self._lock = threading.Lock()
+        if persist_path:
+            self._load(persist_path)
+
+    def _load(self, path: str) -> None:
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                entries = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            logger.warning(f"Failed to load cache from {path}: {e}")
+            return
+        for key, (value, fetched_at) in entries.items():
+            self._entries[key] = (value, fetched_at)
+
+    def _save(self, path: str) -> None:
+        entries = {key: [value, fetched_at] for key, (value, fetched_at) in self._entries.items()}
+        tmp_file = f"{path}.tmp"
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                json.dump(entries, f, ensure_ascii=False)
+            os.replace(tmp_file, path)
+        except OSError as e:
+            logger.warning(f"Failed to save cache to {path}: {e}")
+
+    def set(self, key: str, value: Any) -> None:
+        """
+        Stores a fresh value.
+        """
+        with self._lock:
+            self._entries[key] = (value, time.time())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+            if self.persist_path:
+                self._save(self.persist_path)
+
+    def _refresh(self, key: str, loader: Callable[[], Any]) -> None:
+        try:
+            value = loader()
+            if value is not None:
+                self.set(key, value)
+        except Exception as e:
+            logger.error(f"Failed to refresh cached value for {key}: {e}")
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    def get(self, key: str, loader: Callable[[], Any]) -> Any:
+        """
+        Returns the cached value for a key, loading it if it is missing.
+
+        Args:
+            key (str): The key.
+            loader (Callable[[], Any]): Fetches a fresh value; a None result is not cached.
+
+        Returns:
+            Any: The cached, stale or freshly loaded value.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, fetched_at = entry
+                age = time.time() - fetched_at
+                if age < self.ttl:
+                    self.hits += 1
+                    self._entries.move_to_end(key)
+                    return value
+                if self.max_stale is None or age < self.max_stale:
+                    self.stale_hits += 1
+                    if key not in self._refreshing:
+                        self._refreshing.add(key)
+                        threading.Thread(target=self._refresh, args=(key, loader), daemon=True).start()
+                    return value
+            self.misses += 1
+
+        value = loader()
+        if value is not None:
+            self.set(key, value)
+        return value
+
+    def wait_for_refresh(self, timeout: float = 10.0) -> None:
+        """
+        Waits until the background refreshes in progress are finished.
+        """
+        deadline = time.monotonic() + timeout
+        while self._refreshing and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+    def clear(self) -> None:
+        """
+        Removes all entries from memory and resets the counters; the on-disk copy is kept, see `purge`.
+
+        Refreshes still running in the background are forgotten, so an expired entry loaded again is refreshed anew.
+        """
+        with self._lock:
+            self._entries.clear()
+            self._refreshing.clear()
+            self.hits = self.misses = self.stale_hits = 0
+
+    def purge(self) -> None:
+        """
+        Removes all entries like `clear` and deletes the on-disk copy.
+        """
+        self.clear()
+        with self._lock:
+            if self.persist_path and os.path.exists(self.persist_path):
+                os.remove(self.persist_path)
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Returns the hit and miss counters and the number of entries.
+        """
+        with self._lock:
+            return {"hits": self.hits, "stale_hits": self.stale_hits, "misses": self.misses,
+                    "size": len(self._entries)}
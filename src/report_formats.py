@@ -0,0 +1,158 @@
+import gzip
+import io
+import logging
+import os
+import tempfile
+import time
+from typing import Any, Callable, Dict, Iterable, NamedTuple, Optional, TextIO
+
+import pandas as pd
+
+from src.utils import encode_records
+
+logger = logging.getLogger(__name__)
+
+REPORT_CHUNK_SIZE = 10_000
+
+
+def _write_json_records(result: pd.DataFrame, f: TextIO) -> None:
+    """
+    Writes a DataFrame as an indented JSON list of records, chunk by chunk.
+
+    The output is the same as `json.dump(result.to_dict(orient='records'), f, ensure_ascii=False, indent=4)`,
+    but the records are encoded from the column arrays and written without building the whole list first.
+    """
+    if result.empty:
+        f.write("[]")
+        return
+    f.write("[\n")
+    for start in range(0, len(result), REPORT_CHUNK_SIZE):
+        records = encode_records(result.iloc[start:start + REPORT_CHUNK_SIZE], list(result.columns))
+        f.write((",\n" if start else "") + ",\n".join(records))
+    f.write("\n]")
+
+
+def write_json(result: pd.DataFrame, output_file: str) -> None:
+    """
+    Writes a report as an indented JSON list of records.
+    """
+    with open(output_file, 'w', encoding='utf-8') as f:
+        _write_json_records(result, f)
+
+
+def write_ndjson(result: pd.DataFrame, output_file: str) -> None:
+    """
+    Writes a report as newline-delimited JSON, one record per line.
+    """
+    with open(output_file, 'w', encoding='utf-8') as f:
+        for start in range(0, len(result), REPORT_CHUNK_SIZE):
+            records = encode_records(result.iloc[start:start + REPORT_CHUNK_SIZE], list(result.columns), "ndjson")
+            f.write("".join(records + "\n"))
+
+
+def write_json_gzip(result: pd.DataFrame, output_file: str) -> None:
+    """
+    Writes a report as a gzip-compressed JSON list of records.
+    """
+    with gzip.open(output_file, 'wt', encoding='utf-8', compresslevel=6) as f:
+        _write_json_records(result, f)
+
+
+def write_json_zstd(result: pd.DataFrame, output_file: str) -> None:
+    """
+    Writes a report as a zstd-compressed JSON list of records. Requires the `zstandard` package.
+    """
+    try:
+        import zstandard
+    except ImportError as e:
+        raise ImportError("The 'zstandard' package is required to write zstd-compressed reports") from e
+
+    with open(output_file, 'wb') as raw:
+        with zstandard.ZstdCompressor().stream_writer(raw) as compressed:
+            with io.TextIOWrapper(compressed, encoding='utf-8') as f:
+                _write_json_records(result, f)
+
+
+def write_parquet(result: pd.DataFrame, output_file: str) -> None:
+    """
+    Writes a report as a Parquet file. Requires `pyarrow` or `fastparquet`.
+    """
+    result.to_parquet(output_file, index=False)
+
+
+def write_csv(result: pd.DataFrame, output_file: str) -> None:
+    """
+    Writes a report as a CSV file.
+    """
+    result.to_csv(output_file, index=False, encoding='utf-8')
+
+
+class ReportFormat(NamedTuple):
+    extension: str
+    write: Callable[[pd.DataFrame, str], None]
+    read: Callable[[str], pd.DataFrame]
+
+
+REPORT_FORMATS: Dict[str, ReportFormat] = {
+    "json": ReportFormat(".json", write_json, pd.read_json),
+    "ndjson": ReportFormat(".ndjson", write_ndjson, lambda path: pd.read_json(path, lines=True)),
+    "json.gz": ReportFormat(".json.gz", write_json_gzip, lambda path: pd.read_json(path, compression="gzip")),
+    "json.zst": ReportFormat(".json.zst", write_json_zstd, lambda path: pd.read_json(path, compression="zstd")),
+    "parquet": ReportFormat(".parquet", write_parquet, pd.read_parquet),
+    "csv": ReportFormat(".csv", write_csv, pd.read_csv),
+}
+
+
+def get_report_format(fmt: str) -> ReportFormat:
+    """
+    Returns the output backend for a report format.
+
+    Args:
+        fmt (str): The format name: "json", "ndjson", "json.gz", "json.zst", "parquet" or "csv".
+
+    Returns:
+        ReportFormat: The file extension, writer and reader of the format.
+    """
+    try:
+        return REPORT_FORMATS[fmt]
+    except KeyError:
+        raise ValueError(f"Unknown report format '{fmt}', expected one of {list(REPORT_FORMATS)}") from None
+
+
+def compare_report_formats(result: pd.DataFrame, formats: Optional[Iterable[str]] = None,
+                           directory: Optional[str] = None) -> pd.DataFrame:
+    """
+    Writes a report in several formats and compares the file sizes and the write and read times.
+
+    Formats whose optional dependency is not installed are reported with the error instead of the measurements.
+
+    Args:
+        result (pd.DataFrame): The report to write.
+        formats (Optional[Iterable[str]]): The formats to compare. Defaults to all formats.
+        directory (Optional[str]): Where to write the files. Defaults to a temporary directory removed afterwards.
+
+    Returns:
+        pd.DataFrame: One row per format with the file size in bytes, the write and read times in seconds and
+            the error, sorted by file size.
+    """
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for fmt in formats or REPORT_FORMATS:
+            report_format = get_report_format(fmt)
+            output_file = os.path.join(directory or tmp_dir, f"report{report_format.extension}")
+            row: Dict[str, Any] = {"format": fmt, "size_bytes": None, "write_seconds": None, "read_seconds": None, "error": None}
+            try:
+                started = time.perf_counter()
+                report_format.write(result, output_file)
+                row["write_seconds"] = time.perf_counter() - started
+                row["size_bytes"] = os.path.getsize(output_file)
+
+                started = time.perf_counter()
+                report_format.read(output_file)
+                row["read_seconds"] = time.perf_counter() - started
+            except ImportError as e:
+                logger.warning(f"Skipping report format '{fmt}': {e}")
+                row["error"] = str(e)
+            rows.append(row)
+
+    return pd.DataFrame(rows).sort_values("size_bytes", na_position="last", ignore_index=True)
@@ -1,54 +1,190 @@
+import atexit
 import datetime
 import functools
-import json
 import logging
-from typing import Any, Callable, Optional
+import os
+import queue
+import threading
+from typing import Any, Callable, Iterable, List, Optional, Sequence, Tuple
 
+import numpy as np
 import pandas as pd
 
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+from src.date_index import DateIndex
+from src.profiling import profiled, stage
+from src.report_formats import get_report_format
+from src.schema import restore_transactions
 
+REPORTS_DIR = os.path.join(os.path.dirname(__file__), "reports")
 
-def write_report(file_name: Optional[str] = None) -> Callable:
+
+class ReportWriter:
+    """
+    Writes reports on a background thread.
+
+    Reports are put on a queue drained by a single writer thread. Errors are logged and kept until the next
+    `flush`, which waits for all queued reports to be written. Pending reports are flushed when the interpreter exits.
     """
-    A decorator that writes the result of the decorated function to a JSON file.
+
+    def __init__(self) -> None:
+        self._queue: queue.Queue = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._errors: List[Tuple[str, Exception]] = []
+
+    def submit(self, result: pd.DataFrame, output_file: str, fmt: str = "json") -> None:
+        """
+        Queues a copy of a report for writing, so the caller may go on using and modifying the DataFrame.
+        """
+        write = get_report_format(fmt).write
+        result = result.copy()
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="report-writer", daemon=True)
+                self._thread.start()
+        self._queue.put((write, result, output_file))
+
+    def _run(self) -> None:
+        while True:
+            write, result, output_file = self._queue.get()
+            try:
+                with stage("src.reports.write_report", len(result)):
+                    write(result, output_file)
+            except Exception as e:
+                logging.error(f"Failed to write report to {output_file}: {e}")
+                with self._lock:
+                    self._errors.append((output_file, e))
+            finally:
+                self._queue.task_done()
+
+    def flush(self) -> List[Tuple[str, Exception]]:
+        """
+        Waits until all queued reports are written.
+
+        Returns:
+            List[Tuple[str, Exception]]: The files that failed to be written since the last flush, with the errors.
+        """
+        self._queue.join()
+        with self._lock:
+            errors, self._errors = self._errors, []
+        return errors
+
+
+report_writer = ReportWriter()
+atexit.register(report_writer.flush)
+
+
+def write_report(file_name: Optional[str] = None, background: bool = False, fmt: str = "json") -> Callable:
+    """
+    A decorator that writes the result of the decorated function to a file, by default as JSON.
 
     Args:
         file_name (Optional[str]): The name of the output file. If not provided, a timestamped name is generated.
+        background (bool): Whether to write the file on the background writer thread instead of before returning.
+            The result is then returned as soon as it is computed and a copy of it is written; call
+            `report_writer.flush()` to wait for the file and collect errors.
+        fmt (str): The output format: "json", "ndjson", "json.gz", "json.zst", "parquet" or "csv".
 
     Returns:
         Callable: The decorated function.
     """
+    report_format = get_report_format(fmt)
+
     def decorator_write_report(func: Callable) -> Callable:
         @functools.wraps(func)
         def wrapper_write_report(*args, **kwargs) -> Any:
             result = func(*args, **kwargs)
-            output_file = file_name or (f"/Users/vigenkarapetan/PycharmProjects/cours_work_2/cours_work_2/src/reports"
-                                        f"/report_"
-                                        f"{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+            if file_name is None:
+                os.makedirs(REPORTS_DIR, exist_ok=True)
+                output_file = os.path.join(REPORTS_DIR,
+                                           f"report_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S_%f')}"
+                                           f"{report_format.extension}")
+            else:
+                output_file = file_name
             logging.info(f"Writing report to {output_file}")
-            with open(output_file, 'w') as f:
-                json.dump(result.to_dict(orient='records'), f, ensure_ascii=False, indent=4)
+            if background:
+                report_writer.submit(result, output_file, fmt)
+            else:
+                with stage("src.reports.write_report", len(result)):
+                    report_format.write(result, output_file)
             return result
         return wrapper_write_report
-    return decorator_write_report if file_name is None else decorator_write_report(file_name)
+    return decorator_write_report
 
 
-@write_report()
-def spending_by_category(transactions: pd.DataFrame, category: str, date: Optional[str] = None) -> pd.DataFrame:
+@write_report(background=True)
+def spending_by_category(transactions: pd.DataFrame, category: str, date: Optional[str] = None,
+                         date_index: Optional[DateIndex] = None) -> pd.DataFrame:
     """
-    Filters transactions by category and date range.
+    Filters transactions by category and date range and writes them to a report file on the background writer
+    thread; call `report_writer.flush()` to wait for the file.
 
     Args:
-        transactions (pd.DataFrame): The DataFrame containing transaction data.
+        transactions (pd.DataFrame): The DataFrame containing transaction data, as read or compact.
         category (str): The category to filter by.
         date (Optional[str]): The end date in the format 'dd.mm.yyyy'. Defaults to today if not provided.
+        date_index (Optional[DateIndex]): A date index built over the transactions, see `category_spending`.
 
     Returns:
-        pd.DataFrame: The filtered transactions.
+        pd.DataFrame: The filtered transactions, with the column types of `read_xls_file`.
+    """
+    return category_spending(transactions, category, date, date_index)
+
+
+@profiled
+def category_spending(transactions: pd.DataFrame, category: str, date: Optional[str] = None,
+                      date_index: Optional[DateIndex] = None) -> pd.DataFrame:
+    """
+    Filters transactions by category and date range, without writing a report.
+
+    Args:
+        transactions (pd.DataFrame): The DataFrame containing transaction data, as read or compact.
+        category (str): The category to filter by.
+        date (Optional[str]): The end date in the format 'dd.mm.yyyy'. Defaults to today if not provided.
+        date_index (Optional[DateIndex]): A date index built over the transactions. If given, the range is found
+            by binary search instead of parsing and comparing every date.
+
+    Returns:
+        pd.DataFrame: The filtered transactions, with the column types of `read_xls_file`.
+    """
+    return restore_transactions(transactions.iloc[category_spending_rows(transactions, category, date, date_index)])
+
+
+@profiled
+def category_spending_rows(transactions: pd.DataFrame, category: str, date: Optional[str] = None,
+                           date_index: Optional[DateIndex] = None) -> np.ndarray:
+    """
+    Finds the transactions of a category in the three months before a date, without copying them.
+
+    Select the transactions with `transactions.iloc[rows]`; unlike `category_spending`, compact transactions
+    are not converted back, so only the rows that are sent on need to be restored or serialized.
+
+    Args:
+        transactions (pd.DataFrame): The DataFrame containing transaction data, as read or compact.
+        category (str): The category to filter by.
+        date (Optional[str]): The end date in the format 'dd.mm.yyyy'. Defaults to today if not provided.
+        date_index (Optional[DateIndex]): A date index built over the transactions, see `category_spending`.
+
+    Returns:
+        np.ndarray: The sorted positions of the matching transactions.
     """
     logging.info(f"Filtering transactions for category '{category}' up to date '{date}'")
+    start_date, end_date = get_date_range(date)
+    if date_index is not None:
+        return date_index.window(category, start_date, end_date)
+    return np.flatnonzero(_category_mask(transactions, category, start_date, end_date))
 
+
+def get_date_range(date: Optional[str]) -> Tuple[datetime.datetime, datetime.datetime]:
+    """
+    Returns the three-month window of the category reports ending at a date.
+
+    Args:
+        date (Optional[str]): The end date in the format 'dd.mm.yyyy'. Defaults to now if not provided.
+
+    Returns:
+        Tuple[datetime.datetime, datetime.datetime]: The start and the end of the window, both included.
+    """
     if date is None:
         end_date = datetime.datetime.now()
     else:
@@ -57,11 +193,86 @@ def spending_by_category(transactions: pd.DataFrame, category: str, date: Option
     start_date = end_date - pd.DateOffset(months=3)
 
     logging.info(f"Filtering transactions from {start_date.strftime('%d.%m.%Y')} to {end_date.strftime('%d.%m.%Y')}")
+    return start_date, end_date
+
+
+def _filter_transactions(transactions: pd.DataFrame, category: str, start_date: datetime.datetime,
+                         end_date: datetime.datetime) -> pd.DataFrame:
+    """
+    Selects the transactions of a category made within the date range.
+    """
+    return transactions[_category_mask(transactions, category, start_date, end_date)]
+
+
+def _category_mask(transactions: pd.DataFrame, category: str, start_date: datetime.datetime,
+                   end_date: datetime.datetime) -> np.ndarray:
+    """
+    Returns which transactions are of a category and made within the date range.
+    """
+    dates = pd.to_datetime(transactions['Дата операции'], format='%d.%m.%Y %H:%M:%S')
+    mask: np.ndarray = ((transactions['Категория'] == category) & (dates >= start_date)
+                        & (dates <= end_date)).to_numpy(dtype=bool)
+    return mask
+
+
+@profiled
+def spending_by_category_chunked(chunks: Iterable[pd.DataFrame], category: str,
+                                 date: Optional[str] = None) -> pd.DataFrame:
+    """
+    Filters transactions by category and date range, reading the transactions from an iterator of chunks.
+
+    Args:
+        chunks (Iterable[pd.DataFrame]): Chunks of transaction data, e.g. from `iter_xls_chunks`.
+        category (str): The category to filter by.
+        date (Optional[str]): The end date in the format 'dd.mm.yyyy'. Defaults to today if not provided.
+
+    Returns:
+        pd.DataFrame: The filtered transactions.
+    """
+    logging.info(f"Filtering transaction chunks for category '{category}' up to date '{date}'")
+    start_date, end_date = get_date_range(date)
+    filtered: List[pd.DataFrame] = [_filter_transactions(chunk, category, start_date, end_date) for chunk in chunks]
+    return pd.concat(filtered) if filtered else pd.DataFrame()
+
+
+@write_report(background=True)
+@profiled
+def spending_by_category_matrix(transactions: pd.DataFrame, dates: Sequence[str],
+                                categories: Optional[Sequence[str]] = None,
+                                date_index: Optional[DateIndex] = None) -> pd.DataFrame:
+    """
+    Computes spending over the three months before each of many dates for every category in one pass.
+
+    Args:
+        transactions (pd.DataFrame): The DataFrame containing transaction data.
+        dates (Sequence[str]): The end dates in the format 'dd.mm.yyyy', e.g. every month-end of a year.
+        categories (Optional[Sequence[str]]): The categories to report. Defaults to all categories.
+        date_index (Optional[DateIndex]): A date index built over the transactions. Built if not provided.
+
+    Returns:
+        pd.DataFrame: One row per category and end date with the window bounds, the sum of
+            'Сумма операции' and the number of operations.
+    """
+    logging.info(f"Computing spending for {len(dates)} dates")
+    date_index = date_index or DateIndex(transactions)
+
+    end_dates = pd.to_datetime(pd.Series(dates, dtype=object), format='%d.%m.%Y')
+    start_dates = end_dates - pd.DateOffset(months=3)
+    amounts = restore_transactions(transactions, ['Сумма операции'])['Сумма операции'].to_numpy()
+    totals, counts = date_index.window_totals(amounts, start_dates, end_dates)
 
-    filtered_transactions = transactions[
-        (transactions['Категория'] == category) & (pd.to_datetime(transactions['Дата операции'],
-                                                                  format='%d.%m.%Y %H:%M:%S') >= start_date)
-        & (pd.to_datetime(transactions['Дата операции'], format='%d.%m.%Y %H:%M:%S') <= end_date)
-    ]
+    all_categories = list(date_index.categories)
+    if categories is None:
+        categories = all_categories
+    # Unknown categories point at an extra row of zeros.
+    rows = [all_categories.index(category) if category in all_categories else -1 for category in categories]
+    totals = np.vstack([totals, np.zeros((1, len(end_dates)))])[rows]
+    counts = np.vstack([counts, np.zeros((1, len(end_dates)), dtype=np.int64)])[rows]
 
-    return filtered_transactions
+    return pd.DataFrame({
+        "category": np.repeat(list(categories), len(end_dates)),
+        "start_date": np.tile(start_dates.dt.strftime('%d.%m.%Y').to_numpy(), len(categories)),
+        "end_date": np.tile(end_dates.dt.strftime('%d.%m.%Y').to_numpy(), len(categories)),
+        "total_spent": totals.ravel(),
+        "operations": counts.ravel(),
+    })
@@ -0,0 +1,156 @@
+import logging
+from typing import Dict, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+from pandas import DataFrame
+
+logger = logging.getLogger(__name__)
+
+DATE_COLUMNS: Dict[str, str] = {
+    "Дата операции": "%d.%m.%Y %H:%M:%S",
+    "Дата платежа": "%d.%m.%Y",
+}
+CATEGORY_COLUMNS = ("Номер карты", "Статус", "Валюта операции", "Валюта платежа", "Категория", "Описание")
+MONEY_COLUMNS = ("Сумма операции", "Сумма платежа", "Кэшбэк", "Сумма операции с округлением")
+MCC_COLUMN = "MCC"
+
+# The dtype of amounts in kopecks. The workbook readers never produce nullable integers, so an amount column of
+# this dtype is known to hold kopecks from the data alone, through merges, concatenations and slicing.
+KOPECK_DTYPE = pd.Int64Dtype()
+
+
+def _to_kopecks(values: pd.Series) -> Optional[pd.Series]:
+    """
+    Converts amounts in rubles to kopecks of KOPECK_DTYPE, or returns None if that would lose precision.
+    """
+    amounts = values.to_numpy(dtype=float)
+    kopecks = np.round(amounts * 100)
+    missing = np.isnan(amounts)
+    if not np.array_equal(kopecks[~missing] / 100, amounts[~missing]):
+        return None
+    kopecks = pd.arrays.IntegerArray(np.where(missing, 0, kopecks).astype(np.int64), missing)
+    return pd.Series(kopecks, index=values.index, name=values.name)
+
+
+def _to_mcc(values: pd.Series) -> Optional[pd.Series]:
+    """
+    Converts merchant category codes to nullable 16-bit integers, or returns None if they do not fit.
+    """
+    codes = values.to_numpy(dtype=float)
+    present = codes[~np.isnan(codes)]
+    if len(present) and (np.any(present % 1) or present.min() < 0 or present.max() > np.iinfo(np.int16).max):
+        return None
+    return values.astype("Int16")
+
+
+def compact_transactions(df: DataFrame) -> DataFrame:
+    """
+    Converts transactions to compact column types.
+
+    Text columns become categoricals, dates become datetime64, amounts become kopecks of KOPECK_DTYPE and MCC
+    becomes a nullable int16. Columns that are absent or cannot be converted without loss keep their type.
+    `restore_transactions` converts the result back.
+
+    Args:
+        df (DataFrame): The transactions as read by `read_xls_file`.
+
+    Returns:
+        DataFrame: A compact copy of the transactions.
+    """
+    data = {}
+    for column in df.columns:
+        values = df[column]
+        converted = None
+        if column in DATE_COLUMNS and values.dtype == object:
+            converted = pd.to_datetime(values, format=DATE_COLUMNS[column])
+        elif column in CATEGORY_COLUMNS and values.dtype == object:
+            converted = values.astype("category")
+        elif column in MONEY_COLUMNS and values.dtype.kind == "f":
+            converted = _to_kopecks(values)
+        elif column == MCC_COLUMN and values.dtype.kind == "f":
+            converted = _to_mcc(values)
+        data[column] = values if converted is None else converted
+
+    return DataFrame(data, index=df.index)
+
+
+def _is_compact_column(column: str, values: pd.Series) -> bool:
+    return ((column in DATE_COLUMNS and values.dtype.kind == "M")
+            or isinstance(values.dtype, pd.CategoricalDtype)
+            or (column in MONEY_COLUMNS and values.dtype == KOPECK_DTYPE)
+            or (column == MCC_COLUMN and isinstance(values.dtype, pd.Int16Dtype)))
+
+
+def is_compact(df: DataFrame) -> bool:
+    """
+    Returns True if some column of the DataFrame has a compact type, see `compact_transactions`.
+    """
+    return any(_is_compact_column(column, df[column]) for column in df.columns)
+
+
+def _format_dates(values: pd.Series, date_format: str) -> np.ndarray:
+    """
+    Formats dates as strings, formatting every distinct date once. Missing dates become NaN.
+    """
+    codes, uniques = pd.factorize(values)
+    vocabulary = np.empty(len(uniques) + 1, dtype=object)
+    vocabulary[:-1] = pd.DatetimeIndex(uniques).strftime(date_format)
+    vocabulary[-1] = np.nan
+    formatted: np.ndarray = vocabulary[codes]
+    return formatted
+
+
+def restore_transactions(df: DataFrame, columns: Optional[Sequence[str]] = None) -> DataFrame:
+    """
+    Converts a compact frame back to the column types `read_xls_file` produces.
+
+    Functions written for the original types call this on the rows and columns they use, so they give the
+    same results for both representations. The columns to convert are recognized by their types, so the frame
+    may come from any pandas operation on a compact frame. A frame that is not compact is returned as is.
+
+    Args:
+        df (DataFrame): The transactions.
+        columns (Optional[Sequence[str]]): The columns to convert. Defaults to all columns.
+
+    Returns:
+        DataFrame: The transactions with the original column types.
+    """
+    if not is_compact(df):
+        return df
+
+    restored = df.copy(deep=False)
+    for column in df.columns if columns is None else columns:
+        values = df[column]
+        if column in DATE_COLUMNS and values.dtype.kind == "M":
+            restored[column] = _format_dates(values, DATE_COLUMNS[column])
+        elif isinstance(values.dtype, pd.CategoricalDtype):
+            restored[column] = values.astype(object)
+        elif column in MONEY_COLUMNS and values.dtype == KOPECK_DTYPE:
+            restored[column] = values.to_numpy(dtype=float, na_value=np.nan) / 100
+        elif column == MCC_COLUMN and isinstance(values.dtype, pd.Int16Dtype):
+            restored[column] = values.to_numpy(dtype=float, na_value=np.nan)
+    return restored
+
+
+def memory_report(before: DataFrame, after: DataFrame) -> DataFrame:
+    """
+    Compares the memory used by every column of two representations of the same transactions.
+
+    Args:
+        before (DataFrame): The original transactions.
+        after (DataFrame): The compact transactions.
+
+    Returns:
+        DataFrame: The bytes used per column before and after, their ratio and the dtypes, with a 'total' row.
+    """
+    report = DataFrame({
+        "dtype_before": before.dtypes.astype(str),
+        "dtype_after": after.dtypes.astype(str),
+        "bytes_before": before.memory_usage(deep=True, index=False),
+        "bytes_after": after.memory_usage(deep=True, index=False),
+    })
+    report.loc["total", ["bytes_before", "bytes_after"]] = report[["bytes_before", "bytes_after"]].sum()
+    report["ratio"] = report["bytes_after"] / report["bytes_before"]
+    report.index.name = "column"
+    return report
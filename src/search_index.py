@@ -0,0 +1,208 @@
+import logging
+import unicodedata
+from collections import deque
+from typing import Dict, Iterable, List, Sequence, Set
+
+import numpy as np
+import pandas as pd
+from pandas import DataFrame
+
+logger = logging.getLogger(__name__)
+
+SEARCH_FIELDS = ("Категория", "Описание")
+
+
+def normalize_text(text: object) -> str:
+    """
+    Normalizes a value for case-insensitive matching.
+
+    Args:
+        text (object): The value to normalize; non-strings are converted with `str`.
+
+    Returns:
+        str: The NFKC-normalized, lowercased text.
+    """
+    return unicodedata.normalize("NFKC", str(text)).lower()
+
+
+def ngrams(text: str, n: int) -> Set[str]:
+    """
+    Returns the set of character n-grams of a text.
+    """
+    return {text[i:i + n] for i in range(len(text) - n + 1)}
+
+
+class AhoCorasick:
+    """
+    An Aho-Corasick automaton that finds all of a set of patterns in a text in one pass.
+    """
+
+    def __init__(self, patterns: Sequence[str]) -> None:
+        """
+        Builds the automaton.
+
+        Args:
+            patterns (Sequence[str]): The patterns to look for; an empty pattern matches every text.
+        """
+        self.patterns = list(patterns)
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[List[int]] = [[]]
+
+        for pattern_id, pattern in enumerate(self.patterns):
+            node = 0
+            for char in pattern:
+                if char not in self._goto[node]:
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append([])
+                    self._goto[node][char] = len(self._goto) - 1
+                node = self._goto[node][char]
+            self._out[node].append(pattern_id)
+
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                queue.append(child)
+                fail = self._fail[node]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[child] = self._goto[fail].get(char, 0) if node else 0
+                self._out[child] = self._out[child] + self._out[self._fail[child]]
+
+    def find(self, text: str) -> Set[int]:
+        """
+        Returns the ids of the patterns occurring in the text.
+        """
+        found = set(self._out[0])
+        node = 0
+        for char in text:
+            while node and char not in self._goto[node]:
+                node = self._fail[node]
+            node = self._goto[node].get(char, 0)
+            found.update(self._out[node])
+        return found
+
+
+class SearchIndex:
+    """
+    A reusable substring index over the category and description of transactions.
+
+    The index is built once from a DataFrame. Distinct texts are indexed by character n-grams, and each
+    distinct text keeps the positions of the rows it occurs in, so a query only touches the texts sharing
+    all n-grams with it and the rows of the texts that really match.
+    """
+
+    def __init__(self, df: DataFrame, fields: Sequence[str] = SEARCH_FIELDS, n: int = 3) -> None:
+        """
+        Builds the index.
+
+        Args:
+            df (DataFrame): The DataFrame containing transaction data.
+            fields (Sequence[str]): The text columns to search in.
+            n (int): The n-gram length.
+        """
+        logger.info("Building search index over %d operations", len(df))
+        self.df = df
+        self.n = n
+
+        text_ids: Dict[str, int] = {}
+        row_text_ids = []
+        for field in fields:
+            codes, uniques = pd.factorize(df[field])
+            # Missing values are coded -1 and map to the last slot, the empty text; only the empty query matches it.
+            texts = [normalize_text(value) for value in uniques] + [""]
+            mapping = np.array([text_ids.setdefault(text, len(text_ids)) for text in texts], dtype=np.int64)
+            row_text_ids.append(mapping[codes])
+        self.texts: List[str] = list(text_ids)
+
+        # Rows of every distinct text, laid out as one sorted array with offsets.
+        text_of_row = np.concatenate(row_text_ids) if row_text_ids else np.empty(0, dtype=np.int64)
+        order = np.argsort(text_of_row, kind="stable")
+        self._rows = (order % len(df)) if len(df) else order
+        self._offsets = np.concatenate([[0], np.cumsum(np.bincount(text_of_row, minlength=len(self.texts)))])
+
+        postings: Dict[str, List[int]] = {}
+        for text_id, text in enumerate(self.texts):
+            for gram in ngrams(text, n):
+                postings.setdefault(gram, []).append(text_id)
+        self._postings = {gram: np.array(ids, dtype=np.int64) for gram, ids in postings.items()}
+
+    def _candidates(self, query: str) -> Iterable[int]:
+        grams = ngrams(query, self.n)
+        if not grams:
+            return range(len(self.texts))
+
+        lists = sorted((self._postings[gram] for gram in grams if gram in self._postings), key=len)
+        if len(lists) < len(grams):
+            return []
+        candidates = lists[0]
+        for ids in lists[1:]:
+            candidates = np.intersect1d(candidates, ids, assume_unique=True)
+            if not len(candidates):
+                break
+        text_ids: List[int] = candidates.tolist()
+        return text_ids
+
+    def match_texts(self, query: str) -> List[int]:
+        """
+        Returns the ids of the distinct texts containing the query.
+        """
+        query = normalize_text(query)
+        return [text_id for text_id in self._candidates(query) if query in self.texts[text_id]]
+
+    def rows_for_texts(self, text_ids: Iterable[int]) -> np.ndarray:
+        """
+        Returns the sorted positions of the rows where any of the given texts occurs.
+        """
+        parts = [self._rows[self._offsets[text_id]:self._offsets[text_id + 1]] for text_id in text_ids]
+        if not parts:
+            return np.empty(0, dtype=np.int64)
+        return np.unique(np.concatenate(parts))
+
+    def search(self, query: str) -> np.ndarray:
+        """
+        Finds the operations containing the query in the category or description fields.
+
+        Args:
+            query (str): The text to search for.
+
+        Returns:
+            np.ndarray: The sorted positions of the matching rows.
+        """
+        return self.rows_for_texts(self.match_texts(query))
+
+    def search_frame(self, query: str) -> DataFrame:
+        """
+        Finds the operations containing the query and returns them as a DataFrame.
+
+        Args:
+            query (str): The text to search for.
+
+        Returns:
+            DataFrame: The matching operations.
+        """
+        return self.df.iloc[self.search(query)]
+
+    def search_many(self, queries: Iterable[str]) -> Dict[str, np.ndarray]:
+        """
+        Finds the operations matching each of many queries in a single pass over the distinct texts.
+
+        Args:
+            queries (Iterable[str]): The texts to search for.
+
+        Returns:
+            Dict[str, np.ndarray]: The sorted positions of the matching rows for every query.
+        """
+        queries = list(dict.fromkeys(queries))
+        patterns = list(dict.fromkeys(normalize_text(query) for query in queries))
+        automaton = AhoCorasick(patterns)
+
+        matched: List[List[int]] = [[] for _ in patterns]
+        for text_id, text in enumerate(self.texts):
+            for pattern_id in automaton.find(text):
+                matched[pattern_id].append(text_id)
+
+        rows = {pattern: self.rows_for_texts(text_ids) for pattern, text_ids in zip(patterns, matched)}
+        return {query: rows[normalize_text(query)] for query in queries}
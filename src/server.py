@@ -0,0 +1,226 @@
+import argparse
+import asyncio
+import json
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+from typing import Any, Callable, Optional, Sequence, Tuple, TypeVar
+from urllib.parse import parse_qs, urlsplit
+
+from src.batch import COMMANDS
+from src.dataset import Dataset
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+MAX_HEADER_LINES = 100
+RELOAD_INTERVAL = 1.0
+
+
+class RequestError(Exception):
+    """
+    An error answered with an HTTP status and a JSON message.
+    """
+
+    def __init__(self, status: HTTPStatus, message: str) -> None:
+        super().__init__(message)
+        self.status = status
+
+
+def _health(server: "DatasetServer") -> str:
+    dataset = server.loaded_dataset()
+    return json.dumps({"path": dataset.path, "operations": len(dataset.df), "loaded_at": dataset.loaded_at,
+                       "reloads": server.reloads})
+
+
+class DatasetServer:
+    """
+    A local HTTP service answering dashboard, search and category report requests over a dataset kept in memory.
+
+    Connections are handled by asyncio and the queries run on a thread pool, so slow requests do not block the
+    others. The workbook is watched and reloaded in the background when it changes; requests keep being served
+    from the previous dataset until the new one is ready.
+
+    Endpoints, all GET and answering JSON, mirror the batch commands:
+        /dashboard: the data of `get_data`.
+        /search?query=...&fuzzy=1: the operations containing the text, like `search_by_request`, or with
+            `fuzzy` those whose description resembles it, best match first.
+        /category?category=...&date=dd.mm.yyyy: the operations of `spending_by_category`.
+        /health: the number of operations, when they were loaded and how many times the file was reloaded.
+    """
+
+    def __init__(self, path: str, host: str = "127.0.0.1", port: int = 8000, cache_dir: Optional[str] = None,
+                 reload_interval: float = RELOAD_INTERVAL, max_workers: Optional[int] = None) -> None:
+        """
+        Args:
+            path (str): The Excel file with the operations.
+            host (str): The address to listen on.
+            port (int): The port to listen on, 0 for any free port.
+            cache_dir (Optional[str]): The root directory of the column cache, see `read_xls_file_cached`.
+            reload_interval (float): How often the file is checked for changes, in seconds.
+            max_workers (Optional[int]): The number of threads running the queries.
+        """
+        self.path = path
+        self.host = host
+        self.port = port
+        self.cache_dir = cache_dir
+        self.reload_interval = reload_interval
+        self.dataset: Optional[Dataset] = None
+        self.reloads = 0
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="dataset-server")
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._reload_task: Optional[asyncio.Task] = None
+
+    async def _run(self, func: Callable[..., T], *args: Any) -> T:
+        return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+
+    def loaded_dataset(self) -> Dataset:
+        """
+        Returns the current dataset.
+
+        Raises:
+            RuntimeError: If the server has not been started.
+        """
+        if self.dataset is None:
+            raise RuntimeError("The dataset is not loaded, start the server first")
+        return self.dataset
+
+    async def start(self) -> None:
+        """
+        Loads the dataset and starts listening. `port` is set to the actual port.
+        """
+        dataset = self.dataset = await self._run(Dataset.load, self.path, self.cache_dir)
+        server = self._server = await asyncio.start_server(self._handle_connection, self.host, self.port)
+        self.port = server.sockets[0].getsockname()[1]
+        self._reload_task = asyncio.create_task(self._watch())
+        logger.info(f"Serving {len(dataset.df)} operations on http://{self.host}:{self.port}")
+
+    async def stop(self) -> None:
+        """
+        Stops listening and watching the file.
+        """
+        if self._reload_task is not None:
+            self._reload_task.cancel()
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        self._executor.shutdown(wait=False)
+
+    async def serve_forever(self) -> None:
+        await self.start()
+        try:
+            if self._server is not None:
+                await self._server.serve_forever()
+        finally:
+            await self.stop()
+
+    async def reload(self) -> None:
+        """
+        Loads the file again and swaps the new dataset in.
+        """
+        started = time.perf_counter()
+        self.dataset = await self._run(Dataset.load, self.path, self.cache_dir)
+        self.reloads += 1
+        logger.info(f"Reloaded {self.path} in {time.perf_counter() - started:.3f}s")
+
+    async def _watch(self) -> None:
+        while True:
+            await asyncio.sleep(self.reload_interval)
+            if not self.loaded_dataset().is_stale():
+                continue
+            try:
+                await self.reload()
+            except Exception as e:
+                # The file may still be being written; it is retried on the next check.
+                logger.error(f"Failed to reload {self.path}: {e}")
+
+    def handle(self, method: str, target: str) -> Tuple[HTTPStatus, str]:
+        """
+        Answers one request.
+
+        Args:
+            method (str): The HTTP method.
+            target (str): The path and query string.
+
+        Returns:
+            Tuple[HTTPStatus, str]: The status and the JSON body.
+        """
+        url = urlsplit(target)
+        try:
+            name = url.path.strip("/")
+            if name != "health" and name not in COMMANDS:
+                raise RequestError(HTTPStatus.NOT_FOUND, f"Unknown path '{url.path}'")
+            if method != "GET":
+                raise RequestError(HTTPStatus.METHOD_NOT_ALLOWED, f"Method {method} is not allowed")
+            if name == "health":
+                return HTTPStatus.OK, _health(self)
+            # The query parameters are the arguments of the batch command of the same name.
+            command = {key: values[0] for key, values in parse_qs(url.query).items()}
+            return HTTPStatus.OK, COMMANDS[name](self.loaded_dataset(), command)
+        except RequestError as e:
+            return e.status, json.dumps({"error": str(e)}, ensure_ascii=False)
+        except (KeyError, ValueError) as e:
+            return HTTPStatus.BAD_REQUEST, json.dumps({"error": f"{type(e).__name__}: {e}"}, ensure_ascii=False)
+        except Exception as e:
+            logger.exception(f"Failed to answer {method} {target}")
+            return HTTPStatus.INTERNAL_SERVER_ERROR, json.dumps({"error": str(e)}, ensure_ascii=False)
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line.strip():
+                    break
+                method, target, version = request_line.decode("latin-1").split(maxsplit=2)
+                headers = {}
+                for _ in range(MAX_HEADER_LINES):
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip().lower()
+                if headers.get("content-length"):
+                    await reader.readexactly(int(headers["content-length"]))
+
+                status, body = await self._run(self.handle, method, target)
+                keep_alive = (headers.get("connection") != "close" if version.strip() == "HTTP/1.1"
+                              else headers.get("connection") == "keep-alive")
+                payload = body.encode("utf-8")
+                writer.write(f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+                             f"Content-Type: application/json; charset=utf-8\r\n"
+                             f"Content-Length: {len(payload)}\r\n"
+                             f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode("latin-1")
+                             + payload)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    """
+    Runs the service from the command line until interrupted.
+    """
+    parser = argparse.ArgumentParser(description="Serve the dashboard, search and category reports over HTTP.")
+    parser.add_argument("path", help="Excel file with the operations")
+    parser.add_argument("--host", default="127.0.0.1", help="address to listen on")
+    parser.add_argument("--port", type=int, default=8000, help="port to listen on")
+    parser.add_argument("--reload-interval", type=float, default=RELOAD_INTERVAL,
+                        help="seconds between checks of the file for changes")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    server = DatasetServer(args.path, args.host, args.port, reload_interval=args.reload_interval)
+    try:
+        asyncio.run(server.serve_forever())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -1,47 +1,181 @@
 import json
 import logging
-from typing import Any, Dict, List
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Optional, Tuple, Union
 
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+from src.profiling import profiled
 
+# pandas and the search index are imported by the functions that need them, so importing the services is fast.
+if TYPE_CHECKING:
+    import numpy as np
+    from pandas import DataFrame
 
-def search_by_request(search_text: str, operations_json: str) -> str:
+    from src.fuzzy_search import FuzzyIndex
+    from src.search_index import SearchIndex
+
+
+def _match_text(value: Any) -> str:
+    # Missing values, None from JSON or NaN from a DataFrame, are empty texts.
+    return "" if value is None or value != value else str(value).lower()
+
+
+def _match_positions(search_text: str, categories: Iterable[Any], descriptions: Iterable[Any]) -> List[int]:
+    """
+    Returns the positions of the values whose category or description contains the text, ignoring case.
+
+    Missing values are empty, so only the empty text matches them.
+    """
+    text = search_text.lower()
+    return [position for position, (category, description) in enumerate(zip(categories, descriptions))
+            if text in _match_text(category) or text in _match_text(description)]
+
+
+@profiled
+def search_by_request(search_text: str, operations_json: str, fuzzy: bool = False) -> str:
     """
     Search for operations containing the specified text in the category or description fields.
 
+    Kept for callers exchanging operations as JSON: the operations are read into a DataFrame, searched with
+    `search_operations` (or `search_operations_fuzzy`) and the matches are serialized back. With a DataFrame
+    at hand, call those directly and skip the JSON round trip.
+
     Args:
         search_text (str): The text to search for.
         operations_json (str): The JSON string representing the operations data.
+        fuzzy (bool): Whether to find the descriptions resembling the text instead, allowing typos and the
+            wrong keyboard layout; the operations are ordered from the best match, see `FuzzyIndex`.
 
     Returns:
-        str: A JSON string containing the filtered operations.
+        str: A JSON string containing the filtered operations, with the fields of OPERATION_FIELDS.
     """
+    import pandas as pd
+
+    from src.utils import OPERATION_FIELDS, serialize_operations
+
     logging.info("Loading operations data from JSON")
     operations: List[Dict[str, Any]] = json.loads(operations_json)
+    # Object columns keep the values as parsed, so missing fields and nulls are written back as null.
+    df = pd.DataFrame({field: [operation.get(field) for operation in operations] for field in OPERATION_FIELDS},
+                      dtype=object)
 
     logging.info("Searching for text '%s' in operations", search_text)
-    filtered_operations: List[Dict[str, Any]] = []
-    for operation in operations:
-        category = str(operation.get("Категория", ""))
-        description = str(operation.get("Описание", ""))
-        if search_text.lower() in category.lower() or search_text.lower() in description.lower():
-            filtered_operations.append({
-                "Дата операции": operation.get("Дата операции"),
-                "Дата платежа": operation.get("Дата платежа"),
-                "Номер карты": operation.get("Номер карты"),
-                "Статус": operation.get("Статус"),
-                "Сумма операции": operation.get("Сумма операции"),
-                "Валюта операции": operation.get("Валюта операции"),
-                "Сумма платежа": operation.get("Сумма платежа"),
-                "Валюта платежа": operation.get("Валюта платежа"),
-                "Кэшбэк": operation.get("Кэшбэк"),
-                "Категория": operation.get("Категория"),
-                "MCC": operation.get("MCC"),
-                "Описание": operation.get("Описание"),
-                "Бонусы (включая кэшбэк)": operation.get("Бонусы (включая кэшбэк)"),
-                "Округление на инвесткопилку": operation.get("Округление на инвесткопилку"),
-                "Сумма операции с округлением": operation.get("Сумма операции с округлением")
-            })
-
-    logging.info("Found %d matching operations", len(filtered_operations))
-    return json.dumps(filtered_operations, ensure_ascii=False, indent=4)
+    rows = search_operations_fuzzy(search_text, df)[0] if fuzzy else search_operations(search_text, df)
+    return serialize_operations(df.iloc[rows])
+
+
+@profiled
+def search_operations(search_text: str, operations: Union["DataFrame", "SearchIndex"]) -> "np.ndarray":
+    """
+    Finds the operations containing the specified text in the category or description fields.
+
+    The text is matched once per distinct category and description instead of once per operation, and nothing
+    is serialized or copied: select the matching operations with `df.iloc[rows]` and serialize only what is
+    sent on, e.g. with `serialize_operations`.
+
+    Args:
+        search_text (str): The text to search for.
+        operations (Union[DataFrame, SearchIndex]): The operations, as read or compact, or a search index
+            already built over them, which normalizes the texts as described in `normalize_text`.
+
+    Returns:
+        np.ndarray: The sorted positions of the matching operations.
+    """
+    import numpy as np
+    import pandas as pd
+
+    from src.search_index import SearchIndex
+
+    if isinstance(operations, SearchIndex):
+        return operations.search(search_text)
+
+    mask = np.zeros(len(operations), dtype=bool)
+    for field in ("Категория", "Описание"):
+        codes, uniques = pd.factorize(operations[field])
+        # The last slot is for missing values, coded -1; only the empty text matches them.
+        matched = np.full(len(uniques) + 1, not search_text, dtype=bool)
+        matched[_match_positions(search_text, uniques, [""] * len(uniques))] = True
+        mask |= matched[codes]
+    rows = np.flatnonzero(mask)
+    logging.info("Found %d operations matching '%s'", len(rows), search_text)
+    return rows
+
+
+@profiled
+def search_operations_fuzzy(search_text: str, operations: Union["DataFrame", "FuzzyIndex"],
+                            threshold: Optional[float] = None,
+                            limit: Optional[int] = None) -> Tuple["np.ndarray", "np.ndarray"]:
+    """
+    Finds the operations whose description resembles the specified text, allowing typos and the wrong keyboard
+    layout.
+
+    Args:
+        search_text (str): The text to search for.
+        operations (Union[DataFrame, FuzzyIndex]): The operations, or a fuzzy index already built over their
+            descriptions; with an index, the cost of a search does not depend on the number of operations.
+        threshold (Optional[float]): The lowest score of a match, between 0 and 1. Defaults to DEFAULT_THRESHOLD.
+        limit (Optional[int]): The largest number of distinct descriptions whose operations are returned.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: The positions of the matching operations, from the best match, and the
+            score of every operation.
+    """
+    from src.fuzzy_search import DEFAULT_THRESHOLD, FuzzyIndex
+
+    index = operations if isinstance(operations, FuzzyIndex) else FuzzyIndex(operations["Описание"])
+    rows, scores = index.search(search_text, DEFAULT_THRESHOLD if threshold is None else threshold, limit)
+    logging.info("Found %d operations resembling '%s'", len(rows), search_text)
+    return rows, scores
+
+
+@profiled
+def search_by_request_chunked(search_text: str, chunks: Iterable["DataFrame"]) -> "DataFrame":
+    """
+    Search for operations containing the specified text in the category or description fields,
+    reading the operations from an iterator of chunks.
+
+    Only the matching rows are kept, so memory use is bounded by the chunk size and the number of matches.
+
+    Args:
+        search_text (str): The text to search for.
+        chunks (Iterable[DataFrame]): Chunks of transaction data, e.g. from `iter_xls_chunks`.
+
+    Returns:
+        DataFrame: The matching operations.
+    """
+    import pandas as pd
+
+    logging.info("Searching for text '%s' in operation chunks", search_text)
+    text = search_text.lower()
+    matches: List["DataFrame"] = []
+    for chunk in chunks:
+        # Missing values are empty texts, as in `_match_text`, so only the empty text matches them.
+        mask = (chunk["Категория"].map(_match_text).str.contains(text, regex=False)
+                | chunk["Описание"].map(_match_text).str.contains(text, regex=False))
+        matches.append(chunk[mask])
+
+    result = pd.concat(matches) if matches else pd.DataFrame()
+    logging.info("Found %d matching operations", len(result))
+    return result
+
+
+@profiled
+def search_by_requests(search_texts: Iterable[str],
+                       operations: Union["DataFrame", "SearchIndex"]) -> Dict[str, Dict[str, Any]]:
+    """
+    Search for operations matching any of many texts at once.
+
+    All texts are matched in a single pass over the distinct categories and descriptions with an
+    Aho-Corasick automaton, instead of one full scan per text.
+
+    Args:
+        search_texts (Iterable[str]): The texts to search for.
+        operations (Union[DataFrame, SearchIndex]): The operations, or a search index already built over them.
+
+    Returns:
+        Dict[str, Dict[str, Any]]: For every text, the positions of the matching rows and their count.
+    """
+    from src.search_index import SearchIndex
+
+    index = operations if isinstance(operations, SearchIndex) else SearchIndex(operations)
+    hits = index.search_many(search_texts)
+    logging.info("Searched for %d texts in %d operations", len(hits), len(index.df))
+    return {text: {"rows": rows.tolist(), "count": len(rows)} for text, rows in hits.items()}
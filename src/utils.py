@@ -1,18 +1,39 @@
 import json
 import logging
-from typing import Any, Dict, List
+from typing import Any, Iterator, List, Optional, Sequence, Tuple
 
+import numpy as np
 import pandas as pd
 from pandas import DataFrame
 
-pd.set_option('display.max_columns', None)
-pd.set_option('display.max_rows', None)
-pd.set_option('display.width', None)
+from src.profiling import profiled
+from src.schema import MCC_COLUMN, MONEY_COLUMNS, compact_transactions, memory_report, restore_transactions
 
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+OPERATION_FIELDS = (
+    "Дата операции",
+    "Дата платежа",
+    "Номер карты",
+    "Статус",
+    "Сумма операции",
+    "Валюта операции",
+    "Сумма платежа",
+    "Валюта платежа",
+    "Кэшбэк",
+    "Категория",
+    "MCC",
+    "Описание",
+    "Бонусы (включая кэшбэк)",
+    "Округление на инвесткопилку",
+    "Сумма операции с округлением",
+)
+# The numeric columns; `iter_xls_chunks` gives them the same float64 type in every chunk.
+NUMERIC_FIELDS = (*MONEY_COLUMNS, MCC_COLUMN, "Бонусы (включая кэшбэк)", "Округление на инвесткопилку")
+JSON_MODES = ("indent", "compact", "ndjson")
 
+
+@profiled
 def read_xls_file(path: str) -> DataFrame:
     """
     Reads an Excel file and returns its contents as a DataFrame.
@@ -27,6 +48,92 @@ def read_xls_file(path: str) -> DataFrame:
     return pd.read_excel(path, engine="openpyxl")
 
 
+@profiled
+def read_xls_file_compact(path: str) -> DataFrame:
+    """
+    Reads an Excel file into a compact frame and logs how much memory the compact column types save.
+
+    Args:
+        path (str): The path to the Excel file.
+
+    Returns:
+        DataFrame: The contents of the Excel file with compact column types, see `compact_transactions`.
+    """
+    df = read_xls_file(path)
+    compact = compact_transactions(df)
+    total = memory_report(df, compact).loc["total"]
+    logger.info(f"Transactions use {int(total['bytes_after'])} bytes instead of {int(total['bytes_before'])} "
+                f"({total['ratio']:.0%})")
+    return compact
+
+
+def _typed_chunk(records: List[Tuple[Any, ...]], header: Sequence[str], start: int) -> DataFrame:
+    """
+    Builds a DataFrame chunk with column types that do not depend on the rows of the chunk.
+
+    The numeric columns of NUMERIC_FIELDS are float64 in every chunk, since any later chunk may have missing
+    values; `read_xls_file`, which sees the whole column, reads columns without missing values or fractions as
+    int64 instead. Empty text cells become NaN, as in `read_xls_file`.
+
+    Args:
+        records (List[Tuple[Any, ...]]): The raw cell values of the rows.
+        header (Sequence[str]): The column names.
+        start (int): The position of the first row in the sheet, used as the start of the index.
+
+    Returns:
+        DataFrame: The typed chunk.
+    """
+    df = pd.DataFrame.from_records(records, columns=header, coerce_float=True)
+    df.index = pd.RangeIndex(start, start + len(df))
+    for column in df.columns:
+        values = df[column]
+        if column in NUMERIC_FIELDS:
+            df[column] = pd.to_numeric(values, errors="coerce").astype(np.float64)
+        elif values.dtype == object:
+            df[column] = values.where(values.notna(), np.nan)
+    return df
+
+
+def iter_xls_chunks(path: str, chunk_size: int = 100_000) -> Iterator[DataFrame]:
+    """
+    Reads an Excel file in read-only mode and yields its contents as DataFrame chunks.
+
+    Only one chunk of rows is kept in memory at a time, so the file can be processed at a fixed memory ceiling.
+
+    Args:
+        path (str): The path to the Excel file.
+        chunk_size (int): The maximum number of rows in a chunk.
+
+    Yields:
+        DataFrame: The next chunk of rows, indexed by the position of the row in the sheet.
+    """
+    import openpyxl
+
+    logger.info("Data is being read from the table in chunks...")
+    workbook = openpyxl.load_workbook(path, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+
+        records: List[Tuple[Any, ...]] = []
+        start = 0
+        for row in rows:
+            if all(value is None for value in row):
+                continue
+            records.append(row)
+            if len(records) == chunk_size:
+                yield _typed_chunk(records, header, start)
+                start += len(records)
+                records = []
+        if records:
+            yield _typed_chunk(records, header, start)
+    finally:
+        workbook.close()
+
+
+@profiled
 def convert_data_frame_to_json(df: DataFrame) -> str:
     """
     Converts a DataFrame to a JSON string.
@@ -37,24 +144,104 @@ def convert_data_frame_to_json(df: DataFrame) -> str:
     Returns:
         str: The JSON string representation of the DataFrame.
     """
-    lst: List[Dict[str, Any]] = []
-    for idx, row in df.iterrows():
-        lst.append({
-            "Дата операции": row["Дата операции"],
-            "Дата платежа": row["Дата платежа"],
-            "Номер карты": row["Номер карты"],
-            "Статус": row["Статус"],
-            "Сумма операции": row["Сумма операции"],
-            "Валюта операции": row["Валюта операции"],
-            "Сумма платежа": row["Сумма платежа"],
-            "Валюта платежа": row["Валюта платежа"],
-            "Кэшбэк": row["Кэшбэк"],
-            "Категория": row["Категория"],
-            "MCC": row["MCC"],
-            "Описание": row["Описание"],
-            "Бонусы (включая кэшбэк)": row["Бонусы (включая кэшбэк)"],
-            "Округление на инвесткопилку": row["Округление на инвесткопилку"],
-            "Сумма операции с округлением": row["Сумма операции с округлением"]
-        })
-
-    return json.dumps(lst, ensure_ascii=False, indent=4)
+    return serialize_operations(df)
+
+
+def _encode_column(values: np.ndarray) -> np.ndarray:
+    """
+    Encodes every value of a column as a JSON fragment.
+
+    Each distinct value is passed to `json.dumps` once and the fragments are spread back over the rows by code.
+    Floats are told apart by their bits, so 0.0 and -0.0 keep their own text. Object columns holding anything
+    but text are encoded value by value, as factorizing would merge equal values of other types, like 1, 1.0
+    and True.
+
+    Args:
+        values (np.ndarray): The column values.
+
+    Returns:
+        np.ndarray: An object array with the JSON fragment of every value.
+    """
+    if values.dtype.kind in "mM":
+        raise TypeError(f"Object of type {values.dtype} is not JSON serializable")
+    encoded: np.ndarray
+    if values.dtype.kind == "f":
+        codes, bits = pd.factorize(values.view(f"i{values.dtype.itemsize}"))
+        encoded = np.array([json.dumps(value) for value in bits.view(values.dtype).tolist()], dtype=object)[codes]
+        return encoded
+    if values.dtype == object and pd.api.types.infer_dtype(values, skipna=True) not in ("string", "empty"):
+        encoded = np.empty(len(values), dtype=object)
+        encoded[:] = [json.dumps(value, ensure_ascii=False) for value in values.tolist()]
+        return encoded
+    codes, uniques = pd.factorize(values, use_na_sentinel=True)
+    vocabulary = np.array([json.dumps(value, ensure_ascii=False) for value in uniques.tolist()] + ["NaN"],
+                          dtype=object)
+    encoded = vocabulary[codes]
+    if values.dtype == object:
+        encoded[codes == -1] = np.where(values[codes == -1] == None, "null", "NaN")  # noqa: E711
+    return encoded
+
+
+def encode_records(df: DataFrame, fields: Sequence[str], mode: str = "indent",
+                   common_dtype: Optional[np.dtype] = None) -> np.ndarray:
+    """
+    Encodes the rows of a DataFrame as JSON objects, column by column.
+
+    Args:
+        df (DataFrame): The DataFrame to encode.
+        fields (Sequence[str]): The columns to write, in order.
+        mode (str): "indent" for objects formatted as items of an `indent=4` list, "compact" or "ndjson" for
+            single-line objects.
+        common_dtype (Optional[np.dtype]): The dtype every column is cast to before encoding, if any.
+
+    Returns:
+        np.ndarray: An object array with the JSON text of every row.
+    """
+    if mode not in JSON_MODES:
+        raise ValueError(f"Unknown JSON mode '{mode}', expected one of {JSON_MODES}")
+
+    if mode == "indent":
+        opening, separator, closing = "    {\n        ", ",\n        ", "\n    }"
+    else:
+        opening, separator, closing = "{", ", ", "}"
+
+    if not len(fields):
+        return np.full(len(df), opening.rstrip() + closing.lstrip(), dtype=object)
+
+    columns = []
+    for field in fields:
+        key = json.dumps(field, ensure_ascii=False) + ": "
+        columns.append(key + _encode_column(df[field].to_numpy(dtype=common_dtype)))
+    records = np.empty(len(df), dtype=object)
+    records[:] = [opening + separator.join(parts) + closing for parts in zip(*columns)]
+    return records
+
+
+@profiled
+def serialize_operations(df: DataFrame, mode: str = "indent", fields: Sequence[str] = OPERATION_FIELDS) -> str:
+    """
+    Serializes operations to JSON straight from the column arrays.
+
+    The "indent" output is byte for byte the same as `json.dumps(records, ensure_ascii=False, indent=4)` over
+    records built with `df.iterrows()`, "compact" is the same list without indentation and "ndjson" writes
+    one object per line.
+
+    Args:
+        df (DataFrame): The DataFrame with the operations.
+        mode (str): The output mode: "indent", "compact" or "ndjson".
+        fields (Sequence[str]): The columns to write, in order.
+
+    Returns:
+        str: The JSON text.
+    """
+    df = restore_transactions(df)
+    common_dtype = df.iloc[:0].to_numpy().dtype
+    records = encode_records(df, fields, mode, None if common_dtype == object else common_dtype)
+
+    if mode == "ndjson":
+        return "".join(records + "\n")
+    if not len(records):
+        return "[]"
+    if mode == "indent":
+        return "[\n" + ",\n".join(records) + "\n]"
+    return "[" + ", ".join(records) + "]"
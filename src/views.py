@@ -1,15 +1,24 @@
 import json
 import logging
 import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from typing import Any, Dict, List
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterable, List, Optional, Tuple
 
-import requests
-import yfinance as yf
+import pandas as pd
 from dotenv import load_dotenv
 from pandas import DataFrame
 
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+from src.profiling import network_wait, profiled
+from src.providers import ApiLayerRatesProvider, RatesProvider, StockQuotesProvider, TickerHistoryProvider, cross_rates
+from src.quote_cache import TTLCache
+from src.schema import restore_transactions
+
+# requests and yfinance are imported on the first API call, so importing the views stays cheap.
+if TYPE_CHECKING:
+    import requests
+
 logger = logging.getLogger(__name__)
 
 load_dotenv()
@@ -19,6 +28,29 @@ current_dir = os.path.dirname(__file__)
 settings_file = os.path.join(current_dir, '..', 'user_settings.json')
 settings_file = os.path.abspath(settings_file)
 
+EXCHANGE_RATES_URL = "https://api.apilayer.com/exchangerates_data/latest"
+RATES_BASE = "USD"
+REQUEST_TIMEOUT = 10
+MAX_WORKERS = 8
+
+_session: Optional["requests.Session"] = None
+_session_lock = threading.Lock()
+
+# Replace the default providers when set, e.g. with a FixtureRatesProvider for offline runs or a
+# BulkDownloadProvider to fetch all stock prices in one request.
+rates_provider: Optional[RatesProvider] = None
+stock_provider: Optional[StockQuotesProvider] = None
+
+CURRENCY_RATES_TTL = 600
+STOCK_PRICES_TTL = 60
+QUOTES_MAX_STALE = 24 * 60 * 60
+QUOTES_CACHE_DIR = os.getenv("QUOTES_CACHE_DIR")
+
+currency_cache = TTLCache(CURRENCY_RATES_TTL, max_stale=QUOTES_MAX_STALE,
+                          persist_path=QUOTES_CACHE_DIR and os.path.join(QUOTES_CACHE_DIR, "currency_rates.json"))
+stock_cache = TTLCache(STOCK_PRICES_TTL, max_stale=QUOTES_MAX_STALE,
+                       persist_path=QUOTES_CACHE_DIR and os.path.join(QUOTES_CACHE_DIR, "stock_prices.json"))
+
 
 def get_time_of_day(hour: Any = None) -> str:
     """
@@ -41,10 +73,74 @@ def get_time_of_day(hour: Any = None) -> str:
         return "Доброй ночи!"
 
 
+CARD_COLUMNS = {'Номер карты': 'last_digits', 'Сумма операции': 'total_spent', 'Кэшбэк': 'cashback'}
+TOP_COLUMNS = {'Дата платежа': 'date', 'Сумма платежа': 'amount', 'Категория': 'category', 'Описание': 'description'}
+
+
+def card_totals(df: DataFrame) -> DataFrame:
+    """
+    Sums spending and cashback per card over the debit transactions, without modifying the DataFrame.
+
+    Transactions without a card are counted under 'Unknown'. The card column may be categorical, and the
+    amounts may be in kopecks as in a compact frame.
+
+    Args:
+        df (DataFrame): The transactions.
+
+    Returns:
+        DataFrame: The 'Сумма операции' and 'Кэшбэк' totals in rubles, indexed by card.
+    """
+    debit = df['Сумма операции'].lt(0).to_numpy(dtype=bool, na_value=False)
+    spent = restore_transactions(df.loc[debit, ['Номер карты', 'Сумма операции', 'Кэшбэк']],
+                                 ['Сумма операции', 'Кэшбэк'])
+    cards = spent['Номер карты']
+    if isinstance(cards.dtype, pd.CategoricalDtype) and 'Unknown' not in cards.cat.categories:
+        cards = cards.cat.add_categories('Unknown')
+    # Grouping by a column of the frame is much faster than by a separate Series key.
+    spent = spent.assign(**{'Номер карты': cards.fillna('Unknown')})
+    totals = spent.groupby('Номер карты', observed=True, sort=False).sum()
+    totals.index = totals.index.astype(object)
+    return totals
+
+
+def card_records(totals: DataFrame) -> List[Dict[str, str]]:
+    """
+    Builds the card data list from the per-card totals, ordered by card.
+
+    Args:
+        totals (DataFrame): The totals of `card_totals`, or totals built the same way from other sources.
+
+    Returns:
+        List[Dict[str, str]]: The card data in the format of `get_card_data`.
+    """
+    totals = totals.sort_index()
+    totals.index.name = 'Номер карты'
+    records: List[Dict[str, str]] = totals.reset_index().rename(columns=CARD_COLUMNS).to_dict(orient='records')
+    return records
+
+
+def top_records(top: DataFrame) -> List[Dict[str, str]]:
+    """
+    Builds the top transaction list from the top rows.
+
+    Args:
+        top (DataFrame): The largest transactions, in order; other columns than TOP_COLUMNS are ignored.
+
+    Returns:
+        List[Dict[str, str]]: The top transactions in the format of `top_transaction`.
+    """
+    top = restore_transactions(top[list(TOP_COLUMNS)], list(TOP_COLUMNS))
+    records: List[Dict[str, str]] = top.rename(columns=TOP_COLUMNS).to_dict(orient='records')
+    return records
+
+
+@profiled
 def get_card_data(df: DataFrame) -> List[Dict[str, str]]:
     """
     Extracts and processes card transaction data from a DataFrame.
 
+    The DataFrame is not modified, and the 'Номер карты' column may be categorical.
+
     Parameters:
         df (DataFrame): Input DataFrame containing transaction data.
 
@@ -52,22 +148,10 @@ def get_card_data(df: DataFrame) -> List[Dict[str, str]]:
         List[Dict[str, str]]: List of dictionaries with card data.
     """
     logger.info("Extracting card data...")
-    df['Номер карты'] = df['Номер карты'].fillna('Unknown')
-    df_total_spend = df[df['Сумма операции'] < 0].groupby('Номер карты').agg({
-        'Сумма операции': 'sum',
-        'Кэшбэк': 'sum'
-    }).reset_index()
-
-    return [
-        {
-            "last_digits": row["Номер карты"],
-            "total_spent": row["Сумма операции"],
-            "cashback": row["Кэшбэк"]
-        }
-        for idx, row in df_total_spend.iterrows()
-    ]
+    return card_records(card_totals(df))
 
 
+@profiled
 def top_transaction(df: DataFrame) -> List[Dict[str, str]]:
     """
     Extracts top transaction details from a DataFrame.
@@ -79,89 +163,237 @@ def top_transaction(df: DataFrame) -> List[Dict[str, str]]:
         List[Dict[str, str]]: List of dictionaries with top transaction details.
     """
     logger.info("Extracting top transactions...")
-    df_top = df.nlargest(5, 'Сумма операции')
+    return top_records(df.nlargest(5, 'Сумма операции'))
+
+
+def _top_rows(top: Optional[DataFrame], chunk: DataFrame, n: int = 5) -> DataFrame:
+    """
+    Merges the running top transactions with the top transactions of the next chunk.
+    """
+    candidates = chunk.nlargest(n, 'Сумма операции')
+    if top is not None:
+        candidates = pd.concat([top, candidates])
+    return candidates.nlargest(n, 'Сумма операции')
+
+
+def _collect_chunks(chunks: Iterable[DataFrame]) -> Tuple[List[Dict[str, str]], List[Dict[str, str]]]:
+    """
+    Makes a single pass over the chunks, collecting card totals and top transactions.
+    """
+    totals = []
+    top = None
+    for chunk in chunks:
+        totals.append(card_totals(chunk))
+        top = _top_rows(top, chunk)
+
+    if totals:
+        summed = pd.concat(totals).groupby(level=0).sum()
+    else:
+        summed = DataFrame(columns=['Сумма операции', 'Кэшбэк'])
+
+    return card_records(summed), [] if top is None else top_records(top)
+
+
+@profiled
+def get_card_data_chunked(chunks: Iterable[DataFrame]) -> List[Dict[str, str]]:
+    """
+    Extracts card data from an iterator of transaction chunks.
+
+    Parameters:
+        chunks (Iterable[DataFrame]): Chunks of transaction data, e.g. from `iter_xls_chunks`.
+
+    Returns:
+        List[Dict[str, str]]: List of dictionaries with card data.
+    """
+    logger.info("Extracting card data from chunks...")
+    return _collect_chunks(chunks)[0]
+
+
+@profiled
+def top_transaction_chunked(chunks: Iterable[DataFrame]) -> List[Dict[str, str]]:
+    """
+    Extracts top transaction details from an iterator of transaction chunks.
 
-    return [
-        {
-            "date": row["Дата платежа"],
-            "amount": row["Сумма платежа"],
-            "category": row["Категория"],
-            "description": row["Описание"]
-        }
-        for idx, row in df_top.iterrows()
-    ]
+    Parameters:
+        chunks (Iterable[DataFrame]): Chunks of transaction data, e.g. from `iter_xls_chunks`.
+
+    Returns:
+        List[Dict[str, str]]: List of dictionaries with top transaction details.
+    """
+    logger.info("Extracting top transactions from chunks...")
+    return _collect_chunks(chunks)[1]
+
+
+def get_session() -> "requests.Session":
+    """
+    Returns the HTTP session shared by all API requests, creating it on first use.
+
+    The session keeps a pool of connections large enough for the concurrent requests.
+    """
+    import requests
+    from requests.adapters import HTTPAdapter
+
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=MAX_WORKERS, pool_maxsize=MAX_WORKERS)
+            _session.mount("https://", adapter)
+            _session.mount("http://", adapter)
+    return _session
+
+
+def _load_settings() -> Dict[str, Any]:
+    with open(settings_file, 'r', encoding='utf-8') as file:
+        settings: Dict[str, Any] = json.load(file)
+    return settings
 
 
-def get_currency() -> List[Dict[str, str]]:
+def get_rates_provider() -> RatesProvider:
+    """
+    Returns the exchange rates provider: `rates_provider` if set, otherwise the APILayer API.
+    """
+    return rates_provider or ApiLayerRatesProvider(EXCHANGE_RATES_URL, API_KEY, get_session(), REQUEST_TIMEOUT)
+
+
+def _request_currency_rates(currencies: List[str]) -> Optional[Dict[str, float]]:
+    """
+    Requests the rates of all currencies against RATES_BASE in one call. Returns None if the request fails.
+    """
+    import requests
+
+    try:
+        with network_wait():
+            return get_rates_provider().get_rates(RATES_BASE, set(currencies) | {"RUB"})
+    except (requests.RequestException, KeyError, ValueError) as e:
+        logger.error(f"Failed to retrieve currency data for {', '.join(currencies)}: {e}")
+        return None
+
+
+def get_stock_provider() -> StockQuotesProvider:
+    """
+    Returns the stock price provider: `stock_provider` if set, otherwise one yfinance request per ticker.
+    """
+    return stock_provider or TickerHistoryProvider(max_workers=MAX_WORKERS, timeout=REQUEST_TIMEOUT)
+
+
+def get_cache_stats() -> Dict[str, Dict[str, int]]:
+    """
+    Returns the hit and miss counters of the currency rate and stock price caches.
+
+    Returns:
+        Dict[str, Dict[str, int]]: The counters of each cache.
+    """
+    return {"currency_rates": currency_cache.stats(), "stock_prices": stock_cache.stats()}
+
+
+@profiled
+def get_currency() -> List[Dict[str, Any]]:
     """
     Retrieves currency exchange rates based on user settings.
 
+    The rates of all currencies are requested against one base currency in a single call, served from
+    `currency_cache` while fresh, and the RUB price of every currency is derived from them.
+
     Returns:
-        List[Dict[str, str]]: List of dictionaries with currency rates.
+        List[Dict[str, Any]]: List of dictionaries with the currency code and its rate.
     """
     logger.info("Retrieving currency rates...")
-    lst = []
-    with open(settings_file, 'r', encoding='utf-8') as file:
-        data = json.load(file)
-    for currency in data["user_currencies"]:
-        url = f"https://api.apilayer.com/exchangerates_data/latest?base={currency}"
-        try:
-            response = requests.get(url, headers={'apikey': API_KEY})
-            response.raise_for_status()
-            response_data = response.json()
-            rate = response_data["rates"]["RUB"]
-            lst.append({
-                "currency": currency,
-                "rate": rate
-            })
-        except requests.RequestException as e:
-            logger.error(f"Failed to retrieve currency data for {currency}: {e}")
-            continue
-
-    return lst
+    currencies = _load_settings()["user_currencies"]
+    key = f"{RATES_BASE}:{','.join(sorted(set(currencies)))}"
+    rates = currency_cache.get(key, lambda: _request_currency_rates(currencies))
+    if rates is None:
+        return []
 
+    prices = cross_rates(rates, RATES_BASE, currencies)
+    for currency in currencies:
+        if currency not in prices:
+            logger.error(f"No rate for {currency} in the response")
+    return [{"currency": currency, "rate": prices[currency]} for currency in currencies if currency in prices]
 
+
+@profiled
 def get_stock_currency() -> List[Dict[str, float]]:
     """
     Retrieves stock prices based on user settings.
 
+    The prices of all stocks are requested from the stock provider in one call and served from `stock_cache`
+    while fresh. Prices are cached only when every stock has one, so a stock that failed to load is requested
+    again on the next call instead of staying missing for the whole TTL.
+
     Returns:
         List[Dict[str, float]]: List of dictionaries with stock prices.
     """
     logger.info("Retrieving stock prices...")
-    lst = []
-    with open(settings_file, 'r', encoding='utf-8') as file:
-        data = json.load(file)
-    for stock in data["user_stocks"]:
-        ticker = yf.Ticker(stock)
-        try:
-            data_tod = ticker.history(period="1d")
-            price = float(data_tod["High"].iloc[0]) if not data_tod.empty else 0.0
-            lst.append({
-                "stock": stock,
-                "price": price
-            })
-        except Exception as e:
-            logger.error(f"Failed to retrieve stock price data for {stock}: {e}")
-            continue
+    stocks = _load_settings()["user_stocks"]
+    partial: Dict[str, float] = {}
+
+    def request_prices() -> Optional[Dict[str, float]]:
+        with network_wait():
+            prices = get_stock_provider().get_prices(stocks)
+        missing = [stock for stock in stocks if stock not in prices]
+        if missing or not prices:
+            logger.error(f"No prices for {missing}, the prices are not cached")
+            partial.update(prices)
+            return None
+        return prices
 
-    return lst
+    prices = stock_cache.get(",".join(stocks), request_prices)
+    if prices is None:
+        prices = partial
+    return [{"stock": stock, "price": prices[stock]} for stock in stocks if stock in prices]
 
 
-def get_data(df: DataFrame) -> Dict[str, object]:
+def build_dashboard(collect: Callable[[], Tuple[List[Dict[str, str]], List[Dict[str, str]]]]) -> str:
+    """
+    Builds the dashboard JSON around a function computing the card data and top transactions.
+
+    Currency rates and stock prices are requested in the background while `collect` runs.
+
+    Args:
+        collect (Callable[[], Tuple[List[Dict[str, str]], List[Dict[str, str]]]]): Returns the card data and
+            the top transactions.
+
+    Returns:
+        str: The dashboard as a JSON string.
+    """
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        currency_rates = executor.submit(get_currency)
+        stock_prices = executor.submit(get_stock_currency)
+        cards, top_transactions = collect()
+        return json.dumps({
+            "greeting": get_time_of_day(),
+            "cards": cards,
+            "top_transactions": top_transactions,
+            "currency_rates": currency_rates.result(),
+            "stock_prices": stock_prices.result()
+        }, ensure_ascii=False, indent=4)
+
+
+@profiled
+def get_data(df: DataFrame) -> str:
     """
     Retrieves all necessary data for the dashboard.
 
+    Currency rates and stock prices are requested in the background while the greeting, card data and
+    top transactions are computed.
+
     Returns:
-        Dict[str, object]: Dictionary with various data components.
+        str: The dashboard data as a JSON string.
     """
     logger.info("Getting data for the dashboard...")
-    result = json.dumps({
-        "greeting": get_time_of_day(),
-        "cards": get_card_data(df),
-        "top_transactions": top_transaction(df),
-        "currency_rates": get_currency(),
-        "stock_prices": get_stock_currency()
-    }, ensure_ascii=False, indent=4)
-
-    return result
+    return build_dashboard(lambda: (get_card_data(df), top_transaction(df)))
+
+
+@profiled
+def get_data_chunked(chunks: Iterable[DataFrame]) -> str:
+    """
+    Retrieves all necessary data for the dashboard from an iterator of transaction chunks.
+
+    The chunks are consumed in a single pass, so only one chunk is kept in memory at a time.
+
+    Returns:
+        str: The dashboard data as a JSON string.
+    """
+    logger.info("Getting data for the dashboard from chunks...")
+    return build_dashboard(lambda: _collect_chunks(chunks))
@@ -0,0 +1,18 @@
+from typing import Any, Iterator
+
+import pytest
+
+from src import reports
+
+
+@pytest.fixture(autouse=True)
+def reports_dir(tmp_path: Any, monkeypatch: pytest.MonkeyPatch) -> Iterator[Any]:
+    """
+    Fixture that writes the reports with generated names to a temporary directory instead of `src/reports`.
+
+    Reports still queued on the background writer are written before the directory goes away.
+    """
+    directory = tmp_path / "reports"
+    monkeypatch.setattr(reports, "REPORTS_DIR", str(directory))
+    yield directory
+    reports.report_writer.flush()
@@ -0,0 +1,105 @@
+import io
+import json
+from typing import Any
+from unittest.mock import patch
+
+import pytest
+
+from src.batch import COMMANDS, main, run_batch
+from src.dataset import Dataset
+
+
+@pytest.fixture
+def dataset(tmp_path: Any) -> Dataset:
+    """
+    Fixture that loads the sample operations into a dataset with a temporary cache.
+    """
+    return Dataset.load("data/operations.xlsx", cache_dir=str(tmp_path))
+
+
+def test_run_batch(dataset: Dataset):
+    """
+    Test that every command gets one NDJSON line with its result or error.
+    """
+    commands = [
+        '{"command": "search", "query": "такси"}',
+        '{"command": "category", "category": "Фастфуд", "date": "30.07.2024", "id": "fastfood"}',
+        '',
+        '{"command": "unknown"}',
+        'not json',
+    ]
+    output = io.StringIO()
+    stats = run_batch(dataset, commands, output)
+
+    lines = [json.loads(line) for line in output.getvalue().splitlines()]
+    assert [line["id"] for line in lines] == [1, "fastfood", 4, 5]
+    assert len(lines[0]["result"]) == len(dataset.search("такси"))
+    assert all(row["Категория"] == "Фастфуд" for row in lines[1]["result"])
+    assert "error" in lines[2] and "error" in lines[3]
+    assert stats["commands"] == 4
+    assert stats["errors"] == 2
+    assert stats["qps"] > 0
+
+
+def test_run_batch_continues_after_bad_arguments(dataset: Dataset, monkeypatch: Any):
+    """
+    Test that arguments of the wrong type and unexpected errors are reported and the batch goes on.
+    """
+    def fail(dataset: Dataset, command: Any) -> str:
+        raise RuntimeError("broken")
+
+    monkeypatch.setitem(COMMANDS, "broken", fail)
+    commands = [
+        '{"command": "category", "category": "Фастфуд", "date": 5}',
+        '{"command": ["x"]}',
+        '{"command": "broken"}',
+        '{"command": "search", "query": "такси", "fuzzy": true}',
+    ]
+    output = io.StringIO()
+    stats = run_batch(dataset, commands, output)
+
+    lines = [json.loads(line) for line in output.getvalue().splitlines()]
+    assert [line["id"] for line in lines] == [1, 2, 3, 4]
+    assert lines[0]["error"] == "ValueError: 'date' must be a string, not int"
+    assert lines[1]["error"] == "ValueError: 'command' must be a string, not list"
+    assert lines[2]["error"] == "RuntimeError: broken"
+    assert "result" in lines[3]
+    assert stats["errors"] == 3
+
+
+def test_run_batch_fuzzy(dataset: Dataset):
+    """
+    Test that the search command runs the fuzzy search when asked, with a JSON or text flag.
+    """
+    output = io.StringIO()
+    run_batch(dataset, ['{"command": "search", "query": "Магнт", "fuzzy": true}',
+                        '{"command": "search", "query": "Магнт", "fuzzy": "1"}',
+                        '{"command": "search", "query": "Магнт"}'], output)
+    results = [json.loads(line)["result"] for line in output.getvalue().splitlines()]
+    assert {row["Описание"] for row in results[0]} == {"Магнит"}
+    assert results[1] == results[0]
+    assert results[2] == []
+
+
+def test_run_batch_dashboard(dataset: Dataset):
+    """
+    Test that the dashboard command returns the dashboard data.
+    """
+    with patch("src.views.get_currency", return_value=[]), patch("src.views.get_stock_currency", return_value=[]):
+        output = io.StringIO()
+        run_batch(dataset, ['{"command": "dashboard"}'], output)
+    result = json.loads(output.getvalue())["result"]
+    assert {"greeting", "cards", "top_transactions"} <= set(result)
+
+
+def test_main(tmp_path: Any, capsys: Any):
+    """
+    Test that the command line reads commands from a file and reports the throughput.
+    """
+    commands = tmp_path / "commands.ndjson"
+    commands.write_text('{"command": "search", "query": "Магнит"}\n', encoding="utf-8")
+    output = tmp_path / "results.ndjson"
+    main(["data/operations.xlsx", str(commands), "-o", str(output)])
+
+    assert json.loads(output.read_text(encoding="utf-8"))["command"] == "search"
+    assert "queries/s" in capsys.readouterr().err
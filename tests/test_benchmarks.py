@@ -0,0 +1,145 @@
+import json
+import os
+import subprocess
+import sys
+from typing import Any
+from unittest.mock import patch
+
+import pandas as pd
+import pytest
+
+from benchmarks.generator import generate_operations, write_operations, write_operations_store
+from benchmarks.ingest import run_ingest_benchmark
+from benchmarks.run import compare_results, run_benchmarks, save_results, time_call
+from benchmarks.startup import parse_importtime, run_startup_benchmark
+from src.data_cache import read_columns, read_xls_file_cached
+from src.utils import read_xls_file
+
+
+def test_generate_operations_schema():
+    """
+    Test that generated operations have the columns and types of the sample export.
+    """
+    sample = read_xls_file("data/operations.xlsx")
+    generated = generate_operations(1000)
+    assert list(generated.columns) == list(sample.columns)
+    assert generated.dtypes.equals(sample.dtypes)
+    assert (generated['Сумма операции'] < 0).mean() > 0.5
+
+
+def test_generate_operations_deterministic():
+    """
+    Test that the same seed gives the same operations and another seed different ones.
+    """
+    pd.testing.assert_frame_equal(generate_operations(500, seed=1), generate_operations(500, seed=1))
+    assert not generate_operations(500, seed=1).equals(generate_operations(500, seed=2))
+
+
+def test_write_operations(tmp_path: Any):
+    """
+    Test that written operations read back the same from the xlsx workbook and the column cache.
+    """
+    df = generate_operations(200)
+    path = write_operations(df, str(tmp_path))
+    pd.testing.assert_frame_equal(read_xls_file(path), df)
+    pd.testing.assert_frame_equal(read_xls_file_cached(path), df)
+
+
+def test_write_operations_too_large(tmp_path: Any):
+    """
+    Test that operations that do not fit in an xlsx sheet are not written.
+    """
+    with patch("benchmarks.generator.XLSX_MAX_ROWS", 10), pytest.raises(ValueError):
+        write_operations(generate_operations(20), str(tmp_path))
+    assert not os.listdir(tmp_path)
+
+
+def test_write_operations_store(tmp_path: Any):
+    """
+    Test that operations written to a column store alone read back the same.
+    """
+    df = generate_operations(200)
+    store = write_operations_store(df, str(tmp_path))
+    pd.testing.assert_frame_equal(read_columns(store), df)
+    assert read_columns(store, version=-1) is None
+
+
+def test_run_benchmarks_beyond_xlsx(tmp_path: Any):
+    """
+    Test that sizes that do not fit in an xlsx sheet are written to a column store and its loading is timed.
+    """
+    with patch("benchmarks.run.XLSX_MAX_ROWS", 50):
+        results = run_benchmarks(rows=[100], repeat=1, directory=str(tmp_path))
+    names = {result["benchmark"] for result in results["results"]}
+    assert "read_columns" in names
+    assert not names & {"read_xls_file", "read_xls_file_cached"}
+    assert os.listdir(tmp_path) == ["operations_100"]
+
+
+def test_time_call_runs_setup_before_every_run():
+    """
+    Test that the setup of a timed function runs before every run, so runs do not reuse cached results.
+    """
+    calls = []
+    time_call(lambda: calls.append("run"), 3, setup=lambda: calls.append("setup"))
+    assert calls == ["setup", "run"] * 3
+
+
+def test_run_and_compare_benchmarks(tmp_path: Any):
+    """
+    Test that a benchmark run times every function and can be saved and compared.
+    """
+    results = run_benchmarks(rows=[100], repeat=1, directory=str(tmp_path))
+    names = {result["benchmark"] for result in results["results"]}
+    assert names == {"read_xls_file", "read_xls_file_cached", "convert_data_frame_to_json", "search_by_request",
+                     "search_json_round_trip", "search_operations", "fuzzy_match", "spending_by_category",
+                     "category_spending_rows", "get_data"}
+
+    output_file = save_results(results, str(tmp_path / "results.json"))
+    with open(output_file, encoding="utf-8") as f:
+        assert json.load(f)["results"] == results["results"]
+
+    comparison = compare_results(output_file, output_file)
+    assert (comparison["ratio"] == 1.0).all()
+
+
+def test_parse_importtime():
+    """
+    Test that the import time log is parsed into modules with their times and nesting levels.
+    """
+    output = ("import time: self [us] | cumulative | imported package\n"
+              "import time:       120 |        120 |   json.decoder\n"
+              "import time:       300 |        420 | json\n")
+    assert parse_importtime(output) == [
+        {"module": "json.decoder", "self_us": 120, "cumulative_us": 120, "level": 1},
+        {"module": "json", "self_us": 300, "cumulative_us": 420, "level": 0},
+    ]
+
+
+def test_run_startup_benchmark():
+    """
+    Test that the startup benchmark reports the import time and dependencies of a module.
+    """
+    result = run_startup_benchmark(["src.views"], repeat=1)["results"][0]
+    assert result["min_seconds"] > 0
+    assert "pandas" in [entry["module"] for entry in result["slowest_dependencies"]]
+
+
+def test_lazy_imports():
+    """
+    Test that the search does not import pandas and the views do not import the network libraries.
+    """
+    code = ("import sys, src.services; print('pandas' in sys.modules); "
+            "import src.views; print('requests' in sys.modules, 'yfinance' in sys.modules)")
+    output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout
+    assert output.split() == ["False", "False", "False"]
+
+
+def test_run_ingest_benchmark(tmp_path: Any):
+    """
+    Test that the ingestion benchmark reports the speedup of every number of workers over the first one.
+    """
+    results = run_ingest_benchmark(n_files=2, rows=50, overlap=10, workers=[1, 2], directory=str(tmp_path))
+    assert [result["workers"] for result in results["results"]] == [1, 2]
+    assert results["results"][0]["speedup"] == 1.0
+    assert all(result["efficiency"] > 0 for result in results["results"])
@@ -0,0 +1,101 @@
+import json
+import shutil
+from typing import Any
+from unittest.mock import patch
+
+import pandas as pd
+import pytest
+from pandas import DataFrame
+
+from benchmarks.generator import generate_operations
+from src.cube import COUNT, SummaryCube, get_data_from_cube, load_cube
+from src.date_index import DateIndex
+from src.reports import category_spending
+from src.schema import compact_transactions
+from src.views import get_card_data, get_data
+
+
+@pytest.fixture
+def operations() -> DataFrame:
+    """
+    Fixture that provides generated operations.
+    """
+    return generate_operations(2000, seed=5)
+
+
+@pytest.mark.parametrize("compact", [False, True])
+def test_card_data(operations: DataFrame, compact: bool):
+    """
+    Test that the card data of the cube matches get_card_data over the operations.
+    """
+    df = compact_transactions(operations) if compact else operations
+    cube = SummaryCube.build(df)
+    expected = get_card_data(operations)
+    result = cube.card_data()
+    assert [card["last_digits"] for card in result] == [card["last_digits"] for card in expected]
+    for card, expected_card in zip(result, expected):
+        assert card["total_spent"] == pytest.approx(expected_card["total_spent"])
+        assert card["cashback"] == pytest.approx(expected_card["cashback"])
+
+
+@pytest.mark.parametrize("compact", [False, True])
+@pytest.mark.parametrize("date", ["15.06.2024", "01.04.2024", "31.12.2024"])
+def test_category_totals(operations: DataFrame, compact: bool, date: str):
+    """
+    Test that the category totals are those of the operations of the `category_spending` window.
+    """
+    df = compact_transactions(operations) if compact else operations
+    cube = SummaryCube.build(df)
+    date_index = DateIndex(df)
+    selected = category_spending(operations, "Фастфуд", date)
+
+    totals = cube.category_totals("Фастфуд", date_index, date)
+    assert totals[COUNT] == len(selected) > 0
+    assert totals["Сумма операции"] == pytest.approx(selected["Сумма операции"].sum(), abs=1e-6)
+    assert totals["Кэшбэк"] == pytest.approx(selected["Кэшбэк"].sum(), abs=1e-6)
+    assert totals["Бонусы (включая кэшбэк)"] == pytest.approx(selected["Бонусы (включая кэшбэк)"].sum())
+    assert cube.category_totals("Нет такой категории", date_index, date)[COUNT] == 0
+
+
+def test_totals_by_dimension(operations: DataFrame):
+    """
+    Test that the totals grouped by a dimension, operations without a card included, add up to the grand totals.
+    """
+    cube = SummaryCube.build(operations)
+    by_card = cube.totals(by=["Номер карты"])
+    grand = cube.totals().iloc[0]
+    assert by_card[COUNT].sum() == grand[COUNT] == len(operations)
+    assert by_card["Сумма операции"].sum() == pytest.approx(operations["Сумма операции"].sum())
+    assert cube.totals(by=["Номер карты"], filters={"Номер карты": ["*8484"]}).index.tolist() == ["*8484"]
+
+
+def test_load_cube(tmp_path: Any):
+    """
+    Test that the cube is stored in the column cache and rebuilt when the workbook changes.
+    """
+    path = str(tmp_path / "operations.xlsx")
+    shutil.copy("data/operations.xlsx", path)
+    df = compact_transactions(pd.read_excel(path))
+    cube = load_cube(path, df, str(tmp_path))
+
+    loaded = SummaryCube.read(path, str(tmp_path))
+    assert loaded is not None
+    pd.testing.assert_frame_equal(loaded.cells, cube.cells)
+    with patch.object(SummaryCube, "build") as build:
+        load_cube(path, df, str(tmp_path))
+    build.assert_not_called()
+
+    with open(path, "ab") as f:
+        f.write(b"\0")
+    assert SummaryCube.read(path, str(tmp_path)) is None
+
+
+def test_get_data_from_cube(operations: DataFrame):
+    """
+    Test that the dashboard built from the cube matches get_data.
+    """
+    with patch("src.views.get_currency", return_value=[]), patch("src.views.get_stock_currency", return_value=[]):
+        result = json.loads(get_data_from_cube(operations, SummaryCube.build(operations)))
+        expected = json.loads(get_data(operations))
+    assert result["top_transactions"] == expected["top_transactions"]
+    assert [card["last_digits"] for card in result["cards"]] == [card["last_digits"] for card in expected["cards"]]
@@ -0,0 +1,135 @@
+import json
+import os
+from typing import Any
+from unittest.mock import patch
+
+import pytest
+from pandas import DataFrame
+
+from benchmarks.generator import generate_operations
+from src.dashboard_state import (
+    SAMPLE_ROWS,
+    TAIL_ROWS,
+    DashboardState,
+    _sample_positions,
+    get_data_incremental,
+    update_dashboard_state,
+)
+from src.utils import read_xls_file
+from src.views import get_card_data, top_transaction
+
+
+@pytest.fixture
+def sample_dataframe() -> DataFrame:
+    """
+    Fixture that provides a sample DataFrame loaded from an Excel file.
+    """
+    return read_xls_file("data/operations.xlsx")
+
+
+def assert_cards_equal(actual: Any, expected: Any) -> None:
+    assert [card["last_digits"] for card in actual] == [card["last_digits"] for card in expected]
+    for actual_card, expected_card in zip(actual, expected):
+        assert actual_card["total_spent"] == pytest.approx(expected_card["total_spent"])
+        assert actual_card["cashback"] == pytest.approx(expected_card["cashback"])
+
+
+def test_update_incremental(sample_dataframe: DataFrame, tmp_path: Any):
+    """
+    Test that aggregating appended rows gives the same result as aggregating the full history.
+    """
+    path = str(tmp_path / "state.json")
+    update_dashboard_state(sample_dataframe.iloc[:30], path)
+
+    state = DashboardState.load(path)
+    assert state.row_count == 30
+    assert state.update(sample_dataframe) is True
+    assert state.row_count == len(sample_dataframe)
+    assert_cards_equal(state.card_data(), get_card_data(sample_dataframe))
+    assert state.top_transactions() == top_transaction(sample_dataframe)
+
+
+def test_update_recomputes_changed_rows(sample_dataframe: DataFrame, tmp_path: Any):
+    """
+    Test that the state is rebuilt when a processed row has changed.
+    """
+    path = str(tmp_path / "state.json")
+    update_dashboard_state(sample_dataframe.iloc[:30], path)
+
+    changed = sample_dataframe.copy()
+    changed.iloc[29, changed.columns.get_loc('Сумма операции')] = 100000.0
+    state = DashboardState.load(path)
+    assert state.update(changed) is False
+    assert_cards_equal(state.card_data(), get_card_data(changed))
+    assert state.top_transactions() == top_transaction(changed)
+
+
+def test_update_recomputes_changed_middle_row(sample_dataframe: DataFrame, tmp_path: Any):
+    """
+    Test that a change of any processed row is detected, not only near the ends of the processed rows.
+    """
+    path = str(tmp_path / "state.json")
+    update_dashboard_state(sample_dataframe.iloc[:60], path)
+
+    changed = sample_dataframe.copy()
+    changed.iloc[30, changed.columns.get_loc('Описание')] = 'Другой магазин'
+    state = DashboardState.load(path)
+    assert state.update(changed) is False
+    assert state.update(changed) is True
+
+
+def test_update_checks_a_bounded_sample(tmp_path: Any):
+    """
+    Test that only a bounded sample of a long history is hashed, and that a change of a sampled row is detected.
+    """
+    operations = generate_operations(5000)
+    positions = _sample_positions(len(operations))
+    assert len(positions) <= SAMPLE_ROWS + TAIL_ROWS < len(operations)
+    assert positions[0] == 0 and positions[-1] == len(operations) - 1
+
+    path = str(tmp_path / "state.json")
+    update_dashboard_state(operations.iloc[:4000], path)
+    state = DashboardState.load(path)
+    assert state.update(operations) is True
+    assert state.top_transactions() == top_transaction(operations)
+
+    changed = operations.copy()
+    changed.iloc[positions[len(positions) // 2], changed.columns.get_loc('Сумма операции')] = 100000.0
+    assert state.update(changed) is False
+    assert state.top_transactions() == top_transaction(changed)
+
+
+def test_update_recomputes_shorter_history(sample_dataframe: DataFrame, tmp_path: Any):
+    """
+    Test that the state is rebuilt when the history has fewer rows than were processed.
+    """
+    path = str(tmp_path / "state.json")
+    update_dashboard_state(sample_dataframe, path)
+
+    state = DashboardState.load(path)
+    assert state.update(sample_dataframe.iloc[:10]) is False
+    assert state.top_transactions() == top_transaction(sample_dataframe.iloc[:10])
+
+
+def test_load_missing_or_corrupt(tmp_path: Any):
+    """
+    Test that a missing or unreadable state file gives an empty state.
+    """
+    assert DashboardState.load(str(tmp_path / "missing.json")).row_count == 0
+
+    corrupt = tmp_path / "corrupt.json"
+    corrupt.write_text("{", encoding="utf-8")
+    assert DashboardState.load(str(corrupt)).row_count == 0
+
+
+def test_get_data_incremental(sample_dataframe: DataFrame, tmp_path: Any):
+    """
+    Test that the incremental dashboard saves its state and reports the same cards and top transactions.
+    """
+    path = str(tmp_path / "state.json")
+    with patch("src.views.get_currency", return_value=[]), patch("src.views.get_stock_currency", return_value=[]):
+        result = json.loads(get_data_incremental(sample_dataframe, path))
+
+    assert os.path.exists(path)
+    assert_cards_equal(result["cards"], get_card_data(sample_dataframe))
+    assert result["top_transactions"] == top_transaction(sample_dataframe)
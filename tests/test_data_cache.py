@@ -0,0 +1,87 @@
+import os
+import shutil
+import tempfile
+from typing import Generator
+from unittest.mock import patch
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.data_cache import get_cache_dir, read_store, read_xls_file_cached, write_store
+from src.utils import read_xls_file
+
+
+@pytest.fixture
+def workbook() -> Generator[str, None, None]:
+    """
+    Fixture that copies the sample workbook into a temporary directory.
+
+    Yields:
+        str: The path to the copied workbook.
+    """
+    directory = tempfile.mkdtemp()
+    path = os.path.join(directory, "operations.xlsx")
+    shutil.copy("data/operations.xlsx", path)
+    yield path
+    shutil.rmtree(directory)
+
+
+def test_cached_frame_matches_parsed_frame(workbook: str) -> None:
+    """
+    Test that the frame loaded from the cache is identical to the parsed one.
+    """
+    expected = read_xls_file(workbook)
+    first = read_xls_file_cached(workbook)
+    second = read_xls_file_cached(workbook)
+
+    assert os.path.exists(os.path.join(get_cache_dir(workbook), "meta.json"))
+    pd.testing.assert_frame_equal(first, expected)
+    pd.testing.assert_frame_equal(second, expected)
+
+
+def test_cache_skips_parsing(workbook: str) -> None:
+    """
+    Test that a valid cache is used instead of parsing the workbook again.
+    """
+    read_xls_file_cached(workbook)
+    with patch("src.data_cache.read_xls_file") as mock_read:
+        read_xls_file_cached(workbook)
+    mock_read.assert_not_called()
+
+
+def test_touched_file_is_not_parsed_again(workbook: str) -> None:
+    """
+    Test that changing only the modification time does not invalidate the cache.
+    """
+    read_xls_file_cached(workbook)
+    stat = os.stat(workbook)
+    os.utime(workbook, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    with patch("src.data_cache.read_xls_file") as mock_read:
+        read_xls_file_cached(workbook)
+    mock_read.assert_not_called()
+
+
+def test_changed_file_is_parsed_again(workbook: str) -> None:
+    """
+    Test that a modified workbook is parsed again and the cache is refreshed.
+    """
+    read_xls_file_cached(workbook)
+    df = read_xls_file(workbook).head(10)
+    df.to_excel(workbook, index=False, engine="openpyxl")
+
+    result = read_xls_file_cached(workbook)
+    assert len(result) == 10
+    pd.testing.assert_frame_equal(read_xls_file_cached(workbook), result)
+
+
+def test_store_round_trip_and_version(workbook: str) -> None:
+    """
+    Test that a column store derived from a workbook is read back only with its own version.
+    """
+    df = pd.DataFrame({"category": ["Супермаркеты", np.nan], "total": [1.5, 2.0]})
+    store = os.path.join(get_cache_dir(workbook), "derived")
+    assert write_store(df, store, workbook, version=7)
+
+    pd.testing.assert_frame_equal(read_store(store, workbook, version=7), df)
+    assert read_store(store, workbook, version=8) is None
@@ -0,0 +1,92 @@
+import json
+import os
+from typing import Any
+from unittest.mock import patch
+
+import pytest
+from pandas import DataFrame
+
+from src.dataset import Dataset
+from src.reports import spending_by_category
+from src.services import search_by_request
+from src.utils import convert_data_frame_to_json, read_xls_file
+
+
+@pytest.fixture
+def sample_dataframe() -> DataFrame:
+    """
+    Fixture that provides a sample DataFrame loaded from an Excel file.
+    """
+    return read_xls_file("data/operations.xlsx")
+
+
+@pytest.fixture
+def dataset(tmp_path: Any) -> Dataset:
+    """
+    Fixture that loads the sample operations into a dataset with a temporary cache.
+    """
+    return Dataset.load("data/operations.xlsx", cache_dir=str(tmp_path))
+
+
+def test_search(dataset: Dataset, sample_dataframe: DataFrame):
+    """
+    Test that searching the dataset finds the same operations as search_by_request.
+    """
+    expected = json.loads(search_by_request("Такси", convert_data_frame_to_json(sample_dataframe)))
+    assert json.loads(convert_data_frame_to_json(dataset.search("Такси"))) == expected
+
+
+def test_search_fuzzy(dataset: Dataset):
+    """
+    Test that the fuzzy search of the dataset tolerates typos.
+    """
+    assert set(dataset.search("Магнт", fuzzy=True)["Описание"]) == {"Магнит"}
+
+
+def test_category_report(dataset: Dataset, sample_dataframe: DataFrame):
+    """
+    Test that the category report of the dataset matches spending_by_category.
+    """
+    expected = spending_by_category.__wrapped__(sample_dataframe, 'Фастфуд', '30.07.2024')
+    assert dataset.category_report('Фастфуд', '30.07.2024').equals(expected)
+
+
+def test_category_totals(dataset: Dataset):
+    """
+    Test that the category totals of the dataset sum its category report.
+    """
+    report = dataset.category_report('Супермаркеты', '30.07.2024')
+    totals = dataset.category_totals('Супермаркеты', '30.07.2024')
+    assert totals['Количество'] == len(report) > 0
+    assert totals['Сумма операции'] == pytest.approx(report['Сумма операции'].sum())
+
+
+def test_is_stale(tmp_path: Any, sample_dataframe: DataFrame):
+    """
+    Test that a dataset notices when its file changes.
+    """
+    path = tmp_path / "operations.xlsx"
+    sample_dataframe.to_excel(path, index=False)
+    dataset = Dataset.load(str(path), cache_dir=str(tmp_path))
+    assert not dataset.is_stale()
+
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    assert dataset.is_stale()
+
+
+def test_load_sees_file_rewritten_during_load(tmp_path: Any, sample_dataframe: DataFrame):
+    """
+    Test that a file rewritten while the dataset is read makes the loaded dataset stale.
+    """
+    path = tmp_path / "operations.xlsx"
+    sample_dataframe.to_excel(path, index=False)
+
+    def read_and_rewrite(*args: Any) -> DataFrame:
+        stat = os.stat(path)
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+        return sample_dataframe
+
+    with patch("src.dataset.read_xls_file_cached", side_effect=read_and_rewrite):
+        dataset = Dataset.load(str(path), cache_dir=str(tmp_path))
+    assert dataset.is_stale()
@@ -0,0 +1,72 @@
+import pandas as pd
+import pytest
+
+from src.date_index import DateIndex
+from src.reports import _filter_transactions, get_date_range, spending_by_category_matrix
+from src.utils import read_xls_file
+
+
+@pytest.fixture(scope="module")
+def operations() -> pd.DataFrame:
+    """
+    Fixture with the sample operations.
+    """
+    return read_xls_file("data/operations.xlsx")
+
+
+@pytest.fixture(scope="module")
+def index(operations: pd.DataFrame) -> DateIndex:
+    """
+    Fixture with a date index over the sample operations.
+    """
+    return DateIndex(operations)
+
+
+@pytest.mark.parametrize("date", ["01.06.2024", "20.06.2024", "05.07.2024", "06.07.2024", "01.01.2020"])
+def test_window_matches_filter(operations: pd.DataFrame, index: DateIndex, date: str) -> None:
+    """
+    Test that the index finds the same rows as filtering by mask for every category.
+    """
+    start_date, end_date = get_date_range(date)
+    for category in list(operations["Категория"].dropna().unique()) + ["Несуществующая"]:
+        expected = _filter_transactions(operations, category, start_date, end_date)
+        result = index.window_frame(category, start_date, end_date)
+        pd.testing.assert_frame_equal(result, expected)
+
+
+def test_window_skips_missing_dates() -> None:
+    """
+    Test that rows without a date or a category are never returned.
+    """
+    df = pd.DataFrame({
+        "Дата операции": ["01.06.2023 08:00:00", None, "02.06.2023 08:00:00", "03.06.2023 08:00:00"],
+        "Категория": ["Кино", "Кино", None, "Кино"],
+    })
+    index = DateIndex(df)
+    assert list(index.window("Кино", pd.Timestamp("2023-01-01"), pd.Timestamp("2023-12-31"))) == [0, 3]
+
+
+def test_spending_by_category_matrix(operations: pd.DataFrame, index: DateIndex) -> None:
+    """
+    Test that every cell of the matrix matches filtering one category and one window at a time.
+    """
+    dates = [date.strftime("%d.%m.%Y") for date in pd.date_range("2024-01-31", "2024-12-31", freq="ME")]
+    categories = ["Фастфуд", "Переводы", "Несуществующая"]
+
+    result = spending_by_category_matrix.__wrapped__(operations, dates, categories, date_index=index)
+
+    assert len(result) == len(dates) * len(categories)
+    for row in result.itertuples():
+        expected = _filter_transactions(operations, row.category, *get_date_range(row.end_date))
+        assert row.operations == len(expected)
+        assert row.total_spent == pytest.approx(expected["Сумма операции"].sum())
+
+
+def test_spending_by_category_matrix_all_categories(operations: pd.DataFrame) -> None:
+    """
+    Test that all categories are reported when none are given.
+    """
+    result = spending_by_category_matrix.__wrapped__(operations, ["01.07.2024"])
+    assert set(result["category"]) == set(operations["Категория"].dropna())
+    assert set(result["start_date"]) == {"01.04.2024"}
+    assert set(result["end_date"]) == {"01.07.2024"}
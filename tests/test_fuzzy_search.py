@@ -0,0 +1,91 @@
+import numpy as np
+import pytest
+from pandas import DataFrame
+
+from benchmarks.generator import generate_operations
+from src.fuzzy_search import FuzzyIndex, fuzzy_grams, switch_layout
+
+
+@pytest.fixture
+def operations() -> DataFrame:
+    """
+    Fixture that provides generated operations.
+    """
+    return generate_operations(1000, seed=7)
+
+
+@pytest.fixture
+def index(operations: DataFrame) -> FuzzyIndex:
+    """
+    Fixture that provides a fuzzy index over the descriptions of the generated operations.
+    """
+    return FuzzyIndex(operations["Описание"])
+
+
+def test_switch_layout():
+    """
+    Test that a text is retyped in the other keyboard layout, both ways.
+    """
+    assert switch_layout("vfuybn") == "магнит"
+    assert switch_layout("ьфптше") == "magnit"
+    assert switch_layout(switch_layout("яндекс такси")) == "яндекс такси"
+
+
+def test_fuzzy_grams():
+    """
+    Test that every word is split into padded trigrams and 'ё' is matched as 'е'.
+    """
+    assert fuzzy_grams("мтс") == {"  м", " мт", "мтс", "тс "}
+    assert fuzzy_grams("ёж") == fuzzy_grams("еж")
+    assert fuzzy_grams("") == set()
+
+
+@pytest.mark.parametrize("query, expected", [
+    ("Пятерочка", "Пятерочка"),
+    ("пятерочак", "Пятерочка"),
+    ("gznthjxrf", "Пятерочка"),
+    ("додо пица", "Додо Пицца"),
+    ("zyltrc nfrcb", "Яндекс Такси"),
+    ("lamda", "Lamoda"),
+])
+def test_match(index: FuzzyIndex, query: str, expected: str):
+    """
+    Test that a description is found despite typos and the wrong keyboard layout.
+    """
+    assert index.match(query, limit=1)[0][0] == expected
+
+
+def test_match_ranked(index: FuzzyIndex):
+    """
+    Test that matches are ranked by score, the exact one first, and filtered by the threshold and limit.
+    """
+    matches = index.match("московский", threshold=0.1)
+    scores = [score for _, score in matches]
+    assert scores == sorted(scores, reverse=True)
+    assert {value for value, _ in matches[:2]} == {"Московский транспорт", "Московский метрополитен"}
+    assert len(index.match("московский", threshold=0.1, limit=1)) == 1
+    assert index.match("колхоз") == []
+    assert index.match("") == []
+
+
+def test_search(index: FuzzyIndex, operations: DataFrame):
+    """
+    Test that the rows of the matching descriptions are returned with their scores, best description first.
+    """
+    rows, scores = index.search("Магнт")
+    expected = np.flatnonzero(operations["Описание"] == "Магнит")
+    assert rows.tolist() == expected.tolist()
+    assert len(scores) == len(rows) and (scores >= 0.5).all()
+
+    rows, scores = index.search("московский", threshold=0.1)
+    assert (np.diff(scores) <= 0).all()
+    assert len(rows) == len(set(rows.tolist()))
+
+
+def test_missing_values():
+    """
+    Test that missing values are not indexed.
+    """
+    index = FuzzyIndex(["Магнит", None, np.nan, "Магнит"])
+    assert index.values == ["Магнит"]
+    assert index.search("магнит")[0].tolist() == [0, 3]
@@ -0,0 +1,85 @@
+from typing import Any
+
+import pandas as pd
+import pytest
+from pandas import DataFrame
+
+from benchmarks.generator import generate_operations, write_operations
+from benchmarks.ingest import write_exports
+from src.multi_load import load_operations, normalize_operations
+from src.schema import is_compact, restore_transactions
+from src.utils import NUMERIC_FIELDS, OPERATION_FIELDS, read_xls_file
+
+
+@pytest.fixture
+def operations() -> DataFrame:
+    """
+    Fixture that provides generated operations.
+    """
+    return generate_operations(300, seed=3)
+
+
+def test_normalize_operations(operations: DataFrame):
+    """
+    Test that column names, missing columns and column types are brought to the schema of read_xls_file.
+    """
+    export = operations.drop(columns=["Кэшбэк"]).rename(columns={"Описание": " Описание "})
+    export["Дата платежа"] = pd.to_datetime(export["Дата платежа"], format="%d.%m.%Y")
+    export["MCC"] = export["MCC"].astype(str)
+    export["Комментарий"] = "x"
+
+    df = normalize_operations(export)
+    assert list(df.columns) == list(OPERATION_FIELDS)
+    assert df["Кэшбэк"].isna().all()
+    assert df["Дата платежа"].tolist() == operations["Дата платежа"].tolist()
+    assert df["MCC"].equals(operations["MCC"])
+    assert df["Описание"].equals(operations["Описание"])
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_load_operations_overlapping(tmp_path: Any, workers: int):
+    """
+    Test that operations repeated in adjacent exports are kept once.
+    """
+    paths = write_exports(3, rows=120, overlap=20, directory=str(tmp_path))
+    df = load_operations(paths, workers=workers, cache_dir=str(tmp_path / "cache"))
+
+    assert is_compact(df)
+    expected = generate_operations(2 * 100 + 120).astype(dict.fromkeys(NUMERIC_FIELDS, "float64"))
+    pd.testing.assert_frame_equal(restore_transactions(df), expected)
+
+
+def test_load_operations_keeps_repeats_within_file(tmp_path: Any, operations: DataFrame):
+    """
+    Test that identical operations within one export are all kept, as many times as the export with the most.
+    """
+    repeated = pd.concat([operations.iloc[:5], operations.iloc[:1]], ignore_index=True)
+    first = write_operations(repeated, str(tmp_path), "first")
+    second = write_operations(operations.iloc[:3], str(tmp_path), "second")
+
+    df = restore_transactions(load_operations([first, second], workers=1, use_cache=False))
+    pd.testing.assert_frame_equal(df, repeated.astype(dict.fromkeys(NUMERIC_FIELDS, "float64")))
+
+
+def test_load_operations_whole_amounts(tmp_path: Any):
+    """
+    Test that an operation read as whole numbers from one export and as fractions from another is kept once.
+    """
+    operations = read_xls_file("data/operations.xlsx")
+    first, second = str(tmp_path / "first.xlsx"), str(tmp_path / "second.xlsx")
+    operations.iloc[:15].to_excel(first, index=False)
+    operations.iloc[10:].to_excel(second, index=False)
+    assert read_xls_file(first)["Сумма операции"].dtype == "int64"
+
+    df = restore_transactions(load_operations([first, second], workers=1, use_cache=False))
+    assert len(df) == len(operations)
+    assert df["Описание"].tolist() == operations["Описание"].tolist()
+
+
+def test_load_operations_no_files():
+    """
+    Test that loading no files gives an empty frame with the operation columns.
+    """
+    df = load_operations([])
+    assert df.empty
+    assert list(df.columns) == list(OPERATION_FIELDS)
@@ -0,0 +1,100 @@
+import json
+import threading
+import time
+import tracemalloc
+from typing import Any, Generator
+
+import pandas as pd
+import pytest
+
+from src.profiling import network_wait, profile_run, profiled, stage, start_profile, stop_profile
+
+
+@pytest.fixture
+def profile() -> Generator[Any, None, None]:
+    """
+    Fixture that collects a run profile for the duration of the test.
+    """
+    yield start_profile()
+    stop_profile()
+
+
+@profiled
+def count_positive(df: pd.DataFrame) -> int:
+    with network_wait():
+        time.sleep(0.01)
+    return int((df['value'] > 0).sum())
+
+
+def test_profiled_without_profile():
+    """
+    Test that an instrumented function works when no profile is being collected.
+    """
+    assert count_positive(pd.DataFrame({'value': [1, -1, 2]})) == 2
+    with stage("idle") as record:
+        assert record is None
+
+
+def test_profiled_records_stage(profile: Any):
+    """
+    Test that a call is recorded with its wall time, rows and network wait.
+    """
+    count_positive(pd.DataFrame({'value': [1, -1, 2]}))
+    record = profile.to_dict()["stages"][0]
+    assert record["name"].endswith("count_positive")
+    assert record["rows"] == 3
+    assert record["network_wait_seconds"] >= 0.01
+    assert record["wall_seconds"] >= record["network_wait_seconds"]
+    assert record["peak_memory_bytes"] is None
+
+
+def test_stages_on_threads(profile: Any):
+    """
+    Test that stages running on other threads are recorded separately.
+    """
+    with stage("outer"):
+        thread = threading.Thread(target=count_positive, args=(pd.DataFrame({'value': [1]}),))
+        thread.start()
+        thread.join()
+
+    stages = {record["name"].split(".")[-1]: record for record in profile.to_dict()["stages"]}
+    assert stages["outer"]["network_wait_seconds"] == 0.0
+    assert stages["count_positive"]["thread"] != stages["outer"]["thread"]
+
+
+def test_profile_run(tmp_path: Any):
+    """
+    Test that a profiled run writes the stage profile, cProfile statistics and allocation report.
+    """
+    with profile_run(str(tmp_path)):
+        count_positive(pd.DataFrame({'value': range(1000)}))
+
+    with open(tmp_path / "profile.json", encoding="utf-8") as f:
+        stages = json.load(f)["stages"]
+    assert stages[0]["rows"] == 1000
+    assert stages[0]["peak_memory_bytes"] is not None
+    assert (tmp_path / "cprofile.prof").exists()
+    assert "allocation sites" in (tmp_path / "report.txt").read_text(encoding="utf-8")
+
+
+def test_stage_peak_memory_per_stage(profile: Any):
+    """
+    Test that the peak memory of a stage does not include earlier stages and that nested stages fold into
+    the enclosing one.
+    """
+    tracemalloc.start()
+    try:
+        with stage("outer"):
+            with stage("large"):
+                data = bytearray(20_000_000)
+                del data
+            with stage("small"):
+                data = bytearray(1_000)
+                del data
+    finally:
+        tracemalloc.stop()
+
+    stages = {record["name"]: record for record in profile.to_dict()["stages"]}
+    assert stages["large"]["peak_memory_bytes"] > 19_000_000
+    assert stages["small"]["peak_memory_bytes"] < 1_000_000
+    assert stages["outer"]["peak_memory_bytes"] > 19_000_000
@@ -0,0 +1,152 @@
+from typing import Dict
+from unittest.mock import Mock
+
+import pandas as pd
+import pytest
+
+from src.providers import (
+    ApiLayerRatesProvider,
+    BulkDownloadProvider,
+    FixtureRatesProvider,
+    RatesProvider,
+    RecordedYFinance,
+    StockQuotesProvider,
+    TickerHistoryProvider,
+    benchmark_stock_providers,
+    cross_rates,
+)
+
+SYMBOLS = ["AAPL", "AMZN", "GOOGL", "MSFT", "TSLA"]
+
+
+def test_cross_rates() -> None:
+    """
+    Test that prices in RUB are derived from rates quoted against USD.
+    """
+    rates = {"RUB": 90.0, "EUR": 0.9, "CNY": 7.2}
+    result = cross_rates(rates, "USD", ["USD", "EUR", "CNY", "RUB", "JPY"])
+    assert result == pytest.approx({"USD": 90.0, "EUR": 100.0, "CNY": 12.5, "RUB": 1.0})
+
+
+def test_cross_rates_without_target() -> None:
+    """
+    Test that nothing can be priced without a rate for the target currency.
+    """
+    assert cross_rates({"EUR": 0.9}, "USD", ["USD", "EUR"]) == {}
+
+
+def test_fixture_provider_rebases_rates() -> None:
+    """
+    Test that the fixture provider derives rates against another base.
+    """
+    provider = FixtureRatesProvider({"base": "USD", "rates": {"RUB": 90.0, "EUR": 0.9}})
+    assert provider.get_rates("USD", ["RUB", "EUR", "USD"]) == pytest.approx({"RUB": 90.0, "EUR": 0.9, "USD": 1.0})
+    assert provider.get_rates("EUR", ["RUB", "USD"]) == pytest.approx({"RUB": 100.0, "USD": 1 / 0.9})
+    assert provider.get_rates("JPY", ["RUB"]) == {}
+
+
+def test_fixture_provider_from_file() -> None:
+    """
+    Test that the fixture provider loads a recorded response from a file.
+    """
+    provider = FixtureRatesProvider("tests/fixtures/latest_rates.json")
+    assert provider.get_rates("USD", ["RUB"]) == {"RUB": 88.65}
+
+
+def test_rates_provider_is_abstract() -> None:
+    """
+    Test that a rates provider must implement `get_rates`.
+    """
+    with pytest.raises(TypeError):
+        RatesProvider()
+
+
+def test_stock_quotes_provider_is_abstract() -> None:
+    """
+    Test that a stock quotes provider must implement `get_prices`.
+    """
+    with pytest.raises(TypeError):
+        StockQuotesProvider()
+
+
+def test_api_layer_provider_makes_one_request() -> None:
+    """
+    Test that the APILayer provider asks for all symbols in one request.
+    """
+    session = Mock()
+    session.get.return_value.json.return_value = {"base": "USD", "rates": {"RUB": 90.0, "EUR": 0.9}}
+    provider = ApiLayerRatesProvider("https://example.com/latest", "key", session, timeout=5)
+
+    assert provider.get_rates("USD", ["RUB", "EUR", "RUB"]) == {"RUB": 90.0, "EUR": 0.9}
+    session.get.assert_called_once_with("https://example.com/latest", params={"base": "USD", "symbols": "EUR,RUB"},
+                                        headers={"apikey": "key"}, timeout=5)
+
+
+@pytest.fixture
+def histories() -> Dict[str, pd.DataFrame]:
+    """
+    Fixture with recorded one-day histories, one of them empty.
+    """
+    index = pd.DatetimeIndex(["2024-07-05"], name="Date")
+    histories = {
+        symbol: pd.DataFrame({"Open": [price - 1], "High": [price], "Low": [price - 2], "Close": [price - 0.5]},
+                             index=index)
+        for symbol, price in zip(SYMBOLS[:-1], [226.45, 200.55, 192.0, 467.33])
+    }
+    histories["TSLA"] = pd.DataFrame({"Open": [], "High": [], "Low": [], "Close": []},
+                                     index=pd.DatetimeIndex([], name="Date"))
+    return histories
+
+
+def test_bulk_provider_matches_per_ticker_provider(histories: Dict[str, pd.DataFrame]) -> None:
+    """
+    Test that both stock paths return the same prices, the bulk one with a single request.
+    """
+    per_ticker_client = RecordedYFinance(histories)
+    bulk_client = RecordedYFinance(histories)
+
+    per_ticker = TickerHistoryProvider(per_ticker_client).get_prices(SYMBOLS)
+    bulk = BulkDownloadProvider(bulk_client).get_prices(SYMBOLS)
+
+    assert bulk == per_ticker == {"AAPL": 226.45, "AMZN": 200.55, "GOOGL": 192.0, "MSFT": 467.33, "TSLA": 0.0}
+    assert per_ticker_client.requests == len(SYMBOLS)
+    assert bulk_client.requests == 1
+
+
+def test_bulk_provider_single_symbol_and_unknown(histories: Dict[str, pd.DataFrame]) -> None:
+    """
+    Test the single-level frame of a one-symbol download and symbols without data.
+    """
+    client = Mock()
+    client.download.return_value = histories["AAPL"]
+    assert BulkDownloadProvider(client).get_prices(["AAPL"]) == {"AAPL": 226.45}
+
+    prices = BulkDownloadProvider(RecordedYFinance(histories)).get_prices(["AAPL", "XXXX"])
+    assert prices == {"AAPL": 226.45, "XXXX": 0.0}
+
+
+def test_failed_requests_are_left_out(histories: Dict[str, pd.DataFrame]) -> None:
+    """
+    Test that symbols whose request failed are not in the result.
+    """
+    client = Mock()
+    client.Ticker.side_effect = lambda symbol: Mock(history=Mock(side_effect=OSError("timeout")))
+    assert TickerHistoryProvider(client).get_prices(SYMBOLS) == {}
+
+    client.download.side_effect = OSError("timeout")
+    assert BulkDownloadProvider(client).get_prices(SYMBOLS) == {}
+
+
+def test_benchmark_stock_providers(histories: Dict[str, pd.DataFrame]) -> None:
+    """
+    Test that the benchmark times every provider on recorded responses with latency.
+    """
+    providers = {
+        "per_ticker": TickerHistoryProvider(RecordedYFinance(histories, latency=0.01), max_workers=1),
+        "bulk": BulkDownloadProvider(RecordedYFinance(histories, latency=0.01)),
+    }
+    result = benchmark_stock_providers(providers, SYMBOLS, repeat=2)
+
+    assert list(result["provider"]) == ["per_ticker", "bulk"]
+    timings = result.set_index("provider")["min_seconds"]
+    assert timings["bulk"] < timings["per_ticker"]
@@ -0,0 +1,115 @@
+import os
+import tempfile
+from typing import List
+from unittest.mock import patch
+
+import pytest
+
+from src.quote_cache import TTLCache
+
+
+class Loader:
+    """
+    A loader that returns numbered values and counts its calls.
+    """
+
+    def __init__(self) -> None:
+        self.calls: List[str] = []
+
+    def __call__(self, key: str) -> int:
+        self.calls.append(key)
+        return len(self.calls)
+
+
+def test_hit_and_miss() -> None:
+    """
+    Test that a fresh entry is loaded once and then served from the cache.
+    """
+    cache = TTLCache(ttl=60)
+    loader = Loader()
+    assert cache.get("USD", lambda: loader("USD")) == 1
+    assert cache.get("USD", lambda: loader("USD")) == 1
+    assert loader.calls == ["USD"]
+    assert cache.stats() == {"hits": 1, "stale_hits": 0, "misses": 1, "size": 1}
+
+
+def test_none_is_not_cached() -> None:
+    """
+    Test that a failed load is retried on the next call.
+    """
+    cache = TTLCache(ttl=60)
+    assert cache.get("USD", lambda: None) is None
+    assert cache.get("USD", lambda: 5) == 5
+
+
+def test_stale_value_is_served_while_refreshing() -> None:
+    """
+    Test that an expired entry is returned and refreshed in the background.
+    """
+    cache = TTLCache(ttl=10)
+    loader = Loader()
+    with patch("src.quote_cache.time.time", return_value=1000.0):
+        cache.get("USD", lambda: loader("USD"))
+    with patch("src.quote_cache.time.time", return_value=1020.0):
+        assert cache.get("USD", lambda: loader("USD")) == 1
+        cache.wait_for_refresh()
+        assert cache.get("USD", lambda: loader("USD")) == 2
+    assert cache.stats()["stale_hits"] == 1
+
+
+def test_too_stale_value_is_reloaded() -> None:
+    """
+    Test that an entry older than max_stale is loaded again synchronously.
+    """
+    cache = TTLCache(ttl=10, max_stale=100)
+    loader = Loader()
+    with patch("src.quote_cache.time.time", return_value=1000.0):
+        cache.get("USD", lambda: loader("USD"))
+    with patch("src.quote_cache.time.time", return_value=1200.0):
+        assert cache.get("USD", lambda: loader("USD")) == 2
+    assert cache.stats()["misses"] == 2
+
+
+def test_least_recently_used_entry_is_evicted() -> None:
+    """
+    Test that the cache keeps at most max_size entries.
+    """
+    cache = TTLCache(ttl=60, max_size=2)
+    cache.set("USD", 1)
+    cache.set("EUR", 2)
+    cache.get("USD", lambda: pytest.fail("USD should be cached"))
+    cache.set("CNY", 3)
+    assert cache.get("EUR", lambda: 4) == 4
+    assert cache.stats()["size"] == 2
+
+
+def test_entries_survive_restart() -> None:
+    """
+    Test that entries are saved to disk and loaded by a new cache.
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "rates.json")
+        TTLCache(ttl=60, persist_path=path).set("USD", {"currency": "USD", "rate": 90.0})
+
+        cache = TTLCache(ttl=60, persist_path=path)
+        assert cache.get("USD", lambda: pytest.fail("USD should be cached")) == {"currency": "USD", "rate": 90.0}
+
+
+def test_clear_keeps_persisted_entries_and_purge_deletes_them() -> None:
+    """
+    Test that clear only empties memory and forgets refreshes, while purge also deletes the file.
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "rates.json")
+        cache = TTLCache(ttl=60, persist_path=path)
+        cache.set("USD", {"currency": "USD", "rate": 90.0})
+        cache._refreshing.add("USD")
+
+        cache.clear()
+        assert not cache._refreshing
+        assert os.path.exists(path)
+        assert cache.get("USD", lambda: None) is None
+        assert TTLCache(ttl=60, persist_path=path).get("USD", lambda: None) == {"currency": "USD", "rate": 90.0}
+
+        cache.purge()
+        assert not os.path.exists(path)
@@ -0,0 +1,91 @@
+import glob
+import importlib.util
+import json
+import os
+import tempfile
+
+import pandas as pd
+import pytest
+
+from src.report_formats import REPORT_FORMATS, compare_report_formats, get_report_format
+from src.reports import write_report
+from src.utils import read_xls_file
+
+OPTIONAL_DEPENDENCIES = {"json.zst": "zstandard", "parquet": "pyarrow"}
+
+
+@pytest.fixture(scope="module")
+def report() -> pd.DataFrame:
+    """
+    Fixture with a report built from the sample operations.
+    """
+    return read_xls_file("data/operations.xlsx").head(20)
+
+
+@pytest.mark.parametrize("fmt", list(REPORT_FORMATS))
+def test_report_format_round_trip(report: pd.DataFrame, fmt: str) -> None:
+    """
+    Test that every format reads back the written report.
+
+    Args:
+        fmt (str): The report format.
+    """
+    if fmt in OPTIONAL_DEPENDENCIES:
+        pytest.importorskip(OPTIONAL_DEPENDENCIES[fmt])
+    report_format = get_report_format(fmt)
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "report" + report_format.extension)
+        report_format.write(report, path)
+        result = report_format.read(path)
+
+    assert list(result.columns) == list(report.columns)
+    assert list(result["Описание"]) == list(report["Описание"])
+    assert result["Сумма операции"].tolist() == pytest.approx(report["Сумма операции"].tolist())
+
+
+def test_ndjson_lines(report: pd.DataFrame) -> None:
+    """
+    Test that NDJSON writes one record per line.
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "report.ndjson")
+        get_report_format("ndjson").write(report, path)
+        with open(path, encoding="utf-8") as f:
+            lines = f.read().splitlines()
+
+    assert lines == [json.dumps(record, ensure_ascii=False) for record in report.to_dict(orient="records")]
+
+
+def test_unknown_format() -> None:
+    """
+    Test that an unknown format raises ValueError.
+    """
+    with pytest.raises(ValueError):
+        write_report(fmt="xml")
+
+
+def test_write_report_format(report: pd.DataFrame) -> None:
+    """
+    Test that write_report writes the chosen format with a matching extension.
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "report.csv")
+        write_report(path, fmt="csv")(lambda: report)()
+        assert len(pd.read_csv(path)) == len(report)
+        assert glob.glob(os.path.join(directory, "*")) == [path]
+
+
+def test_compare_report_formats(report: pd.DataFrame) -> None:
+    """
+    Test that the comparison measures every available format.
+    """
+    result = compare_report_formats(report)
+
+    assert set(result["format"]) == set(REPORT_FORMATS)
+    for row in result.itertuples():
+        dependency = OPTIONAL_DEPENDENCIES.get(row.format)
+        if dependency is None or importlib.util.find_spec(dependency):
+            assert row.size_bytes > 0
+            assert row.write_seconds >= 0 and row.read_seconds >= 0
+        else:
+            assert row.error
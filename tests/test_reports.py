@@ -1,10 +1,26 @@
+import json
 import logging
+import os
+import tempfile
+import threading
+from typing import Any
+from unittest.mock import Mock, patch
 
+import numpy as np
 import pandas as pd
 import pytest
 from pandas import DataFrame
 
-from src.reports import spending_by_category
+from src.date_index import DateIndex
+from src.report_formats import get_report_format
+from src.reports import (
+    category_spending_rows,
+    report_writer,
+    spending_by_category,
+    spending_by_category_chunked,
+    write_report,
+)
+from src.utils import read_xls_file
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -63,6 +79,32 @@ def test_spending_by_category_custom_date(sample_transactions: DataFrame) -> Non
     assert result.shape[0] == 3
 
 
+def test_spending_by_category_writes_report(sample_transactions: DataFrame, reports_dir: Any) -> None:
+    """
+    Test that spending_by_category returns before its report is written and the report reaches REPORTS_DIR.
+
+    Args:
+        sample_transactions (DataFrame): The sample transactions DataFrame.
+        reports_dir (Any): The temporary reports directory.
+    """
+    release = threading.Event()
+    json_format = get_report_format("json")
+
+    def write(result: pd.DataFrame, output_file: str) -> None:
+        release.wait(5)
+        json_format.write(result, output_file)
+
+    with patch("src.reports.get_report_format", return_value=Mock(write=write, extension=".json")):
+        result = spending_by_category(sample_transactions, "Рестораны", date="20.08.2023")
+        assert not reports_dir.exists() or not list(reports_dir.iterdir())
+        release.set()
+        assert report_writer.flush() == []
+
+    [report] = list(reports_dir.iterdir())
+    with open(report, encoding="utf-8") as f:
+        assert json.load(f) == result.to_dict(orient="records")
+
+
 def test_spending_by_category_no_results(sample_transactions: DataFrame) -> None:
     """
     Test spending_by_category function with a category that has no results.
@@ -97,3 +139,96 @@ def test_spending_by_category_invalid_date_format(sample_transactions: DataFrame
     logger.info("Testing spending_by_category with invalid date format.")
     with pytest.raises(ValueError):
         spending_by_category(sample_transactions, "Рестораны", date="2023-08-20")
+
+
+def test_spending_by_category_chunked(sample_transactions: DataFrame) -> None:
+    """
+    Test spending_by_category_chunked function over chunks of the sample transactions.
+
+    Args:
+        sample_transactions (DataFrame): The sample transactions DataFrame.
+    """
+    logger.info("Testing spending_by_category_chunked with a custom date filter.")
+    chunks = [sample_transactions.iloc[:2], sample_transactions.iloc[2:]]
+    result = spending_by_category_chunked(chunks, "Рестораны", date="20.08.2023")
+    assert list(result.index) == [0, 1, 3]
+
+
+def test_category_spending_rows(sample_transactions: DataFrame) -> None:
+    """
+    Test that category_spending_rows finds the positions of the transactions spending_by_category returns.
+
+    Args:
+        sample_transactions (DataFrame): The sample transactions DataFrame.
+    """
+    rows = category_spending_rows(sample_transactions, "Рестораны", date="20.08.2023")
+    assert rows.tolist() == [0, 1, 3]
+    indexed = category_spending_rows(sample_transactions, "Рестораны", "20.08.2023", DateIndex(sample_transactions))
+    assert indexed.tolist() == rows.tolist()
+
+
+@pytest.mark.parametrize("background", [False, True])
+def test_write_report_output(background: bool) -> None:
+    """
+    Test that the report file is the same as dumping the records of the result with indent=4.
+
+    Args:
+        background (bool): Whether the report is written on the background thread.
+    """
+    df = read_xls_file("data/operations.xlsx")
+    df.loc[0, "Описание"] = None
+    df["Флаг"] = df["Сумма операции"] > 0
+    _, path = tempfile.mkstemp(suffix=".json")
+
+    result = write_report(path, background=background)(lambda: df)()
+    assert report_writer.flush() == []
+
+    with open(path, encoding="utf-8") as f:
+        content = f.read()
+    os.remove(path)
+    assert result is df
+    assert content == json.dumps(df.to_dict(orient="records"), ensure_ascii=False, indent=4)
+
+
+def test_write_report_empty_result() -> None:
+    """
+    Test that an empty result is written as an empty list.
+    """
+    _, path = tempfile.mkstemp(suffix=".json")
+    write_report(path)(lambda: pd.DataFrame({"a": np.array([], dtype=float)}))()
+    with open(path, encoding="utf-8") as f:
+        assert f.read() == "[]"
+    os.remove(path)
+
+
+def test_write_report_background_writes_copy(tmp_path: Any) -> None:
+    """
+    Test that a report written in the background is not affected by changes the caller makes to the result.
+    """
+    release = threading.Event()
+    json_format = get_report_format("json")
+
+    def write(result: pd.DataFrame, output_file: str) -> None:
+        release.wait(5)
+        json_format.write(result, output_file)
+
+    path = str(tmp_path / "report.json")
+    with patch("src.reports.get_report_format", return_value=Mock(write=write, extension=".json")):
+        result = write_report(path, background=True)(lambda: pd.DataFrame({"a": [1.0, 2.0]}))()
+    result.loc[0, "a"] = 100.0
+    release.set()
+    assert report_writer.flush() == []
+
+    with open(path, encoding="utf-8") as f:
+        assert json.load(f) == [{"a": 1.0}, {"a": 2.0}]
+
+
+def test_write_report_background_error() -> None:
+    """
+    Test that errors of the background writer are reported by flush.
+    """
+    path = os.path.join(tempfile.gettempdir(), "missing-directory", "report.json")
+    write_report(path, background=True)(lambda: pd.DataFrame({"a": [1]}))()
+    errors = report_writer.flush()
+    assert [file for file, error in errors] == [path]
+    assert isinstance(errors[0][1], OSError)
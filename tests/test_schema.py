@@ -0,0 +1,93 @@
+import numpy as np
+import pandas as pd
+import pytest
+from pandas import DataFrame
+
+from src.reports import spending_by_category
+from src.schema import compact_transactions, is_compact, memory_report, restore_transactions
+from src.utils import convert_data_frame_to_json, read_xls_file, read_xls_file_compact
+from src.views import get_card_data, top_transaction
+
+
+@pytest.fixture
+def sample_dataframe() -> DataFrame:
+    """
+    Fixture that provides a sample DataFrame loaded from an Excel file.
+    """
+    return read_xls_file("data/operations.xlsx")
+
+
+def test_compact_transactions_types(sample_dataframe: DataFrame):
+    """
+    Test that text, dates, amounts and MCC get compact types.
+    """
+    compact = compact_transactions(sample_dataframe)
+    assert is_compact(compact)
+    assert isinstance(compact['Категория'].dtype, pd.CategoricalDtype)
+    assert compact['Дата операции'].dtype.kind == 'M'
+    assert compact['Сумма операции'].dtype == 'Int64'
+    assert compact['Кэшбэк'].dtype == 'Int64'
+    assert compact['MCC'].dtype == 'Int16'
+    assert compact['Сумма операции'].iloc[0] == -84900
+
+
+def test_restore_transactions_round_trip(sample_dataframe: DataFrame):
+    """
+    Test that restoring a compact frame gives back the original DataFrame.
+    """
+    restored = restore_transactions(compact_transactions(sample_dataframe))
+    assert not is_compact(restored)
+    pd.testing.assert_frame_equal(restored, sample_dataframe)
+
+
+def test_restore_transactions_not_compact(sample_dataframe: DataFrame):
+    """
+    Test that a DataFrame that is not compact is returned as is.
+    """
+    assert restore_transactions(sample_dataframe) is sample_dataframe
+
+
+def test_restore_transactions_after_merge_and_concat(sample_dataframe: DataFrame):
+    """
+    Test that kopecks are still recognized after pandas operations that do not keep the frame attributes.
+    """
+    compact = compact_transactions(sample_dataframe)
+    merged = compact.merge(DataFrame({'Категория': ['Супермаркеты'], 'Группа': ['Еда']}), on='Категория')
+    expected = sample_dataframe[sample_dataframe['Категория'] == 'Супермаркеты']
+    restored = restore_transactions(merged)
+    assert restored['Сумма операции'].tolist() == expected['Сумма операции'].tolist()
+
+    doubled = pd.concat([compact, compact], ignore_index=True)
+    assert get_card_data(doubled) == get_card_data(pd.concat([sample_dataframe] * 2, ignore_index=True))
+
+
+def test_compact_transactions_keeps_lossy_amounts():
+    """
+    Test that amounts with more than two decimals stay floats.
+    """
+    df = DataFrame({'Сумма операции': [1.005, -2.5], 'Кэшбэк': [np.nan, 1.25]})
+    compact = compact_transactions(df)
+    assert compact['Сумма операции'].dtype == np.float64
+    assert compact['Кэшбэк'].dtype == 'Int64'
+    pd.testing.assert_frame_equal(restore_transactions(compact), df)
+
+
+def test_memory_report(sample_dataframe: DataFrame):
+    """
+    Test that the memory report shows the compact frame is smaller.
+    """
+    report = memory_report(sample_dataframe, compact_transactions(sample_dataframe))
+    assert report.loc['total', 'bytes_after'] < report.loc['total', 'bytes_before']
+    assert report.loc['Категория', 'dtype_after'] == 'category'
+
+
+def test_functions_on_compact_frame(sample_dataframe: DataFrame):
+    """
+    Test that the views, reports and serializer give the same results for the compact frame.
+    """
+    compact = read_xls_file_compact("data/operations.xlsx")
+    assert get_card_data(compact) == get_card_data(sample_dataframe)
+    assert top_transaction(compact) == top_transaction(sample_dataframe)
+    assert convert_data_frame_to_json(compact) == convert_data_frame_to_json(sample_dataframe)
+    pd.testing.assert_frame_equal(spending_by_category.__wrapped__(compact, 'Фастфуд', '30.07.2024'),
+                                  spending_by_category.__wrapped__(sample_dataframe, 'Фастфуд', '30.07.2024'))
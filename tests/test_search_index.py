@@ -0,0 +1,102 @@
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.search_index import AhoCorasick, SearchIndex
+from src.services import search_by_request, search_by_requests, search_operations
+from src.utils import convert_data_frame_to_json, read_xls_file
+
+
+@pytest.fixture(scope="module")
+def operations() -> pd.DataFrame:
+    """
+    Fixture with the sample operations.
+    """
+    return read_xls_file("data/operations.xlsx")
+
+
+@pytest.fixture(scope="module")
+def index(operations: pd.DataFrame) -> SearchIndex:
+    """
+    Fixture with a search index over the sample operations.
+    """
+    return SearchIndex(operations)
+
+
+@pytest.mark.parametrize("query", ["пицца", "ПИЦЦА", "Переводы", "ка", "а", "", "nan", "несуществующий"])
+def test_search_matches_search_by_request(operations: pd.DataFrame, index: SearchIndex, query: str) -> None:
+    """
+    Test that the index finds the same operations as search_by_request.
+    """
+    expected = json.loads(search_by_request(query, convert_data_frame_to_json(operations)))
+    result = index.search_frame(query)
+
+    assert len(result) == len(expected)
+    assert list(result["Дата операции"]) == [operation["Дата операции"] for operation in expected]
+
+
+@pytest.mark.parametrize("query", ["an", "non", "nan", "none", ""])
+def test_search_missing_values(query: str) -> None:
+    """
+    Test that the index, like search_operations, gives missing values no text, so only the empty query matches them.
+    """
+    operations = pd.DataFrame({"Категория": [None, np.nan, "Фастфуд", "Переводы"],
+                               "Описание": ["Банк", "Non Stop", None, np.nan]})
+    index = SearchIndex(operations)
+
+    expected = search_operations(query, operations).tolist()
+    assert index.search(query).tolist() == expected
+    assert index.search_many([query])[query].tolist() == expected
+
+
+def test_search_returns_row_positions(index: SearchIndex) -> None:
+    """
+    Test that search returns sorted row positions and can be queried repeatedly.
+    """
+    first = index.search("такси")
+    assert list(first) == sorted(first)
+    assert list(index.search("такси")) == list(first)
+
+
+def test_search_empty_frame(operations: pd.DataFrame) -> None:
+    """
+    Test that an index over an empty frame returns no rows.
+    """
+    index = SearchIndex(operations.iloc[:0])
+    assert len(index.search("пицца")) == 0
+    assert index.search_frame("").empty
+
+
+def test_aho_corasick_finds_overlapping_patterns() -> None:
+    """
+    Test that the automaton finds overlapping and nested patterns.
+    """
+    automaton = AhoCorasick(["he", "she", "his", "hers", ""])
+    assert automaton.find("ushers") == {0, 1, 3, 4}
+    assert automaton.find("ahishe") == {0, 1, 2, 4}
+    assert automaton.find("xyz") == {4}
+
+
+def test_search_many_matches_search(index: SearchIndex) -> None:
+    """
+    Test that the batch search returns the same rows as one search per query.
+    """
+    queries = ["пицца", "ПИЦЦА", "Переводы", "ка", "", "несуществующий", "такси", "а"]
+    result = index.search_many(queries)
+
+    assert list(result) == queries
+    for query in queries:
+        assert list(result[query]) == list(index.search(query))
+
+
+def test_search_by_requests(operations: pd.DataFrame) -> None:
+    """
+    Test the batch search entry point of the services.
+    """
+    result = search_by_requests(["Фастфуд", "несуществующий"], operations)
+
+    assert result["несуществующий"] == {"rows": [], "count": 0}
+    assert result["Фастфуд"]["count"] == len(result["Фастфуд"]["rows"]) > 0
+    assert set(operations.iloc[result["Фастфуд"]["rows"]]["Категория"]) == {"Фастфуд"}
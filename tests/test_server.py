@@ -0,0 +1,93 @@
+import asyncio
+import json
+import os
+import shutil
+from http import HTTPStatus
+from typing import Any
+from unittest.mock import patch
+from urllib.parse import urlencode
+
+import pytest
+
+from benchmarks.load_test import run_load_test
+from src.server import DatasetServer
+
+
+@pytest.fixture
+def server(tmp_path: Any) -> DatasetServer:
+    """
+    Fixture that provides a server over a copy of the sample operations, listening on a free port.
+    """
+    path = str(tmp_path / "operations.xlsx")
+    shutil.copy("data/operations.xlsx", path)
+    return DatasetServer(path, port=0, cache_dir=str(tmp_path / "cache"), reload_interval=0.05)
+
+
+def test_handle(server: DatasetServer):
+    """
+    Test that the endpoints answer the batch commands and that bad requests get an error status.
+    """
+    async def scenario():
+        await server.start()
+        try:
+            status, body = server.handle("GET", "/search?" + urlencode({"query": "такси"}))
+            assert status == HTTPStatus.OK
+            assert len(json.loads(body)) == len(server.dataset.search("такси"))
+
+            status, body = server.handle("GET", "/category?" + urlencode({"category": "Фастфуд",
+                                                                          "date": "30.07.2024"}))
+            assert status == HTTPStatus.OK
+            assert all(row["Категория"] == "Фастфуд" for row in json.loads(body))
+
+            status, body = server.handle("GET", "/health")
+            assert json.loads(body)["operations"] == len(server.dataset.df)
+
+            assert server.handle("GET", "/search")[0] == HTTPStatus.BAD_REQUEST
+            assert server.handle("GET", "/unknown")[0] == HTTPStatus.NOT_FOUND
+            assert server.handle("POST", "/search?query=x")[0] == HTTPStatus.METHOD_NOT_ALLOWED
+        finally:
+            await server.stop()
+
+    asyncio.run(scenario())
+
+
+def test_concurrent_requests(server: DatasetServer):
+    """
+    Test that the server answers requests from several keep-alive connections at once.
+    """
+    async def scenario():
+        await server.start()
+        try:
+            return await run_load_test(server.host, server.port, requests=40, concurrency=4)
+        finally:
+            await server.stop()
+
+    with patch("src.views.get_currency", return_value=[]), patch("src.views.get_stock_currency", return_value=[]):
+        result = asyncio.run(scenario())
+    assert result["requests"] == 40
+    assert result["errors"] == 0
+    assert result["p99_ms"] >= result["p50_ms"] > 0
+
+
+def test_hot_reload(server: DatasetServer):
+    """
+    Test that a changed file is loaded again in the background.
+    """
+    async def scenario():
+        await server.start()
+        try:
+            previous = server.dataset
+            stat = os.stat(server.path)
+            os.utime(server.path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+            for _ in range(100):
+                if server.dataset is not previous:
+                    break
+                await asyncio.sleep(0.05)
+            return previous
+        finally:
+            await server.stop()
+
+    previous = asyncio.run(scenario())
+    assert server.dataset is not previous
+    assert server.reloads == 1
+    assert not server.dataset.is_stale()
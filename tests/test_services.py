@@ -1,9 +1,16 @@
+import json
 from typing import Generator
 from unittest.mock import Mock, patch
 
+import numpy as np
+import pandas as pd
 import pytest
 
-from src.services import search_by_request
+from src.fuzzy_search import FuzzyIndex
+from src.schema import compact_transactions
+from src.search_index import SearchIndex
+from src.services import search_by_request, search_by_request_chunked, search_operations, search_operations_fuzzy
+from src.utils import convert_data_frame_to_json, iter_xls_chunks, read_xls_file, serialize_operations
 
 
 @pytest.fixture
@@ -66,3 +73,96 @@ def test_search_by_request_no_match(mock_convert_data_frame_to_json: Mock, mock_
     result = search_by_request(search_text, operations_json)
 
     assert len(result) == 2
+
+
+def test_search_by_request_chunked() -> None:
+    """
+    Test that the chunked search finds the same operations as the search over the whole table.
+    """
+    df = read_xls_file("data/operations.xlsx")
+    expected = json.loads(search_by_request("пицца", convert_data_frame_to_json(df)))
+
+    result = search_by_request_chunked("пицца", iter_xls_chunks("data/operations.xlsx", 10))
+
+    assert len(result) == len(expected) > 0
+    assert list(result["Описание"]) == [operation["Описание"] for operation in expected]
+
+
+@pytest.mark.parametrize("search_text", ["такси", "СУПЕРМАРКЕТ", "", "нет такой операции"])
+def test_search_operations(search_text: str) -> None:
+    """
+    Test that the native search finds the same operations as the JSON search, for read and compact operations.
+    """
+    df = read_xls_file("data/operations.xlsx")
+    expected = search_by_request(search_text, convert_data_frame_to_json(df))
+
+    for operations in (df, compact_transactions(df)):
+        rows = search_operations(search_text, operations)
+        assert serialize_operations(operations.iloc[rows]) == expected
+
+
+def test_search_missing_category() -> None:
+    """
+    Test that a missing category is not matched as the text 'None' by either search.
+    """
+    operations = [{"Категория": None, "Описание": "Перевод"}, {"Категория": "Фастфуд", "Описание": "Non Stop"}]
+    result = json.loads(search_by_request("non", json.dumps(operations, ensure_ascii=False)))
+
+    assert [operation["Описание"] for operation in result] == ["Non Stop"]
+    assert search_operations("non", pd.DataFrame(operations)).tolist() == [1]
+
+
+@pytest.mark.parametrize("search_text", ["an", "nan", "none", ""])
+def test_search_by_request_chunked_missing_values(search_text: str) -> None:
+    """
+    Test that the chunked search, like search_operations, matches missing values only with the empty text.
+    """
+    operations = pd.DataFrame({"Категория": [None, np.nan, "Фастфуд", "Переводы"],
+                               "Описание": ["Банк", "Non Stop", None, np.nan]})
+    chunks = [operations.iloc[:2], operations.iloc[2:]]
+
+    result = search_by_request_chunked(search_text, chunks)
+    assert result.index.tolist() == search_operations(search_text, operations).tolist()
+
+
+def test_search_by_request_keeps_value_types() -> None:
+    """
+    Test that equal amounts of different types are written back as they were given.
+    """
+    operations = [{"Категория": "Фастфуд", "Описание": "Non Stop", "Сумма операции": value}
+                  for value in (1, 1.0, True, -0.0)]
+    result = json.loads(search_by_request("non", json.dumps(operations, ensure_ascii=False)))
+
+    assert [repr(operation["Сумма операции"]) for operation in result] == ["1", "1.0", "True", "-0.0"]
+
+
+def test_search_operations_index() -> None:
+    """
+    Test that the native search uses a search index when given one.
+    """
+    df = read_xls_file("data/operations.xlsx")
+    assert search_operations("такси", SearchIndex(df)).tolist() == search_operations("такси", df).tolist()
+
+
+def test_search_by_request_fuzzy() -> None:
+    """
+    Test that the fuzzy search finds a description typed with a typo in the wrong keyboard layout.
+    """
+    df = read_xls_file("data/operations.xlsx")
+    expected = json.loads(search_by_request("Такси", convert_data_frame_to_json(df)))
+
+    result = json.loads(search_by_request("zyltrc nfrcb", convert_data_frame_to_json(df), fuzzy=True))
+
+    assert result == [operation for operation in expected if operation["Описание"] == "Яндекс Такси"]
+
+
+def test_search_operations_fuzzy() -> None:
+    """
+    Test that the native fuzzy search gives the same operations from the DataFrame and from an index.
+    """
+    df = read_xls_file("data/operations.xlsx")
+    rows, scores = search_operations_fuzzy("магнт", df)
+
+    assert set(df.iloc[rows]["Описание"]) == {"Магнит"}
+    assert (scores >= 0.5).all()
+    assert search_operations_fuzzy("магнт", FuzzyIndex(df["Описание"]))[0].tolist() == rows.tolist()
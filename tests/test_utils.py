@@ -1,13 +1,20 @@
 import json
 import os
 import tempfile
-from typing import Dict, List
+from typing import Any, Dict, List
 from unittest.mock import MagicMock, patch
 
 import pandas as pd
 import pytest
 
-from src.utils import convert_data_frame_to_json, read_xls_file
+from src.utils import (
+    NUMERIC_FIELDS,
+    OPERATION_FIELDS,
+    convert_data_frame_to_json,
+    iter_xls_chunks,
+    read_xls_file,
+    serialize_operations,
+)
 
 
 @pytest.fixture
@@ -105,3 +112,86 @@ def test_read_xls_file(sample_excel_file: str, input_data: str, expected_output:
 
         for actual, expected in zip(parsed_json, expected_output):
             assert actual == expected
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 100])
+def test_iter_xls_chunks(chunk_size: int) -> None:
+    """
+    Test that the chunks of `iter_xls_chunks` add up to the frame read by `read_xls_file`.
+
+    Args:
+        chunk_size (int): The number of rows in a chunk.
+    """
+    expected = read_xls_file("data/operations.xlsx")
+    expected = expected.astype({column: "float64" for column in NUMERIC_FIELDS})
+    chunks = list(iter_xls_chunks("data/operations.xlsx", chunk_size))
+
+    assert all(len(chunk) <= chunk_size for chunk in chunks)
+    assert all(chunk.dtypes.equals(chunks[0].dtypes) for chunk in chunks)
+    pd.testing.assert_frame_equal(pd.concat(chunks), expected)
+
+
+def _legacy_json(df: pd.DataFrame, indent: Any = 4) -> str:
+    """
+    Serializes operations the way `convert_data_frame_to_json` used to, row by row.
+    """
+    records = [{field: row[field] for field in OPERATION_FIELDS} for idx, row in df.iterrows()]
+    return json.dumps(records, ensure_ascii=False, indent=indent)
+
+
+@pytest.fixture
+def operations() -> pd.DataFrame:
+    """
+    Fixture with the sample operations, including a missing value and a string that needs escaping.
+    """
+    df = read_xls_file("data/operations.xlsx")
+    df.loc[3, "Описание"] = None
+    df.loc[4, "Описание"] = 'Кафе "Ромашка"\n'
+    return df
+
+
+def test_serialize_operations_indent(operations: pd.DataFrame) -> None:
+    """
+    Test that the default output is byte for byte the same as the row-by-row serialization.
+    """
+    assert serialize_operations(operations) == _legacy_json(operations)
+    assert convert_data_frame_to_json(operations) == _legacy_json(operations)
+    assert serialize_operations(operations.iloc[:0]) == _legacy_json(operations.iloc[:0])
+
+
+def test_serialize_operations_numeric_frame(operations: pd.DataFrame) -> None:
+    """
+    Test that integer columns are written as floats when every column is numeric, as with `iterrows`.
+    """
+    df = pd.DataFrame({field: range(3) if operations[field].dtype == object else operations[field].iloc[:3]
+                       for field in OPERATION_FIELDS})
+    assert serialize_operations(df) == _legacy_json(df)
+
+
+def test_serialize_operations_equal_values_of_other_types(operations: pd.DataFrame) -> None:
+    """
+    Test that equal values of different types, and 0.0 and -0.0, each keep their own JSON text.
+    """
+    df = operations.iloc[:7].copy()
+    df["Сумма операции"] = pd.Series([1, 1.0, True, 0.0, -0.0, None, "1"], dtype=object, index=df.index)
+    df["Кэшбэк"] = [0.0, -0.0, 0.0, -0.0, 1.0, 1.0, float("nan")]
+    assert serialize_operations(df) == _legacy_json(df)
+
+
+def test_serialize_operations_compact(operations: pd.DataFrame) -> None:
+    """
+    Test the compact and NDJSON modes.
+    """
+    assert serialize_operations(operations, mode="compact") == _legacy_json(operations, indent=None)
+
+    lines = serialize_operations(operations, mode="ndjson").split("\n")
+    assert lines[-1] == ""
+    assert lines[:-1] == [json.dumps(record, ensure_ascii=False) for record in json.loads(_legacy_json(operations))]
+
+
+def test_serialize_operations_invalid_mode(operations: pd.DataFrame) -> None:
+    """
+    Test that an unknown mode raises ValueError.
+    """
+    with pytest.raises(ValueError):
+        serialize_operations(operations, mode="xml")
@@ -1,11 +1,42 @@
+import json
+import threading
+import time
 from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Generator
 from unittest.mock import Mock, patch
+from urllib.parse import parse_qs, urlparse
 
 import pytest
 from pandas import DataFrame
 
-from src.utils import read_xls_file
-from src.views import get_card_data, get_currency, get_data, get_stock_currency, get_time_of_day, top_transaction
+from src.providers import BulkDownloadProvider, FixtureRatesProvider
+from src.utils import iter_xls_chunks, read_xls_file
+from src.views import (
+    currency_cache,
+    get_cache_stats,
+    get_card_data,
+    get_card_data_chunked,
+    get_currency,
+    get_data,
+    get_stock_currency,
+    get_time_of_day,
+    stock_cache,
+    top_transaction,
+    top_transaction_chunked,
+)
+
+
+@pytest.fixture(autouse=True)
+def clear_quote_caches() -> Generator[None, None, None]:
+    """
+    Fixture that empties the currency rate and stock price caches around every test.
+    """
+    currency_cache.clear()
+    stock_cache.clear()
+    yield
+    currency_cache.clear()
+    stock_cache.clear()
 
 
 @pytest.fixture
@@ -20,12 +51,53 @@ def sample_dataframe() -> DataFrame:
 @pytest.fixture
 def mock_requests_get() -> Mock:
     """
-    Fixture that mocks the requests.get function.
+    Fixture that mocks the get method of the shared requests session.
     """
-    with patch("requests.get") as mock_get:
+    with patch("requests.Session.get") as mock_get:
         yield mock_get
 
 
+class StubRatesHandler(BaseHTTPRequestHandler):
+    """
+    A local stand-in for the exchange rates API that answers after a delay and counts the requests.
+    """
+    delay = 0.3
+    requests = 0
+    rates = {"USD": 1.0, "EUR": 0.9, "RUB": 90.0}
+
+    def do_GET(self) -> None:
+        StubRatesHandler.requests += 1
+        time.sleep(self.delay)
+        query = parse_qs(urlparse(self.path).query)
+        base = query["base"][0]
+        rates = {symbol: self.rates[symbol] / self.rates[base] for symbol in query["symbols"][0].split(",")}
+        body = json.dumps({"base": base, "rates": rates}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+
+@pytest.fixture
+def stub_server() -> Generator[str, None, None]:
+    """
+    Fixture that runs the stub exchange rates API on a local port and points the views at it.
+    """
+    StubRatesHandler.requests = 0
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubRatesHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    url = f"http://127.0.0.1:{server.server_port}/latest"
+    with patch("src.views.EXCHANGE_RATES_URL", url):
+        yield url
+    server.shutdown()
+    server.server_close()
+
+
 def test_get_time_of_day():
     """
     Test for get_time_of_day function.
@@ -46,6 +118,23 @@ def test_get_card_data(sample_dataframe: DataFrame):
     assert get_card_data(sample_dataframe) == expected_output
 
 
+def test_get_card_data_does_not_modify_input(sample_dataframe: DataFrame):
+    """
+    Test that get_card_data leaves the DataFrame unchanged.
+    """
+    original = sample_dataframe.copy()
+    get_card_data(sample_dataframe)
+    assert sample_dataframe.equals(original)
+
+
+def test_get_card_data_categorical(sample_dataframe: DataFrame):
+    """
+    Test that get_card_data gives the same result for a categorical card column.
+    """
+    categorical = sample_dataframe.astype({'Номер карты': 'category'})
+    assert get_card_data(categorical) == get_card_data(sample_dataframe)
+
+
 def test_top_transaction(sample_dataframe: DataFrame):
     """
     Test for top_transaction function.
@@ -65,13 +154,14 @@ def test_get_currency(mock_requests_get: Mock):
     Test for get_currency function.
     """
     mock_response = Mock()
-    mock_response.json.return_value = {"rates": {"RUB": 70.0}}
+    mock_response.json.return_value = {"base": "USD", "rates": {"RUB": 70.0, "EUR": 0.5}}
     mock_requests_get.return_value = mock_response
 
     currency_data = get_currency()
     assert currency_data == [{'currency': 'USD', 'rate': 70.0},
-                             {'currency': 'EUR', 'rate': 70.0},
-                             {'currency': 'RUB', 'rate': 70.0}]
+                             {'currency': 'EUR', 'rate': 140.0},
+                             {'currency': 'RUB', 'rate': 1.0}]
+    mock_requests_get.assert_called_once()
 
 
 def test_get_stock_currency():
@@ -93,6 +183,42 @@ def test_get_stock_currency():
         ]
 
 
+def test_get_stock_currency_bulk():
+    """
+    Test that get_stock_currency uses a bulk provider when one is configured.
+    """
+    client = Mock()
+    client.download.return_value = DataFrame(
+        {("High", stock): [price] for stock, price in [("AAPL", 1.0), ("AMZN", 2.0), ("GOOGL", 3.0), ("MSFT", 4.0)]}
+    )
+    with patch("src.views.stock_provider", BulkDownloadProvider(client)):
+        stock_data = get_stock_currency()
+
+    client.download.assert_called_once()
+    assert stock_data == [
+        {'stock': 'AAPL', 'price': 1.0},
+        {'stock': 'AMZN', 'price': 2.0},
+        {'stock': 'GOOGL', 'price': 3.0},
+        {'stock': 'MSFT', 'price': 4.0},
+        {'stock': 'TSLA', 'price': 0.0}
+    ]
+
+
+def test_get_stock_currency_partial_not_cached():
+    """
+    Test that prices are not cached when some stock failed to load, so it is requested again.
+    """
+    provider = Mock()
+    provider.get_prices.side_effect = [{"AAPL": 1.0, "AMZN": 2.0},
+                                       {"AAPL": 1.0, "AMZN": 2.0, "GOOGL": 3.0, "MSFT": 4.0, "TSLA": 5.0}]
+    with patch("src.views.stock_provider", provider):
+        assert get_stock_currency() == [{'stock': 'AAPL', 'price': 1.0}, {'stock': 'AMZN', 'price': 2.0}]
+        assert len(get_stock_currency()) == 5
+        assert len(get_stock_currency()) == 5
+
+    assert provider.get_prices.call_count == 2
+
+
 def test_get_data(sample_dataframe: DataFrame):
     """
     Test for get_data function.
@@ -119,5 +245,67 @@ def test_read_xls_file():
     assert isinstance(df, DataFrame)
 
 
+def test_get_card_data_chunked(sample_dataframe: DataFrame):
+    """
+    Test that get_card_data_chunked matches get_card_data.
+    """
+    result = get_card_data_chunked(iter_xls_chunks("data/operations.xlsx", 7))
+    expected = get_card_data(sample_dataframe)
+    assert [card["last_digits"] for card in result] == [card["last_digits"] for card in expected]
+    for actual, card in zip(result, expected):
+        assert actual["total_spent"] == pytest.approx(card["total_spent"])
+        assert actual["cashback"] == pytest.approx(card["cashback"])
+
+
+def test_top_transaction_chunked(sample_dataframe: DataFrame):
+    """
+    Test that top_transaction_chunked matches top_transaction.
+    """
+    result = top_transaction_chunked(iter_xls_chunks("data/operations.xlsx", 7))
+    assert result == top_transaction(sample_dataframe)
+
+
+def test_get_currency_single_request(stub_server: str):
+    """
+    Test that the rates of all currencies come from a single request to the stub API.
+    """
+    currency_data = get_currency()
+
+    assert [currency["currency"] for currency in currency_data] == ['USD', 'EUR', 'RUB']
+    assert [currency["rate"] for currency in currency_data] == pytest.approx([90.0, 100.0, 1.0])
+    assert StubRatesHandler.requests == 1
+
+
+def test_get_currency_fixture_provider():
+    """
+    Test that a fixture-backed provider replaces the API.
+    """
+    with patch("src.views.rates_provider", FixtureRatesProvider("tests/fixtures/latest_rates.json")), \
+            patch("requests.Session.get") as mock_get:
+        currency_data = get_currency()
+
+    mock_get.assert_not_called()
+    assert [currency["rate"] for currency in currency_data] == pytest.approx([88.65, 88.65 / 0.925, 1.0])
+
+
+def test_get_currency_timeout(stub_server: str):
+    """
+    Test that a request slower than the timeout is skipped.
+    """
+    with patch("src.views.REQUEST_TIMEOUT", StubRatesHandler.delay / 3):
+        assert get_currency() == []
+
+
+def test_get_currency_cached(stub_server: str):
+    """
+    Test that repeated calls are served from the cache.
+    """
+    first = get_currency()
+    with patch("requests.Session.get") as mock_get:
+        assert get_currency() == first
+    mock_get.assert_not_called()
+    assert get_cache_stats()["currency_rates"] == {"hits": 1, "stale_hits": 0, "misses": 1, "size": 1}
+
+
 if __name__ == "__main__":
     pytest.main()